@@ -0,0 +1,101 @@
+"""Row decoding micro-benchmark for JournalIdea.
+
+Decodes a synthetic view response (100k rows by default) the two ways the
+client can: the defaulting `from_dict` path and the trusted `from_doc` path.
+Also reports the memory held per decoded idea.
+
+Usage:
+    uv run python benchmarks/bench_decode.py
+    uv run python benchmarks/bench_decode.py --rows 20000 --repeat 5
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from idea_capture.models import JournalIdea
+
+
+def make_response(rows: int) -> bytes:
+    """A by_created-style view response with include_docs, as raw JSON bytes"""
+    now = datetime.now(timezone.utc).isoformat()
+    docs = [
+        {
+            "_id": str(uuid4()),
+            "_rev": "1-0123456789abcdef0123456789abcdef",
+            "type": "idea",
+            "content": f"Benchmark idea number {i} with a sentence or so of text",
+            "tags": ["work", f"tag-{i % 50}"],
+            "priority": ("high", "medium", "low")[i % 3],
+            "status": ("todo", "in-progress", "done")[i % 3],
+            "metadata": {"source": "bench", "project": f"p{i % 10}"},
+            "created": now,
+            "updated": now,
+        }
+        for i in range(rows)
+    ]
+    return json.dumps(
+        {"rows": [{"id": d["_id"], "key": d["created"], "value": None, "doc": d} for d in docs]}
+    ).encode()
+
+
+# How the client decodes rows
+DECODERS = {
+    "from_dict": JournalIdea.from_dict,
+    "from_doc": JournalIdea.from_doc,
+}
+
+
+def decode(raw: bytes, decoder) -> list[JournalIdea]:
+    return [decoder(row["doc"]) for row in json.loads(raw)["rows"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3, help="best-of runs per decoder")
+    args = parser.parse_args()
+
+    raw = make_response(args.rows)
+    start = time.perf_counter()
+    rows = json.loads(raw)["rows"]
+    parse = time.perf_counter() - start
+    print(f"{args.rows} rows, {len(raw) / 1e6:.1f} MB; json.loads alone {parse * 1000:.0f} ms\n")
+
+    print(f"{'decoder':<14} {'decode':>10} {'+ parse':>10} {'per row':>10} {'bytes/idea':>11}")
+    for name, decoder in DECODERS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            # Like timeit, keep the collector from walking the parsed rows mid-run
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            ideas = [decoder(row["doc"]) for row in rows]
+            best = min(best, time.perf_counter() - start)
+            gc.enable()
+            del ideas
+
+        start = time.perf_counter()
+        decode(raw, decoder)
+        total = time.perf_counter() - start
+
+        # Memory held by the idea objects themselves (the doc dicts already exist)
+        gc.collect()
+        tracemalloc.start()
+        ideas = [decoder(row["doc"]) for row in rows]
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del ideas
+
+        print(
+            f"{name:<14} {best * 1000:8.0f} ms {total * 1000:8.0f} ms "
+            f"{best / args.rows * 1e9:7.0f} ns {held / args.rows:11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Startup benchmark for the `idea` command.
+
+Times complete `idea` invocations (new process each time) with the CLI running
+in-process versus forwarded to the daemon. The default command queues a capture
+in a throwaway journal, so it measures startup cost without touching CouchDB;
+pass `--command` to time a real read against the configured server.
+
+Usage:
+    uv run python benchmarks/bench_startup.py
+    uv run python benchmarks/bench_startup.py -n 50
+    uv run python benchmarks/bench_startup.py --command "next --limit 5"
+"""
+
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def run_many(argv: list[str], env: dict, runs: int) -> list[float]:
+    """Wall-clock seconds for each of `runs` invocations of `idea <argv>`"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "idea_capture.client", *argv],
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{label:<12} mean {statistics.mean(timings) * 1000:7.1f} ms   "
+        f"p50 {statistics.median(timings) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms"
+    )
+
+
+def wait_for_daemon(env: dict, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = subprocess.run(
+            [sys.executable, "-m", "idea_capture.client", "daemon", "status"],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if "running (pid" in status.stdout:
+            return
+        time.sleep(0.1)
+    raise RuntimeError("daemon did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=20, help="invocations per mode")
+    parser.add_argument(
+        "--command",
+        default="add 'benchmark capture' --flush queue",
+        help="idea subcommand to time (must be one the daemon runs)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "IDEA_DAEMON_SOCKET": str(Path(tmp) / "daemon.sock"),
+            "COUCHDB_JOURNAL_PATH": str(Path(tmp) / "journal.jsonl"),
+            # The default command only needs credentials to pass config validation
+            "COUCHDB_USERNAME": os.environ.get("COUCHDB_USERNAME", "bench"),
+            "COUCHDB_PASSWORD": os.environ.get("COUCHDB_PASSWORD", "bench"),
+        }
+        argv = shlex.split(args.command)
+
+        report("in-process", run_many(argv, {**env, "IDEA_NO_DAEMON": "1"}, args.runs))
+
+        daemon = subprocess.Popen([sys.executable, "-m", "idea_capture.daemon"], env=env)
+        try:
+            wait_for_daemon(env)
+            run_many(argv, env, 1)  # Warm the daemon's connection pool
+            report("daemon", run_many(argv, env, args.runs))
+        finally:
+            subprocess.run(
+                [sys.executable, "-m", "idea_capture.client", "daemon", "stop"],
+                env=env,
+                stdout=subprocess.DEVNULL,
+            )
+            daemon.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
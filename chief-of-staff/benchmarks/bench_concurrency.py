@@ -0,0 +1,103 @@
+"""Concurrency benchmark for the Chief of Staff data path.
+
+Issues `get_next_actions` calls at increasing in-flight levels and reports
+throughput. With the data layer off the event loop, throughput should scale
+roughly linearly with in-flight requests until `COS_DB_MAX_WORKERS` (or the
+cluster) saturates.
+
+Usage:
+    uv run python benchmarks/bench_concurrency.py            # simulated 20ms round-trips
+    uv run python benchmarks/bench_concurrency.py --latency-ms 5
+    uv run python benchmarks/bench_concurrency.py --live     # configured cluster + default user
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from cos.config import get_settings
+from cos.db import CouchbaseClient
+
+
+class SimulatedCluster:
+    """Stands in for `Cluster`, sleeping for a fixed network round-trip per query"""
+
+    def __init__(self, latency: float, rows: int = 10):
+        now = datetime.now(timezone.utc).isoformat()
+        self.latency = latency
+        self.rows = [
+            {
+                "id": f"doc-{i}",
+                "doc_type": "task",
+                "user_id": "bench@example.com",
+                "content": "Benchmark task",
+                "status": "todo",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(rows)
+        ]
+
+    def query(self, statement, *args, **kwargs):
+        time.sleep(self.latency)
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+
+async def run_level(client: CouchbaseClient, user_id: str, in_flight: int, requests: int) -> float:
+    """Run `requests` calls with at most `in_flight` outstanding; return req/s"""
+    semaphore = asyncio.Semaphore(in_flight)
+
+    async def one():
+        async with semaphore:
+            await client.get_next_actions(user_id, limit=10)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--live", action="store_true", help="Use the configured Couchbase cluster")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated round-trip")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="In-flight levels to test")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    client = CouchbaseClient()
+    user_id = settings.default_user
+
+    if args.live:
+        client.connect()
+        if not await client.run_blocking(client.validate_user, user_id):
+            raise SystemExit(f"User '{user_id}' not found in users database")
+        # Let scope provisioning finish so the first level doesn't time it
+        await asyncio.wrap_future(client.provision_user(user_id))
+    else:
+        client._cluster = SimulatedCluster(args.latency_ms / 1000)
+        client._executor = ThreadPoolExecutor(
+            max_workers=settings.db_max_workers, thread_name_prefix="cos-db"
+        )
+
+    mode = "live" if args.live else f"simulated {args.latency_ms:g}ms"
+    print(f"Data path throughput ({mode}, {settings.db_max_workers} DB workers)\n")
+    print(f"{'in-flight':>10} {'req/s':>10} {'speedup':>10}")
+
+    baseline = None
+    try:
+        for level in (int(x) for x in args.levels.split(",")):
+            rate = await run_level(client, user_id, level, args.requests)
+            baseline = baseline or rate
+            print(f"{level:>10} {rate:>10.1f} {rate / baseline:>9.1f}x")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
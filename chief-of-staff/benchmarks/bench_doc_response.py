@@ -0,0 +1,156 @@
+"""Row decoding benchmark for DocResponse.
+
+Builds DocResponse models from synthetic stored documents (10k rows by default)
+three ways: the validated constructor `_doc_to_response` used to call,
+pydantic's `model_construct`, and the trusted path it calls now. Each is
+reported per row, both on its own and with the page serialized as a
+DocsListResponse (what a list endpoint returns).
+
+Usage:
+    uv run python benchmarks/bench_doc_response.py
+    uv run python benchmarks/bench_doc_response.py --rows 50000 --repeat 5
+"""
+
+import argparse
+import gc
+import time
+from datetime import datetime, timezone
+from functools import partial
+
+from cos.db import CouchbaseClient
+from cos.models import (
+    CaptureMode,
+    DocResponse,
+    DocsListResponse,
+    DocType,
+    Priority,
+    SourceInfo,
+    Status,
+)
+
+
+def make_docs(rows: int) -> list[dict]:
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "id": f"doc-{i}",
+            "doc_type": ("task", "note", "idea")[i % 3],
+            "user_id": "bench@example.com",
+            "content": f"Benchmark document {i} with a sentence or so of text",
+            "title": f"Doc {i}",
+            "tags": ["work", f"tag-{i % 50}"],
+            "priority": ("high", "medium", "low", None)[i % 4],
+            "status": "todo",
+            "due_date": None,
+            "project_id": f"project-{i % 10}",
+            "parent_id": None,
+            "linked_ids": [],
+            "source": {"client": "cli", "project": "cos", "capture_mode": "explicit"},
+            "metadata": {"n": i},
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(rows)
+    ]
+
+
+def validated(doc_id: str, doc: dict) -> DocResponse:
+    """The previous `_doc_to_response`: enum calls and full model validation"""
+    return DocResponse(
+        id=doc_id,
+        doc_type=DocType(doc["doc_type"]),
+        user_id=doc["user_id"],
+        content=doc["content"],
+        title=doc.get("title"),
+        tags=doc.get("tags", []),
+        priority=Priority(doc["priority"]) if doc.get("priority") else None,
+        status=Status(doc["status"]),
+        due_date=doc.get("due_date"),
+        project_id=doc.get("project_id"),
+        parent_id=doc.get("parent_id"),
+        linked_ids=doc.get("linked_ids", []),
+        source=SourceInfo(**doc["source"]) if doc.get("source") else None,
+        metadata=doc.get("metadata", {}),
+        created_at=datetime.fromisoformat(doc["created_at"]),
+        updated_at=datetime.fromisoformat(doc["updated_at"]),
+    )
+
+
+def constructed(doc_id: str, doc: dict) -> DocResponse:
+    """pydantic's own unvalidated constructor, for comparison"""
+    source = doc.get("source")
+    if source:
+        capture_mode = source.get("capture_mode")
+        source = SourceInfo.model_construct(
+            **{**source, "capture_mode": CaptureMode(capture_mode) if capture_mode else None}
+        )
+    return DocResponse.model_construct(
+        id=doc_id,
+        doc_type=DocType(doc["doc_type"]),
+        user_id=doc["user_id"],
+        content=doc["content"],
+        title=doc.get("title"),
+        tags=doc.get("tags", []),
+        priority=Priority(doc["priority"]) if doc.get("priority") else None,
+        status=Status(doc["status"]),
+        due_date=doc.get("due_date"),
+        project_id=doc.get("project_id"),
+        parent_id=doc.get("parent_id"),
+        linked_ids=doc.get("linked_ids", []),
+        source=source or None,
+        metadata=doc.get("metadata", {}),
+        created_at=datetime.fromisoformat(doc["created_at"]),
+        updated_at=datetime.fromisoformat(doc["updated_at"]),
+    )
+
+
+BUILDERS = {
+    "validated": validated,
+    "model_construct": constructed,
+    "trusted": CouchbaseClient()._doc_to_response,
+}
+
+
+def build_page(build, docs: list[dict]) -> list[DocResponse]:
+    return [build(doc["id"], doc) for doc in docs]
+
+
+def build_and_serialize(build, docs: list[dict]) -> str:
+    # FastAPI re-checks the returned model, then dumps it to JSON
+    page = DocsListResponse(items=build_page(build, docs), limit=len(docs), offset=0)
+    return DocsListResponse.model_validate(page).model_dump_json()
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # Like timeit, keep the collector from walking the rows mid-run
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+        gc.enable()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3, help="best-of runs per builder")
+    args = parser.parse_args()
+
+    docs = make_docs(args.rows)
+    print(f"{args.rows} rows\n")
+    print(f"{'builder':<16} {'build':>10} {'+ serialize':>12}")
+    for name, build in BUILDERS.items():
+        build_time = best_of(args.repeat, partial(build_page, build, docs))
+        total_time = best_of(args.repeat, partial(build_and_serialize, build, docs))
+        print(
+            f"{name:<16} {build_time / args.rows * 1e6:7.2f} us "
+            f"{total_time / args.rows * 1e6:9.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
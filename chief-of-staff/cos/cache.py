@@ -0,0 +1,233 @@
+"""User validation caches for Chief of Staff.
+
+Caches the result of looking a user up in the `users` bucket, both positive and
+negative, so authenticating a request normally costs no Couchbase round-trip.
+Entries expire (so revoked users stop validating) and the cache is size-bounded.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache(ABC):
+    """Bounded TTL cache of user_id -> exists, with hit/miss counters"""
+
+    backend = "none"
+    # Whether calls touch disk, so request handlers must make them off the event loop
+    blocking = False
+
+    def __init__(self, ttl: float, negative_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[bool]:
+        """Cached validity for the user, or None on a miss/expired entry"""
+
+    @abstractmethod
+    def set(self, user_id: str, valid: bool) -> None:
+        """Cache a lookup result; negative results use the shorter TTL"""
+
+    @abstractmethod
+    def invalidate(self, user_id: str) -> None:
+        """Drop a cached entry (e.g. after revoking a user)"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Live entries"""
+
+    def _expiry(self, valid: bool) -> float:
+        return time.time() + (self.ttl if valid else self.negative_ttl)
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint"""
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+            "max_entries": self.max_entries,
+        }
+
+
+class MemoryUserCache(UserCache):
+    """Per-process LRU cache"""
+
+    backend = "memory"
+
+    def __init__(self, ttl: float, negative_ttl: float, max_entries: int):
+        super().__init__(ttl, negative_ttl, max_entries)
+        self._entries: OrderedDict[str, tuple[float, bool]] = OrderedDict()
+        self._lock = threading.Lock()  # Called from DB executor threads and the event loop
+
+    def get(self, user_id: str) -> Optional[bool]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id: str, valid: bool) -> None:
+        with self._lock:
+            self._entries[user_id] = (self._expiry(valid), valid)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteUserCache(UserCache):
+    """File-backed cache shared by every uvicorn worker on the host.
+
+    Uses SQLite in WAL mode so readers in other processes don't block. Hits are
+    reads; an entry's last_used time is rewritten at most every `touch_interval`
+    seconds. Every `max_entries // 100` sets, the table is cut back to
+    `max_entries`: expired rows first, then the least recently used. SQLite
+    errors (e.g. a lock held too long by another worker) count as misses.
+    Hit/miss counters are per process.
+    """
+
+    backend = "sqlite"
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float,
+        negative_ttl: float,
+        max_entries: int,
+        touch_interval: float = 60.0,
+    ):
+        super().__init__(ttl, negative_ttl, max_entries)
+        self.path = path
+        self.touch_interval = touch_interval
+        self._prune_every = max(1, max_entries // 100)
+        self._sets_since_prune = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=1.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                valid INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS users_expires ON users(expires_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS users_last_used ON users(last_used)")
+
+    def get(self, user_id: str) -> Optional[bool]:
+        with self._lock:
+            now = time.time()
+            try:
+                row = self._conn.execute(
+                    "SELECT valid, last_used FROM users WHERE user_id = ? AND expires_at > ?",
+                    (user_id, now),
+                ).fetchone()
+                if row is not None and now - row[1] >= self.touch_interval:
+                    self._conn.execute(
+                        "UPDATE users SET last_used = ? WHERE user_id = ?", (now, user_id)
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"User cache read failed, treating as a miss: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return bool(row[0])
+
+    def set(self, user_id: str, valid: bool) -> None:
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO users (user_id, valid, expires_at, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    (user_id, int(valid), self._expiry(valid), time.time()),
+                )
+                self._sets_since_prune += 1
+                if self._sets_since_prune >= self._prune_every:
+                    self._sets_since_prune = 0
+                    self._prune()
+            except sqlite3.Error as e:
+                logger.warning(f"User cache write failed: {e}")
+
+    def _prune(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        removed = self._conn.execute(
+            "DELETE FROM users WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        excess = count - removed - self.max_entries
+        if excess > 0:
+            removed += self._conn.execute(
+                "DELETE FROM users WHERE user_id IN "
+                "(SELECT user_id FROM users ORDER BY last_used LIMIT ?)",
+                (excess,),
+            ).rowcount
+        self.evictions += removed
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+            except sqlite3.Error as e:
+                logger.warning(f"User cache invalidation of {user_id} failed: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            try:
+                return self._conn.execute(
+                    "SELECT COUNT(*) FROM users WHERE expires_at > ?", (time.time(),)
+                ).fetchone()[0]
+            except sqlite3.Error as e:
+                logger.warning(f"User cache size unavailable: {e}")
+                return 0
+
+
+def build_user_cache(settings: Settings) -> UserCache:
+    """Create the user cache selected by COS_USER_CACHE_BACKEND"""
+    args = (
+        settings.user_cache_ttl_seconds,
+        settings.user_cache_negative_ttl_seconds,
+        settings.user_cache_max_entries,
+    )
+    if settings.user_cache_backend == "sqlite":
+        return SQLiteUserCache(settings.user_cache_path, *args)
+    if settings.user_cache_backend == "memory":
+        return MemoryUserCache(*args)
+    raise ValueError(f"Unknown user cache backend '{settings.user_cache_backend}'")
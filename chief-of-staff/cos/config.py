@@ -15,6 +15,35 @@ class Settings(BaseSettings):
     couchbase_password: str = ""
     couchbase_bucket: str = "chief_of_staff"
 
+    # Data path: SDK calls run on a bounded thread pool off the event loop
+    db_max_workers: int = 32
+    kv_timeout_seconds: float = 2.5
+    query_timeout_seconds: float = 10.0
+    # Per-item mutations one bulk request keeps in flight, so a large batch
+    # can't take every executor thread from other requests
+    bulk_concurrency: int = 8
+
+    # Streamed listings and exports: rows fetched per executor hop, and the query
+    # timeout for a whole stream (it stays open while the client reads)
+    stream_batch_size: int = 100
+    stream_timeout_seconds: float = 300.0
+
+    # User validation cache: "memory" (per worker) or "sqlite" (shared by workers on a host)
+    user_cache_backend: str = "memory"
+    user_cache_path: str = "/tmp/cos-user-cache.sqlite3"
+    user_cache_ttl_seconds: float = 300.0
+    user_cache_negative_ttl_seconds: float = 30.0
+    # Also bounds the per-user stats snapshots and ready-scope memo each worker keeps
+    user_cache_max_entries: int = 10000
+
+    # Scope provisioning: how long a first request waits before getting a 503,
+    # and how long provisioning polls for a new scope/collection to become ready
+    provision_wait_seconds: float = 5.0
+    provision_timeout_seconds: float = 30.0
+
+    # Per-user stats snapshot; writes invalidate it, the TTL bounds the 24h window drift
+    stats_cache_ttl_seconds: float = 30.0
+
     # API settings
     api_prefix: str = "/api/cos"
     debug: bool = False
@@ -1,22 +1,64 @@
 """Couchbase database client for Chief of Staff"""
 
+import asyncio
+import base64
+import functools
+import json
 import logging
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from itertools import islice
+from typing import Any, Optional, TypeVar, Union
 
+from couchbase import subdocument as SD
 from couchbase.auth import PasswordAuthenticator
 from couchbase.cluster import Cluster
-from couchbase.exceptions import DocumentNotFoundException, ScopeNotFoundException
+from couchbase.exceptions import (
+    CasMismatchException,
+    CollectionAlreadyExistsException,
+    CollectionNotFoundException,
+    DocumentNotFoundException,
+    ScopeAlreadyExistsException,
+    ScopeNotFoundException,
+    TimeoutException,
+)
 from couchbase.management.collections import CollectionSpec
-from couchbase.options import ClusterOptions, QueryOptions
+from couchbase.options import (
+    ClusterOptions,
+    ClusterTimeoutOptions,
+    MutateInOptions,
+    QueryOptions,
+    RemoveOptions,
+)
+from pydantic import BaseModel
 
+from .cache import UserCache, build_user_cache
 from .config import get_settings
 from .models import (
+    BatchGetResponse,
+    BulkDeleteItem,
+    BulkDocsRequest,
+    BulkDocsResponse,
+    BulkItemResult,
+    BulkOp,
+    BulkUpdateItem,
+    CaptureMode,
     CreateDocRequest,
+    DocPatchResponse,
     DocResponse,
     DocType,
     DocsListResponse,
+    EdgeType,
+    GraphEdge,
+    GraphResponse,
+    PartialDocResponse,
+    PartialDocsListResponse,
     Priority,
     SaveContextRequest,
     SourceInfo,
@@ -26,6 +68,300 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+class DocumentConflictError(Exception):
+    """A CAS-guarded write lost to a concurrent change"""
+
+
+# Sortable fields for list_documents -> N1QL sort expression. Nullable fields are
+# coalesced so keyset comparisons stay total (NULL never compares true).
+SORT_FIELDS = {
+    "updated_at": "d.updated_at",
+    "created_at": "d.created_at",
+    "due_date": 'IFMISSINGORNULL(d.due_date, "")',
+    "title": 'IFMISSINGORNULL(d.title, "")',
+}
+
+
+# Enum members by stored value, for decoding rows without re-validating them
+_DOC_TYPES = {m.value: m for m in DocType}
+_PRIORITIES = {m.value: m for m in Priority}
+_STATUSES = {m.value: m for m in Status}
+_CAPTURE_MODES = {m.value: m for m in CaptureMode}
+
+_DOC_RESPONSE_FIELDS = frozenset(DocResponse.model_fields)
+_SOURCE_INFO_FIELDS = frozenset(SourceInfo.model_fields)
+
+# The instance slots _construct fills in, as laid out by pydantic 2.x. If a release
+# changes them, _construct validates instead of writing private attributes blind.
+_MODEL_SLOTS = ("__dict__", "__pydantic_fields_set__", "__pydantic_extra__", "__pydantic_private__")
+_TRUSTED_CONSTRUCT = getattr(BaseModel, "__slots__", None) == _MODEL_SLOTS
+
+
+def _construct(cls: type[T], values: dict, fields_set: frozenset) -> T:
+    """Build a model from already-typed values with every field set, skipping validation.
+
+    Same result as `cls.model_construct(**values)`, which walks each field's
+    defaults and aliases in Python and ends up slower than validating.
+    """
+    if not _TRUSTED_CONSTRUCT:
+        return cls.model_validate({name: values[name] for name in fields_set})
+    model = object.__new__(cls)
+    object.__setattr__(model, "__dict__", values)
+    object.__setattr__(model, "__pydantic_fields_set__", set(fields_set))
+    object.__setattr__(model, "__pydantic_extra__", None)
+    object.__setattr__(model, "__pydantic_private__", None)
+    return model
+
+
+def _source_info(source: dict) -> SourceInfo:
+    """Trusted SourceInfo for a stored `source` object"""
+    capture_mode = source.get("capture_mode")
+    return _construct(
+        SourceInfo,
+        {
+            "client": source["client"],
+            "project": source.get("project"),
+            "branch": source.get("branch"),
+            "files": source.get("files"),
+            "session_id": source.get("session_id"),
+            "capture_mode": _CAPTURE_MODES[capture_mode] if capture_mode else None,
+        },
+        _SOURCE_INFO_FIELDS,
+    )
+
+
+# Sparse fieldsets (`fields=`) on list queries: any DocResponse field; id is always returned.
+# Also the paths a PATCH reads back, within lookup_in's limit of 16 per call
+PROJECTABLE_FIELDS = tuple(name for name in DocResponse.model_fields if name != "id")
+
+# Stored value -> response value for projectable fields that aren't plain JSON
+_FIELD_DECODERS: dict[str, Callable[[Any], Any]] = {
+    "doc_type": _DOC_TYPES.__getitem__,
+    "priority": _PRIORITIES.__getitem__,
+    "status": _STATUSES.__getitem__,
+    "source": _source_info,
+    "created_at": datetime.fromisoformat,
+    "updated_at": datetime.fromisoformat,
+}
+
+# What _doc_to_response reads a missing field as, where that isn't None
+_FIELD_DEFAULTS: dict[str, Callable[[], Any]] = {"tags": list, "linked_ids": list, "metadata": dict}
+
+
+# Secondary indexes per user collection: (name, index keys, partial-index WHERE).
+# Each query in CouchbaseClient names the entry it is planned against; keep them in
+# sync (tests/test_indexes.py EXPLAINs every query shape against a live cluster).
+_PRIORITY_RANK = (
+    'CASE priority WHEN "high" THEN 1 WHEN "medium" THEN 2 WHEN "low" THEN 3 ELSE 4 END'
+)
+# Undated items sort after every ISO date (same as due_date NULLS LAST)
+_DUE_DATE_LAST = 'IFMISSINGORNULL(due_date, "~")'
+_LIST_FILTERS = "doc_type, status, priority, source.project"
+
+# list_documents sort keys as indexed (SORT_FIELDS without the `d.` alias)
+_LIST_SORT_KEYS = {
+    "updated": "updated_at",
+    "created": "created_at",
+    "due": 'IFMISSINGORNULL(due_date, "")',
+    "title": 'IFMISSINGORNULL(title, "")',
+}
+
+INDEX_CATALOG: list[tuple[str, str, Optional[str]]] = [
+    # list_documents: one index per sort field and direction. META().id follows the
+    # sort key in the same direction, so `ORDER BY sort, META(d).id` is index order
+    # and LIMIT is pushed into the scan; filters are kept as trailing keys.
+    *(
+        (
+            f"idx_list_{name}_{direction.lower()}",
+            f"{key} {direction}, META().id {direction}, {_LIST_FILTERS}",
+            None,
+        )
+        for name, key in _LIST_SORT_KEYS.items()
+        for direction in ("DESC", "ASC")
+    ),
+    # list_documents tag filters (ANY ... SATISFIES) and get_tags (UNNEST, covered)
+    ("idx_tags_status_updated", "ALL ARRAY t FOR t IN tags END, status, updated_at DESC", None),
+    # list_documents / project endpoints filtered by project, in default sort order
+    (
+        "idx_project_updated",
+        "source.project, updated_at DESC, META().id DESC, doc_type, status, priority",
+        None,
+    ),
+    # get_next_actions: partial index keyed exactly in priority-queue order, so the
+    # queue is read in index order and stops at LIMIT
+    (
+        "idx_next_actions_order",
+        f"{_PRIORITY_RANK}, {_DUE_DATE_LAST}, updated_at DESC",
+        'doc_type IN ["idea", "task"] AND status IN ["inbox", "todo"]',
+    ),
+    # get_due_soon
+    ("idx_due_tasks", "due_date, status", 'doc_type = "task"'),
+    # get_latest_context, with and without a project
+    ("idx_context", "created_at DESC, source.project", 'doc_type = "context"'),
+    ("idx_context_project", "source.project, created_at DESC", 'doc_type = "context"'),
+    # get_stats: covered GROUP BY over every facet
+    ("idx_stats", "doc_type, status, priority, updated_at", None),
+    # get_graph reverse edges (children, project_items)
+    ("idx_parent", "parent_id", None),
+    ("idx_project_id", "project_id", None),
+]
+
+# Indexes earlier releases created (provisioning, or the README's setup script) that no
+# query plans against any more; dropped on provisioning so writes stop maintaining them
+RETIRED_INDEXES = [
+    "idx_doc_type",
+    "idx_status",
+    "idx_updated",
+    "idx_status_priority",
+    "idx_project",
+    "idx_tags",
+    "idx_due_date",
+]
+
+# Graph edge types that point from a document to others via its own fields
+FORWARD_EDGES = {EdgeType.parent: "parent_id", EdgeType.project: "project_id"}
+# ...and those found by querying for documents that point back at it
+REVERSE_EDGES = {EdgeType.children: "parent_id", EdgeType.project_items: "project_id"}
+
+
+def _remember(entries: OrderedDict, key: str, value: Any, max_entries: int) -> list:
+    """Store `key` as most recently used; returns the values evicted past `max_entries`"""
+    entries[key] = value
+    entries.move_to_end(key)
+    evicted = []
+    while len(entries) > max_entries:
+        evicted.append(entries.popitem(last=False)[1])
+    return evicted
+
+
+def _bulk_result(
+    op: BulkOp, index: int, doc_id: str, exceptions: dict[str, Optional[Exception]]
+) -> BulkItemResult:
+    """Per-item bulk outcome from a multi-op exception map"""
+    error = exceptions.get(doc_id)
+    if error is None:
+        return BulkItemResult(op=op, index=index, id=doc_id, success=True)
+    if isinstance(error, DocumentNotFoundException):
+        message = "Document not found"
+    elif isinstance(error, (CasMismatchException, DocumentConflictError)):
+        message = "Document was modified concurrently"
+    else:
+        message = str(error) or type(error).__name__
+    return BulkItemResult(op=op, index=index, id=doc_id, success=False, error=message)
+
+
+def _forward_targets(doc: DocResponse, edge_type: EdgeType) -> list[str]:
+    """IDs a document points at through one forward edge type"""
+    if edge_type == EdgeType.links:
+        return doc.linked_ids
+    target = getattr(doc, FORWARD_EDGES[edge_type])
+    return [target] if target else []
+
+
+def _parse_sort(sort: str) -> tuple[str, bool]:
+    """Parse `field:dir` into (field, descending), rejecting unknown fields"""
+    field, _, direction = sort.partition(":")
+    if field not in SORT_FIELDS or direction not in ("", "asc", "desc"):
+        raise ValueError(
+            f"Invalid sort '{sort}'; expected one of {', '.join(SORT_FIELDS)} with :asc or :desc"
+        )
+    return field, direction == "desc"
+
+
+def _parse_fields(fields: Optional[list[str]]) -> Optional[tuple[str, ...]]:
+    """Validate a sparse fieldset; None (or empty) means whole documents"""
+    if not fields:
+        return None
+    unknown = [f for f in fields if f != "id" and f not in PROJECTABLE_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Invalid fields {', '.join(unknown)}; expected any of {', '.join(PROJECTABLE_FIELDS)}"
+        )
+    return tuple(dict.fromkeys(f for f in fields if f != "id"))
+
+
+def _projection(fields: Optional[tuple[str, ...]]) -> str:
+    """SELECT list for a list query: the whole document, or only the requested fields"""
+    if fields is None:
+        return "META(d).id, d.*"
+    return ", ".join(["META(d).id", *(f"d.`{field}`" for field in fields)])
+
+
+def _encode_cursor(sort: str, sort_value: Any, doc_id: str) -> str:
+    """Build an opaque keyset cursor for the row a page ended on"""
+    raw = json.dumps([sort, sort_value, doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple[Any, str]:
+    """Decode a keyset cursor into (sort value, doc id) for the given sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_sort != sort or not isinstance(doc_id, str):
+        raise ValueError("Cursor does not match the requested sort")
+    return sort_value, doc_id
+
+
+def _list_filters(
+    doc_type: Optional[DocType],
+    status: Optional[Status],
+    priority: Optional[Priority],
+    tags: Optional[list[str]],
+    project: Optional[str],
+    sort_expr: str,
+) -> tuple[list[str], dict[str, Any]]:
+    """WHERE conditions and parameters for the list_documents filters"""
+    conditions = []
+    params: dict[str, Any] = {}
+
+    if doc_type:
+        conditions.append("d.doc_type = $doc_type")
+        params["doc_type"] = doc_type.value
+
+    if status:
+        conditions.append("d.status = $status")
+        params["status"] = status.value
+
+    if priority:
+        conditions.append("d.priority = $priority")
+        params["priority"] = priority.value
+
+    if tags:
+        # All tags must be present; ANY ... SATISFIES lets the planner use idx_tags_status_updated
+        for i, tag in enumerate(tags):
+            conditions.append(f"ANY t IN d.tags SATISFIES t = $tag{i} END")
+            params[f"tag{i}"] = tag
+
+    if project:
+        conditions.append("d.source.project = $project")
+        params["project"] = project
+
+    # Constrain the sort key so the matching idx_list_* index is always eligible
+    conditions.append(f"{sort_expr} IS NOT MISSING")
+    return conditions, params
+
+
+def _add_keyset(conditions: list[str], params: dict[str, Any], cursor: str, sort: str) -> None:
+    """Resume strictly after the row a keyset cursor points at"""
+    sort_field, descending = _parse_sort(sort)
+    sort_expr = SORT_FIELDS[sort_field]
+    after_value, after_id = _decode_cursor(cursor, sort)
+    op = "<" if descending else ">"
+    # The leading bound is a single range on the index's first key, so the scan
+    # starts at the cursor and stays in index order (an OR of two spans would not)
+    conditions.append(
+        f"{sort_expr} {op}= $after_value"
+        f" AND ({sort_expr} {op} $after_value OR META(d).id {op} $after_id)"
+    )
+    params["after_value"] = after_value
+    params["after_id"] = after_id
+
 
 class CouchbaseClient:
     """Couchbase client with scope-per-user multi-tenancy"""
@@ -35,7 +371,20 @@ class CouchbaseClient:
         self._cluster: Optional[Cluster] = None
         self._bucket = None
         self._users_bucket = None
-        self._validated_users: set[str] = set()  # Cache of validated user_ids
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._provision_executor: Optional[ThreadPoolExecutor] = None
+        self._provision_lock = threading.RLock()  # Re-entered if a job finishes mid-submit
+        self._provisioning: dict[str, Future] = {}  # user_id -> in-flight provisioning job
+        # Per-user state below is LRU-bounded like the user cache (user_cache_max_entries)
+        self._provisioned_users: OrderedDict[str, None] = OrderedDict()  # Scopes known ready
+        self.user_cache: UserCache = build_user_cache(self.settings)
+        # user_id -> (taken_at, stats)
+        self._stats_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        # user_id -> number of the user's last write; users evicted from it read as
+        # the floor (the newest evicted number), so an eviction never looks like "no write"
+        self._stats_generation: OrderedDict[str, int] = OrderedDict()
+        self._stats_generation_floor = 0
+        self._stats_writes = 0
 
     def connect(self) -> None:
         """Establish connection to Couchbase cluster"""
@@ -43,9 +392,22 @@ class CouchbaseClient:
             self.settings.couchbase_username,
             self.settings.couchbase_password,
         )
+        # SDK-side timeouts bound how long an executor thread can be held by one call
+        timeouts = ClusterTimeoutOptions(
+            kv_timeout=timedelta(seconds=self.settings.kv_timeout_seconds),
+            query_timeout=timedelta(seconds=self.settings.query_timeout_seconds),
+        )
         self._cluster = Cluster(
             f"couchbase://{self.settings.couchbase_host}",
-            ClusterOptions(auth),
+            ClusterOptions(auth, timeout_options=timeouts),
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.settings.db_max_workers,
+            thread_name_prefix="cos-db",
+        )
+        # Separate pool so scope provisioning never starves request traffic
+        self._provision_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="cos-provision"
         )
         # Wait for cluster to be ready
         self._cluster.wait_until_ready(timedelta(seconds=10))
@@ -54,6 +416,12 @@ class CouchbaseClient:
 
     def close(self) -> None:
         """Close connection"""
+        if self._provision_executor:
+            self._provision_executor.shutdown(wait=False, cancel_futures=True)
+            self._provision_executor = None
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
         if self._cluster:
             self._cluster.close()
 
@@ -75,6 +443,80 @@ class CouchbaseClient:
             raise RuntimeError("Database not connected")
         return self._users_bucket
 
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if not self._executor:
+            raise RuntimeError("Database not connected")
+        return self._executor
+
+    @property
+    def provision_executor(self) -> ThreadPoolExecutor:
+        if not self._provision_executor:
+            raise RuntimeError("Database not connected")
+        return self._provision_executor
+
+    async def run_blocking(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking SDK call on the bounded DB executor.
+
+        Keeps the event loop free while Couchbase round-trips are in flight. If the
+        awaiting coroutine is cancelled (e.g. the client disconnects) a call that has
+        not started yet is dropped; a running call is bounded by the SDK timeouts.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def _query_rows(self, statement: str, params: Optional[dict[str, Any]] = None) -> list[dict]:
+        """Run a N1QL query and materialize its rows (blocking)"""
+        if params:
+            result = self.cluster.query(statement, QueryOptions(named_parameters=params))
+        else:
+            result = self.cluster.query(statement)
+        return list(result)
+
+    async def _query(self, statement: str, params: Optional[dict[str, Any]] = None) -> list[dict]:
+        """Run a N1QL query off the event loop"""
+        return await self.run_blocking(self._query_rows, statement, params)
+
+    def _query_iter(
+        self, statement: str, params: Optional[dict[str, Any]] = None
+    ) -> Iterator[dict]:
+        """Start a N1QL query whose rows are read as the SDK streams them (blocking)"""
+        timeout = timedelta(seconds=self.settings.stream_timeout_seconds)
+        if params:
+            options = QueryOptions(named_parameters=params, timeout=timeout)
+        else:
+            options = QueryOptions(timeout=timeout)
+        return iter(self.cluster.query(statement, options))
+
+    async def _stream_query(
+        self, statement: str, params: Optional[dict[str, Any]] = None
+    ) -> AsyncIterator[list[dict]]:
+        """Run a N1QL query off the event loop, returning its rows in batches.
+
+        The first batch is read before returning, so a failing query raises here
+        rather than partway through a response. Later batches are only read as the
+        consumer asks for them; at most one batch is held in memory.
+        """
+        batch_size = self.settings.stream_batch_size
+
+        def start() -> tuple[Iterator[dict], list[dict]]:
+            rows = self._query_iter(statement, params)
+            return rows, [*islice(rows, batch_size)]
+
+        rows, first = await self.run_blocking(start)
+
+        async def batches() -> AsyncIterator[list[dict]]:
+            batch = first
+            while batch:
+                yield batch
+                if len(batch) < batch_size:
+                    return
+                batch = await self.run_blocking(lambda: [*islice(rows, batch_size)])
+
+        return batches()
+
     def _get_user_by_email(self, email: str) -> Optional[dict]:
         """Look up user by email from users bucket"""
         query = """
@@ -83,66 +525,161 @@ class CouchbaseClient:
             WHERE u.email = $email AND u.type = "user"
             LIMIT 1
         """
-        result = list(self.cluster.query(query, QueryOptions(named_parameters={"email": email})))
+        result = self._query_rows(query, {"email": email})
         if result:
             return result[0]
         return None
 
+    def _lookup_user(self, email: str) -> bool:
+        """Look the user up in the users bucket and cache the answer"""
+        valid = self._get_user_by_email(email) is not None
+        self.user_cache.set(email, valid)
+        return valid
+
     def _get_user_id_from_email(self, email: str) -> Optional[str]:
         """Get user_id from email, using cache"""
-        if email in self._validated_users:
-            return email  # Already validated
+        valid = self.user_cache.get(email)
+        if valid is None:
+            valid = self._lookup_user(email)
+        return email if valid else None
 
-        user = self._get_user_by_email(email)
-        if user:
-            self._validated_users.add(email)
-            return email
-        return None
-
-    def _ensure_user_scope(self, user_id: str) -> None:
-        """Ensure scope and collection exist for user, create if not"""
-        import time
+    def _ensure_user_scope(self, user_id: str, ensure_indexes: bool = False) -> None:
+        """Ensure scope and collection exist for user, create if not (blocking).
 
-        scope_name = f"user_{user_id.replace('@', '_at_').replace('.', '_')}"
+        Waits for each step by polling readiness rather than sleeping. Indexes are
+        created with a new collection, or always when `ensure_indexes` is set.
+        """
+        scope_name = self._get_scope_name(user_id)
         collection_mgr = self.bucket.collections()
 
-        # Check existing scopes
-        existing_scopes = [s.name for s in collection_mgr.get_all_scopes()]
-
-        if scope_name not in existing_scopes:
-            # Create scope
-            logger.info(f"Creating scope {scope_name} for user {user_id}")
-            collection_mgr.create_scope(scope_name)
-            # Wait for scope to be ready
-            time.sleep(1)
-
-        # Check if collection exists in scope
         scope_spec = next((s for s in collection_mgr.get_all_scopes() if s.name == scope_name), None)
         existing_collections = [c.name for c in scope_spec.collections] if scope_spec else []
 
-        if "documents" not in existing_collections:
-            # Create collection
+        if scope_spec is None:
+            logger.info(f"Creating scope {scope_name} for user {user_id}")
+            with suppress(ScopeAlreadyExistsException):  # Another worker got there first
+                collection_mgr.create_scope(scope_name)
+
+        created = "documents" not in existing_collections
+        if created:
             logger.info(f"Creating documents collection in scope {scope_name}")
-            collection_mgr.create_collection(CollectionSpec(scope_name=scope_name, collection_name="documents"))
-            # Wait for collection to be ready
-            time.sleep(1)
-            # Create basic indexes
+            spec = CollectionSpec(scope_name=scope_name, collection_name="documents")
+
+            def create_collection() -> None:
+                with suppress(CollectionAlreadyExistsException):
+                    collection_mgr.create_collection(spec)
+
+            # A new scope may not be visible to the collection manager yet
+            self._poll_until_ready(create_collection, f"scope {scope_name}")
+            # ...nor the new collection to the KV service
+            collection = self._get_collection(user_id)
+            self._poll_until_ready(
+                lambda: collection.exists("_provision_probe"), f"{scope_name}.documents"
+            )
+
+        if created or ensure_indexes:
             self._create_indexes_for_user(user_id)
 
+    def _poll_until_ready(self, attempt: Callable[[], Any], what: str) -> None:
+        """Retry `attempt` with backoff while the scope/collection is still propagating"""
+        deadline = time.monotonic() + self.settings.provision_timeout_seconds
+        delay = 0.05
+        while True:
+            try:
+                attempt()
+                return
+            except (ScopeNotFoundException, CollectionNotFoundException, TimeoutException):
+                if time.monotonic() + delay > deadline:
+                    raise TimeoutError(f"Timed out waiting for {what} to become ready") from None
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+    def provision_user(self, user_id: str) -> Future:
+        """Start provisioning the user's scope in the background, if not already.
+
+        Returns a shared future: concurrent callers for the same user all get the
+        same in-flight job, and a user whose scope is known to be ready gets an
+        already-completed future. A failed job is forgotten so the next call retries.
+        """
+        with self._provision_lock:
+            if user_id in self._provisioned_users:
+                self._provisioned_users.move_to_end(user_id)
+                done: Future = Future()
+                done.set_result(None)
+                return done
+            future = self._provisioning.get(user_id)
+            if future is None:
+                future = self.provision_executor.submit(self._ensure_user_scope, user_id)
+                self._provisioning[user_id] = future
+                future.add_done_callback(
+                    functools.partial(self._provision_finished, user_id)
+                )
+            return future
+
+    def _provision_finished(self, user_id: str, future: Future) -> None:
+        with self._provision_lock:
+            self._provisioning.pop(user_id, None)
+            if not future.cancelled() and future.exception() is None:
+                _remember(
+                    self._provisioned_users, user_id, None, self.settings.user_cache_max_entries
+                )
+            elif not future.cancelled():
+                logger.error(f"Provisioning scope for {user_id} failed: {future.exception()}")
+
+    async def wait_for_scope(self, user_id: str, timeout: Optional[float] = None) -> bool:
+        """Wait up to `timeout` seconds for the user's scope; False if still provisioning"""
+        future = self.provision_user(user_id)
+        if future.done():
+            future.result()
+            return True
+        if timeout is None:
+            timeout = self.settings.provision_wait_seconds
+        # asyncio.wait never cancels what it waits on, so a request that gives up
+        # (or is cancelled) leaves the job other requests share running
+        waiter = asyncio.wrap_future(future)
+        done, _ = await asyncio.wait({waiter}, timeout=timeout)
+        if not done:
+            return False
+        waiter.result()
+        return True
+
     def _create_indexes_for_user(self, user_id: str) -> None:
-        """Create indexes for a user's documents collection"""
+        """Create the INDEX_CATALOG indexes for a user's documents collection.
+
+        Indexes are created deferred and then built together, so the collection is
+        scanned once rather than once per index. Safe to re-run on existing scopes.
+        """
         fqn = self._get_fqn(user_id)
-        indexes = [
-            f"CREATE INDEX IF NOT EXISTS idx_doc_type ON {fqn}(doc_type)",
-            f"CREATE INDEX IF NOT EXISTS idx_status ON {fqn}(status)",
-            f"CREATE INDEX IF NOT EXISTS idx_updated ON {fqn}(updated_at)",
-        ]
-        for idx_query in indexes:
+        for name in RETIRED_INDEXES:
             try:
-                self.cluster.query(idx_query)
+                self._query_rows(f"DROP INDEX IF EXISTS {name} ON {fqn}")
+            except Exception as e:
+                logger.warning(f"Index drop warning: {e}")
+        for name, keys, where in INDEX_CATALOG:
+            where_clause = f" WHERE {where}" if where else ""
+            try:
+                self._query_rows(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {fqn}({keys}){where_clause}"
+                    ' WITH {"defer_build": true}'
+                )
             except Exception as e:
                 logger.warning(f"Index creation warning: {e}")
 
+        deferred = self._query_rows(
+            """
+            SELECT RAW i.name FROM system:indexes i
+            WHERE i.bucket_id = $bucket AND i.scope_id = $scope
+              AND i.keyspace_id = "documents" AND i.state = "deferred"
+            """,
+            {"bucket": self.settings.couchbase_bucket, "scope": self._get_scope_name(user_id)},
+        )
+        if deferred:
+            names = ", ".join(f"`{name}`" for name in deferred)
+            try:
+                self._query_rows(f"BUILD INDEX ON {fqn}({names})")
+            except Exception as e:
+                logger.warning(f"Index build warning: {e}")
+
     def _get_collection(self, user_id: str):
         """Get the documents collection for a user scope"""
         scope_name = f"user_{user_id.replace('@', '_at_').replace('.', '_')}"
@@ -159,16 +696,32 @@ class CouchbaseClient:
         return f"`{self.settings.couchbase_bucket}`.`{scope_name}`.`documents`"
 
     def validate_user(self, user_id: str) -> bool:
-        """Validate user exists in users bucket and ensure their scope exists"""
-        if user_id in self._validated_users:
-            return True
+        """Validate user exists in users bucket and start provisioning their scope.
 
-        user = self._get_user_by_email(user_id)
-        if user:
-            self._validated_users.add(user_id)
-            self._ensure_user_scope(user_id)
-            return True
-        return False
+        Provisioning runs in the background; use `wait_for_scope` before touching
+        the user's collection. Lookups (including misses) are served from
+        `user_cache` until they expire.
+        """
+        if self._get_user_id_from_email(user_id) is None:
+            return False
+        self.provision_user(user_id)
+        return True
+
+    async def validate_user_async(self, user_id: str) -> bool:
+        """`validate_user` for request handlers.
+
+        Memory-cache hits never leave the event loop; a disk-backed cache is read
+        on the DB executor along with any lookup.
+        """
+        if self.user_cache.blocking:
+            valid = await self.run_blocking(self._get_user_id_from_email, user_id) is not None
+        else:
+            valid = self.user_cache.get(user_id)
+            if valid is None:
+                valid = await self.run_blocking(self._lookup_user, user_id)
+        if valid:
+            self.provision_user(user_id)
+        return valid
 
     def is_connected(self) -> bool:
         """Check if connected to Couchbase"""
@@ -186,9 +739,18 @@ class CouchbaseClient:
     ) -> DocResponse:
         """Create a new document"""
         doc_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc)
+        doc = self._new_doc(user_id, request)
 
-        doc = {
+        collection = self._get_collection(user_id)
+        await self.run_blocking(collection.insert, doc_id, doc)
+        self._invalidate_stats(user_id)
+
+        return self._doc_to_response(doc_id, doc)
+
+    def _new_doc(self, user_id: str, request: CreateDocRequest) -> dict:
+        """Build the stored document for a create request"""
+        now = datetime.now(timezone.utc)
+        return {
             "doc_type": request.doc_type.value,
             "user_id": user_id,
             "content": request.content,
@@ -206,69 +768,199 @@ class CouchbaseClient:
             "updated_at": now.isoformat(),
         }
 
+    # --- Bulk ---
+
+    async def bulk_documents(self, user_id: str, request: BulkDocsRequest) -> BulkDocsResponse:
+        """Apply a batch of creates, updates and deletes.
+
+        Creates and hard deletes each go out as one multi-op KV call; updates and
+        soft deletes are sub-document mutations issued concurrently, at most
+        `bulk_concurrency` at a time. Every item gets its own result, so one
+        failure doesn't fail the batch.
+        """
         collection = self._get_collection(user_id)
-        collection.insert(doc_id, doc)
+        results: list[BulkItemResult] = []
+        in_flight = asyncio.Semaphore(self.settings.bulk_concurrency)
+
+        async def creates() -> None:
+            if not request.create:
+                return
+            docs = {str(uuid.uuid4()): self._new_doc(user_id, item) for item in request.create}
+            res = await self.run_blocking(collection.insert_multi, docs)
+            for index, doc_id in enumerate(docs):
+                results.append(_bulk_result(BulkOp.create, index, doc_id, res.exceptions))
+
+        async def update(index: int, item: BulkUpdateItem) -> None:
+            try:
+                async with in_flight:
+                    patched = await self.patch_document(
+                        user_id, item.id, item.changes, cas=item.cas
+                    )
+                error = None if patched else DocumentNotFoundException()
+            except Exception as e:
+                error = e
+            results.append(_bulk_result(BulkOp.update, index, item.id, {item.id: error}))
 
-        return self._doc_to_response(doc_id, doc)
+        async def soft_delete(index: int, item: BulkDeleteItem) -> None:
+            try:
+                async with in_flight:
+                    deleted = await self.delete_document(user_id, item.id, cas=item.cas)
+                error = None if deleted else DocumentNotFoundException()
+            except Exception as e:
+                error = e
+            results.append(_bulk_result(BulkOp.delete, index, item.id, {item.id: error}))
+
+        async def hard_deletes() -> None:
+            items = [(i, item) for i, item in enumerate(request.delete) if item.hard]
+            if not items:
+                return
+            res = await self.run_blocking(collection.remove_multi, [item.id for _, item in items])
+            for index, item in items:
+                results.append(_bulk_result(BulkOp.delete, index, item.id, res.exceptions))
+
+        await asyncio.gather(
+            creates(),
+            hard_deletes(),
+            *(update(i, item) for i, item in enumerate(request.update)),
+            *(soft_delete(i, item) for i, item in enumerate(request.delete) if not item.hard),
+        )
+
+        self._invalidate_stats(user_id)
+        results.sort(key=lambda r: (r.op != BulkOp.create, r.op != BulkOp.update, r.index))
+        failed = sum(not r.success for r in results)
+        return BulkDocsResponse(results=results, succeeded=len(results) - failed, failed=failed)
 
     async def get_document(self, user_id: str, doc_id: str) -> Optional[DocResponse]:
         """Get a single document by ID"""
+        found = await self.get_document_with_cas(user_id, doc_id)
+        return found[0] if found else None
+
+    async def get_document_with_cas(
+        self, user_id: str, doc_id: str
+    ) -> Optional[tuple[DocResponse, int]]:
+        """Get a document and its CAS, for clients that send If-Match on writes"""
         collection = self._get_collection(user_id)
         try:
-            result = collection.get(doc_id)
-            return self._doc_to_response(doc_id, result.content_as[dict])
+            result = await self.run_blocking(collection.get, doc_id)
+            return self._doc_to_response(doc_id, result.content_as[dict]), result.cas
         except DocumentNotFoundException:
             return None
 
+    async def get_documents(self, user_id: str, doc_ids: list[str]) -> BatchGetResponse:
+        """Fetch many documents with one parallel KV multi-get.
+
+        Items come back in request order (duplicates collapsed); IDs with no
+        document are listed in `missing` rather than failing the call.
+        """
+        unique_ids = list(dict.fromkeys(doc_ids))
+        if not unique_ids:
+            return BatchGetResponse(items=[], missing=[])
+
+        collection = self._get_collection(user_id)
+        result = await self.run_blocking(collection.get_multi, unique_ids)
+
+        items = []
+        missing = []
+        for doc_id in unique_ids:
+            error = result.exceptions.get(doc_id)
+            if isinstance(error, DocumentNotFoundException):
+                missing.append(doc_id)
+            elif error is not None:
+                raise error
+            else:
+                items.append(self._doc_to_response(doc_id, result.results[doc_id].content_as[dict]))
+        return BatchGetResponse(items=items, missing=missing)
+
+    async def patch_document(
+        self,
+        user_id: str,
+        doc_id: str,
+        request: UpdateDocRequest,
+        cas: Optional[int] = None,
+    ) -> Optional[DocPatchResponse]:
+        """Write only the provided fields with one sub-document mutation.
+
+        Fields are updated in place, so concurrent PATCHes of different fields no
+        longer overwrite each other. Pass `cas` to make the write conditional on the
+        document being unchanged; a mismatch raises DocumentConflictError.
+        """
+        changes: dict[str, Any] = request.model_dump(mode="json", exclude_none=True)
+        changes["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+        collection = self._get_collection(user_id)
+        specs = [SD.upsert(field, value) for field, value in changes.items()]
+        options = MutateInOptions(cas=cas) if cas else MutateInOptions()
+        try:
+            result = await self.run_blocking(collection.mutate_in, doc_id, specs, options)
+        except DocumentNotFoundException:
+            return None
+        except CasMismatchException as e:
+            raise DocumentConflictError(doc_id) from e
+
+        self._invalidate_stats(user_id)
+        return DocPatchResponse(id=doc_id, cas=result.cas, **changes)
+
     async def update_document(
-        self, user_id: str, doc_id: str, request: UpdateDocRequest
+        self, user_id: str, doc_id: str, request: UpdateDocRequest, cas: Optional[int] = None
     ) -> Optional[DocResponse]:
-        """Update an existing document"""
-        collection = self._get_collection(user_id)
+        """Update an existing document and return it in full"""
+        found = await self.update_document_with_cas(user_id, doc_id, request, cas=cas)
+        return found[0] if found else None
+
+    async def update_document_with_cas(
+        self, user_id: str, doc_id: str, request: UpdateDocRequest, cas: Optional[int] = None
+    ) -> Optional[tuple[DocResponse, int]]:
+        """Update a document and return it with the CAS the write left it at.
+
+        The write is a `patch_document` mutation; the read-back is one lookup_in
+        of the DocResponse fields rather than a full get. Use `patch_document`
+        directly to skip the read.
+        """
+        patched = await self.patch_document(user_id, doc_id, request, cas=cas)
+        if patched is None:
+            return None
 
+        collection = self._get_collection(user_id)
+        specs = [SD.get(field) for field in PROJECTABLE_FIELDS]
         try:
-            result = collection.get(doc_id)
-            doc = result.content_as[dict]
+            result = await self.run_blocking(collection.lookup_in, doc_id, specs)
         except DocumentNotFoundException:
+            # Deleted between the write and the read
             return None
+        read = result.content_as[lambda value: value]
+        doc = {
+            field: read(index)
+            for index, field in enumerate(PROJECTABLE_FIELDS)
+            if result.exists(index)
+        }
+        return self._doc_to_response(doc_id, doc), patched.cas
 
-        # Update fields that are provided
-        if request.content is not None:
-            doc["content"] = request.content
-        if request.title is not None:
-            doc["title"] = request.title
-        if request.tags is not None:
-            doc["tags"] = request.tags
-        if request.priority is not None:
-            doc["priority"] = request.priority.value
-        if request.status is not None:
-            doc["status"] = request.status.value
-        if request.due_date is not None:
-            doc["due_date"] = request.due_date
-        if request.metadata is not None:
-            doc["metadata"] = request.metadata
-
-        doc["updated_at"] = datetime.now(timezone.utc).isoformat()
-
-        collection.replace(doc_id, doc)
-        return self._doc_to_response(doc_id, doc)
+    async def delete_document(
+        self, user_id: str, doc_id: str, hard: bool = False, cas: Optional[int] = None
+    ) -> bool:
+        """Delete a document (soft by default - sets status to archived).
 
-    async def delete_document(self, user_id: str, doc_id: str, hard: bool = False) -> bool:
-        """Delete a document (soft by default - sets status to archived)"""
+        Both paths are a single KV operation; `cas` makes them conditional.
+        """
         collection = self._get_collection(user_id)
 
         try:
             if hard:
-                collection.remove(doc_id)
+                options = RemoveOptions(cas=cas) if cas else RemoveOptions()
+                await self.run_blocking(collection.remove, doc_id, options)
             else:
-                result = collection.get(doc_id)
-                doc = result.content_as[dict]
-                doc["status"] = Status.archived.value
-                doc["updated_at"] = datetime.now(timezone.utc).isoformat()
-                collection.replace(doc_id, doc)
+                specs = [
+                    SD.upsert("status", Status.archived.value),
+                    SD.upsert("updated_at", datetime.now(timezone.utc).isoformat()),
+                ]
+                options = MutateInOptions(cas=cas) if cas else MutateInOptions()
+                await self.run_blocking(collection.mutate_in, doc_id, specs, options)
+            self._invalidate_stats(user_id)
             return True
         except DocumentNotFoundException:
             return False
+        except CasMismatchException as e:
+            raise DocumentConflictError(doc_id) from e
 
     # --- Query Methods ---
 
@@ -283,103 +975,174 @@ class CouchbaseClient:
         limit: int = 50,
         offset: int = 0,
         sort: str = "updated_at:desc",
-    ) -> DocsListResponse:
-        """List documents with filters"""
+        cursor: Optional[str] = None,
+        include_total: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> Union[DocsListResponse, PartialDocsListResponse]:
+        """List documents with filters.
+
+        Pages by keyset on (sort field, doc id): pass the previous page's
+        `next_cursor` as `cursor` to continue. `offset` is still honoured when no
+        cursor is given. The COUNT(*) query only runs when `include_total` is set.
+        `fields` selects only those fields (plus id) in the query and the response.
+        Raises ValueError for an unknown sort or field, or a malformed cursor.
+        """
         fqn = self._get_fqn(user_id)
+        sort_field, descending = _parse_sort(sort)
+        fields = _parse_fields(fields)
+        sort_expr = SORT_FIELDS[sort_field]
 
-        # Build WHERE clause
-        conditions = []
-        params: dict[str, Any] = {}
-
-        if doc_type:
-            conditions.append("d.doc_type = $doc_type")
-            params["doc_type"] = doc_type.value
+        conditions, params = _list_filters(doc_type, status, priority, tags, project, sort_expr)
 
-        if status:
-            conditions.append("d.status = $status")
-            params["status"] = status.value
+        # Count query sees the filters only, not the page position
+        count_query = f"SELECT COUNT(*) as total FROM {fqn} d WHERE {' AND '.join(conditions)}"
+        count_params = dict(params)
 
-        if priority:
-            conditions.append("d.priority = $priority")
-            params["priority"] = priority.value
+        if cursor:
+            _add_keyset(conditions, params, cursor, sort)
+            offset = 0
 
-        if tags:
-            # All tags must be present
-            for i, tag in enumerate(tags):
-                conditions.append(f"${f'tag{i}'} IN d.tags")
-                params[f"tag{i}"] = tag
+        where_clause = " AND ".join(conditions)
+        direction = "DESC" if descending else "ASC"
 
-        if project:
-            conditions.append("d.source.project = $project")
-            params["project"] = project
+        # Data query; one extra row tells us whether another page exists
+        query = f"""
+            SELECT {_projection(fields)}, {sort_expr} AS _sort_key
+            FROM {fqn} d
+            WHERE {where_clause}
+            ORDER BY {sort_expr} {direction}, META(d).id {direction}
+            LIMIT $limit OFFSET $offset
+        """
+        params["limit"] = limit + 1
+        params["offset"] = offset
 
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        if include_total:
+            # Count and page are independent round-trips, so run them concurrently
+            count_rows, rows = await asyncio.gather(
+                self._query(count_query, count_params),
+                self._query(query, params),
+            )
+            total = count_rows[0]["total"]
+        else:
+            rows = await self._query(query, params)
+            total = None
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(sort, rows[-1]["_sort_key"], rows[-1]["id"])
+
+        return self._rows_to_page(
+            rows, fields, total=total, limit=limit, offset=offset, next_cursor=next_cursor
+        )
 
-        # Parse sort
-        sort_field, sort_dir = sort.split(":")
-        sort_clause = f"d.{sort_field} {'DESC' if sort_dir == 'desc' else 'ASC'}"
+    async def stream_documents(
+        self,
+        user_id: str,
+        doc_type: Optional[DocType] = None,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        tags: Optional[list[str]] = None,
+        project: Optional[str] = None,
+        sort: str = "updated_at:desc",
+        cursor: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+    ) -> AsyncIterator[list[Union[DocResponse, PartialDocResponse]]]:
+        """Every document matching the list_documents filters, in batches as they arrive.
+
+        Same filters, order, `cursor` and `fields` as list_documents, without a page
+        limit. The order is the idx_list_* index order, so rows stream without a sort.
+        Raises ValueError (unknown sort or field, malformed cursor) or the query
+        error before returning; after that, batches are fetched as they are consumed.
+        """
+        fqn = self._get_fqn(user_id)
+        sort_field, descending = _parse_sort(sort)
+        fields = _parse_fields(fields)
+        sort_expr = SORT_FIELDS[sort_field]
 
-        # Count query
-        count_query = f"SELECT COUNT(*) as total FROM {fqn} d WHERE {where_clause}"
-        count_result = self.cluster.query(count_query, QueryOptions(named_parameters=params))
-        total = list(count_result)[0]["total"]
+        conditions, params = _list_filters(doc_type, status, priority, tags, project, sort_expr)
+        if cursor:
+            _add_keyset(conditions, params, cursor, sort)
+        direction = "DESC" if descending else "ASC"
 
-        # Data query
         query = f"""
-            SELECT META(d).id, d.*
+            SELECT {_projection(fields)}
             FROM {fqn} d
-            WHERE {where_clause}
-            ORDER BY {sort_clause}
-            LIMIT $limit OFFSET $offset
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {sort_expr} {direction}, META(d).id {direction}
         """
-        params["limit"] = limit
-        params["offset"] = offset
+        return await self._stream_documents(query, params, fields)
 
-        result = self.cluster.query(query, QueryOptions(named_parameters=params))
-        items = [self._doc_to_response(row["id"], row) for row in result]
+    async def export_documents(
+        self, user_id: str, fields: Optional[list[str]] = None
+    ) -> AsyncIterator[list[Union[DocResponse, PartialDocResponse]]]:
+        """Every document in the user's scope, archived included, in no particular order.
 
-        return DocsListResponse(items=items, total=total, limit=limit, offset=offset)
+        A plain scan of idx_list_created_desc: without ORDER BY the first rows are
+        returned as soon as the scan reaches them, however large the scope is.
+        """
+        fields = _parse_fields(fields)
+        query = f"""
+            SELECT {_projection(fields)}
+            FROM {self._get_fqn(user_id)} d
+            WHERE d.created_at IS NOT MISSING
+        """
+        return await self._stream_documents(query, {}, fields)
+
+    async def _stream_documents(
+        self, query: str, params: dict[str, Any], fields: Optional[tuple[str, ...]]
+    ) -> AsyncIterator[list[Union[DocResponse, PartialDocResponse]]]:
+        """Start a streamed query and decode each batch of rows as it is consumed"""
+        batches = await self._stream_query(query, params)
+
+        async def documents() -> AsyncIterator[list[Union[DocResponse, PartialDocResponse]]]:
+            async for rows in batches:
+                yield self._decode_rows(rows, fields)
+
+        return documents()
 
     async def get_next_actions(
-        self, user_id: str, limit: int = 10
-    ) -> DocsListResponse:
+        self, user_id: str, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> Union[DocsListResponse, PartialDocsListResponse]:
         """Get priority queue - high priority first, then by due date"""
         fqn = self._get_fqn(user_id)
+        fields = _parse_fields(fields)
 
+        # Keys in idx_next_actions_order's order; the IS NOT MISSING on its leading
+        # key is what makes the partial index eligible
+        rank = (
+            'CASE d.priority WHEN "high" THEN 1 WHEN "medium" THEN 2 WHEN "low" THEN 3 ELSE 4 END'
+        )
         query = f"""
-            SELECT META(d).id, d.*
+            SELECT {_projection(fields)}
             FROM {fqn} d
             WHERE d.doc_type IN ["idea", "task"]
               AND d.status IN ["inbox", "todo"]
-            ORDER BY
-              CASE d.priority
-                WHEN "high" THEN 1
-                WHEN "medium" THEN 2
-                WHEN "low" THEN 3
-                ELSE 4
-              END,
-              d.due_date NULLS LAST,
-              d.updated_at DESC
+              AND {rank} IS NOT MISSING
+            ORDER BY {rank}, IFMISSINGORNULL(d.due_date, "~"), d.updated_at DESC
             LIMIT $limit
         """
 
-        result = self.cluster.query(query, QueryOptions(named_parameters={"limit": limit}))
-        items = [self._doc_to_response(row["id"], row) for row in result]
+        rows = await self._query(query, {"limit": limit})
+        return self._rows_to_page(rows, fields, total=len(rows), limit=limit, offset=0)
 
-        return DocsListResponse(items=items, total=len(items), limit=limit, offset=0)
-
-    async def get_inbox(self, user_id: str, limit: int = 50) -> DocsListResponse:
+    async def get_inbox(
+        self, user_id: str, limit: int = 50, fields: Optional[list[str]] = None
+    ) -> Union[DocsListResponse, PartialDocsListResponse]:
         """Get inbox items"""
-        return await self.list_documents(user_id, status=Status.inbox, limit=limit)
+        return await self.list_documents(
+            user_id, status=Status.inbox, limit=limit, fields=fields
+        )
 
     async def get_due_soon(
-        self, user_id: str, days: int = 7, limit: int = 20
-    ) -> DocsListResponse:
+        self, user_id: str, days: int = 7, limit: int = 20, fields: Optional[list[str]] = None
+    ) -> Union[DocsListResponse, PartialDocsListResponse]:
         """Get tasks with approaching due dates"""
         fqn = self._get_fqn(user_id)
+        fields = _parse_fields(fields)
 
         query = f"""
-            SELECT META(d).id, d.*
+            SELECT {_projection(fields)}
             FROM {fqn} d
             WHERE d.doc_type = "task"
               AND d.status NOT IN ["done", "archived"]
@@ -389,27 +1152,131 @@ class CouchbaseClient:
             LIMIT $limit
         """
 
-        result = self.cluster.query(
-            query, QueryOptions(named_parameters={"days": days, "limit": limit})
-        )
-        items = [self._doc_to_response(row["id"], row) for row in result]
-
-        return DocsListResponse(items=items, total=len(items), limit=limit, offset=0)
+        rows = await self._query(query, {"days": days, "limit": limit})
+        return self._rows_to_page(rows, fields, total=len(rows), limit=limit, offset=0)
 
     async def get_project_docs(
-        self, user_id: str, project_name: str, limit: int = 50
-    ) -> DocsListResponse:
+        self,
+        user_id: str,
+        project_name: str,
+        limit: int = 50,
+        fields: Optional[list[str]] = None,
+    ) -> Union[DocsListResponse, PartialDocsListResponse]:
         """Get all docs for a project"""
-        return await self.list_documents(user_id, project=project_name, limit=limit)
+        return await self.list_documents(
+            user_id, project=project_name, limit=limit, fields=fields
+        )
 
     async def get_project_recent(
-        self, user_id: str, project_name: str, limit: int = 10
-    ) -> DocsListResponse:
+        self,
+        user_id: str,
+        project_name: str,
+        limit: int = 10,
+        fields: Optional[list[str]] = None,
+    ) -> Union[DocsListResponse, PartialDocsListResponse]:
         """Get recent activity for a project"""
         return await self.list_documents(
-            user_id, project=project_name, limit=limit, sort="updated_at:desc"
+            user_id, project=project_name, limit=limit, sort="updated_at:desc", fields=fields
         )
 
+    # --- Graph ---
+
+    async def get_graph(
+        self,
+        user_id: str,
+        root_id: str,
+        depth: int = 2,
+        edge_types: Optional[list[EdgeType]] = None,
+        max_nodes: int = 500,
+    ) -> Optional[GraphResponse]:
+        """Walk the document graph breadth-first from `root_id`.
+
+        Each level costs at most one KV multi-get (forward edges: parent, project,
+        links) and one N1QL query (reverse edges: children, project items), run
+        concurrently. Visited documents are never fetched twice, so cycles end the
+        walk; the edge closing a cycle is still returned. Returns None if the root
+        doesn't exist.
+        """
+        root = await self.get_document(user_id, root_id)
+        if root is None:
+            return None
+
+        edge_types = edge_types or [EdgeType.children, EdgeType.project_items, EdgeType.links]
+        forward = [e for e in edge_types if e in FORWARD_EDGES or e == EdgeType.links]
+        reverse = [e for e in edge_types if e in REVERSE_EDGES]
+
+        nodes: dict[str, DocResponse] = {root.id: root}
+        edges: set[tuple[str, str, EdgeType]] = set()
+        missing: set[str] = set()
+        frontier = [root]
+        truncated = False
+
+        for _ in range(depth):
+            if not frontier:
+                break
+
+            # Forward edges come straight off the frontier documents
+            wanted: list[str] = []
+            for doc in frontier:
+                for edge_type in forward:
+                    for target in _forward_targets(doc, edge_type):
+                        edges.add((doc.id, target, edge_type))
+                        if target not in nodes and target not in missing:
+                            wanted.append(target)
+
+            fetched, reverse_rows = await asyncio.gather(
+                self.get_documents(user_id, wanted),
+                self._query_reverse_edges(user_id, [d.id for d in frontier], reverse, max_nodes),
+            )
+            missing.update(fetched.missing)
+
+            discovered = fetched.items
+            for row in reverse_rows:
+                for edge_type in reverse:
+                    source = row.get(REVERSE_EDGES[edge_type])
+                    if source in nodes:
+                        edges.add((source, row["id"], edge_type))
+                if row["id"] not in nodes:
+                    discovered.append(self._doc_to_response(row["id"], row))
+
+            frontier = []
+            for doc in discovered:
+                if doc.id in nodes:
+                    continue
+                if len(nodes) >= max_nodes:
+                    truncated = True
+                    break
+                nodes[doc.id] = doc
+                frontier.append(doc)
+
+        return GraphResponse(
+            root_id=root_id,
+            nodes=list(nodes.values()),
+            edges=[
+                GraphEdge(source=src, target=dst, type=edge_type)
+                for src, dst, edge_type in sorted(edges)
+                if src in nodes and dst in nodes
+            ],
+            missing=sorted(missing),
+            truncated=truncated,
+        )
+
+    async def _query_reverse_edges(
+        self, user_id: str, ids: list[str], edge_types: list[EdgeType], limit: int
+    ) -> list[dict]:
+        """Documents whose parent_id/project_id points at any of `ids` (one query)"""
+        if not ids or not edge_types:
+            return []
+        fqn = self._get_fqn(user_id)
+        conditions = " OR ".join(f"d.{REVERSE_EDGES[e]} IN $ids" for e in edge_types)
+        query = f"""
+            SELECT META(d).id, d.*
+            FROM {fqn} d
+            WHERE {conditions}
+            LIMIT $limit
+        """
+        return await self._query(query, {"ids": ids, "limit": limit})
+
     # --- Tags ---
 
     async def get_tags(self, user_id: str) -> list[dict]:
@@ -420,56 +1287,69 @@ class CouchbaseClient:
             SELECT t AS tag, COUNT(*) AS count
             FROM {fqn} d
             UNNEST d.tags t
-            WHERE d.status NOT IN ["archived"]
+            WHERE t IS NOT NULL
+              AND d.status NOT IN ["archived"]
             GROUP BY t
             ORDER BY count DESC
         """
 
-        result = self.cluster.query(query)
-        return [{"tag": row["tag"], "count": row["count"]} for row in result]
+        rows = await self._query(query)
+        return [{"tag": row["tag"], "count": row["count"]} for row in rows]
 
     # --- Stats ---
 
     async def get_stats(self, user_id: str) -> dict:
-        """Get statistics"""
+        """Get statistics, served from a per-user snapshot while it is fresh"""
+        cached = self._stats_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < self.settings.stats_cache_ttl_seconds:
+            self._stats_cache.move_to_end(user_id)
+            return cached[1]
+
+        # A write landing while the query runs bumps the generation; don't cache stale counts
+        generation = self._stats_generation_of(user_id)
         fqn = self._get_fqn(user_id)
 
-        # Total count
-        total_query = f"SELECT COUNT(*) as total FROM {fqn}"
-        total = list(self.cluster.query(total_query))[0]["total"]
-
-        # By doc_type
-        type_query = f"""
-            SELECT d.doc_type, COUNT(*) as count
-            FROM {fqn} d
-            GROUP BY d.doc_type
-        """
-        by_type = {row["doc_type"]: row["count"] for row in self.cluster.query(type_query)}
-
-        # By status
-        status_query = f"""
-            SELECT d.status, COUNT(*) as count
-            FROM {fqn} d
-            GROUP BY d.status
-        """
-        by_status = {row["status"]: row["count"] for row in self.cluster.query(status_query)}
-
-        # By priority
-        priority_query = f"""
-            SELECT d.priority, COUNT(*) as count
-            FROM {fqn} d
-            WHERE d.priority IS NOT NULL
-            GROUP BY d.priority
-        """
-        by_priority = {row["priority"]: row["count"] for row in self.cluster.query(priority_query)}
-
-        # Recent activity (last 24h)
-        recent_query = f"""
-            SELECT COUNT(*) as count
+        # One grouped pass yields every facet; rows are bounded by the enum cardinalities
+        query = f"""
+            SELECT d.doc_type, d.status, d.priority,
+                   COUNT(*) AS count,
+                   SUM(CASE WHEN d.updated_at >= DATE_ADD_STR(NOW_STR(), -1, "day")
+                       THEN 1 ELSE 0 END) AS recent
             FROM {fqn} d
-            WHERE d.updated_at >= DATE_ADD_STR(NOW_STR(), -1, "day")
+            WHERE d.doc_type IS NOT MISSING
+            GROUP BY d.doc_type, d.status, d.priority
         """
-        recent = list(self.cluster.query(recent_query))[0]["count"]
+        stats = self._fold_stats(await self._query(query))
+
+        if self._stats_generation_of(user_id) == generation:
+            _remember(
+                self._stats_cache,
+                user_id,
+                (time.monotonic(), stats),
+                self.settings.user_cache_max_entries,
+            )
+        return stats
+
+    @staticmethod
+    def _fold_stats(rows: list[dict]) -> dict:
+        """Fold (doc_type, status, priority) group counts into the stats facets"""
+        by_type: dict[str, int] = {}
+        by_status: dict[str, int] = {}
+        by_priority: dict[str, int] = {}
+        total = 0
+        recent = 0
+
+        for row in rows:
+            count = row["count"]
+            total += count
+            recent += row.get("recent") or 0
+            for facet, key in (
+                (by_type, row.get("doc_type")),
+                (by_status, row.get("status")),
+                (by_priority, row.get("priority")),
+            ):
+                if key is not None:
+                    facet[key] = facet.get(key, 0) + count
 
         return {
             "total_docs": total,
@@ -479,6 +1359,21 @@ class CouchbaseClient:
             "recent_activity": recent,
         }
 
+    def _invalidate_stats(self, user_id: str) -> None:
+        """Drop the user's stats snapshot after a write"""
+        self._stats_cache.pop(user_id, None)
+        self._stats_writes += 1
+        evicted = _remember(
+            self._stats_generation,
+            user_id,
+            self._stats_writes,
+            self.settings.user_cache_max_entries,
+        )
+        self._stats_generation_floor = max([self._stats_generation_floor, *evicted])
+
+    def _stats_generation_of(self, user_id: str) -> int:
+        return self._stats_generation.get(user_id, self._stats_generation_floor)
+
     # --- Context ---
 
     async def get_latest_context(
@@ -487,7 +1382,8 @@ class CouchbaseClient:
         """Get most recent context snapshot"""
         fqn = self._get_fqn(user_id)
 
-        conditions = ['d.doc_type = "context"']
+        # created_at predicate makes idx_context eligible when no project is given
+        conditions = ['d.doc_type = "context"', "d.created_at IS NOT MISSING"]
         params: dict[str, Any] = {"limit": 1}
 
         if project:
@@ -504,7 +1400,7 @@ class CouchbaseClient:
             LIMIT $limit
         """
 
-        result = list(self.cluster.query(query, QueryOptions(named_parameters=params)))
+        result = await self._query(query, params)
         if result:
             return self._doc_to_response(result[0]["id"], result[0])
         return None
@@ -544,33 +1440,77 @@ class CouchbaseClient:
         }
 
         collection = self._get_collection(user_id)
-        collection.insert(doc_id, doc)
+        await self.run_blocking(collection.insert, doc_id, doc)
+        self._invalidate_stats(user_id)
 
         return self._doc_to_response(doc_id, doc)
 
     # --- Helpers ---
 
     def _doc_to_response(self, doc_id: str, doc: dict) -> DocResponse:
-        """Convert a raw document to DocResponse"""
-        return DocResponse(
-            id=doc_id,
-            doc_type=DocType(doc["doc_type"]),
-            user_id=doc["user_id"],
-            content=doc["content"],
-            title=doc.get("title"),
-            tags=doc.get("tags", []),
-            priority=Priority(doc["priority"]) if doc.get("priority") else None,
-            status=Status(doc["status"]),
-            due_date=doc.get("due_date"),
-            project_id=doc.get("project_id"),
-            parent_id=doc.get("parent_id"),
-            linked_ids=doc.get("linked_ids", []),
-            source=SourceInfo(**doc["source"]) if doc.get("source") else None,
-            metadata=doc.get("metadata", {}),
-            created_at=datetime.fromisoformat(doc["created_at"]),
-            updated_at=datetime.fromisoformat(doc["updated_at"]),
+        """Convert a stored document to DocResponse.
+
+        Stored documents were validated on the way in, so this is the trusted
+        path: enums come from lookup tables and the model is built without
+        re-validation. An unknown enum value still raises (KeyError).
+        """
+        source = doc.get("source")
+        priority = doc.get("priority")
+        return _construct(
+            DocResponse,
+            {
+                "id": doc_id,
+                "doc_type": _DOC_TYPES[doc["doc_type"]],
+                "user_id": doc["user_id"],
+                "content": doc["content"],
+                "title": doc.get("title"),
+                "tags": doc.get("tags", []),
+                "priority": _PRIORITIES[priority] if priority else None,
+                "status": _STATUSES[doc["status"]],
+                "due_date": doc.get("due_date"),
+                "project_id": doc.get("project_id"),
+                "parent_id": doc.get("parent_id"),
+                "linked_ids": doc.get("linked_ids", []),
+                "source": _source_info(source) if source else None,
+                "metadata": doc.get("metadata", {}),
+                "created_at": datetime.fromisoformat(doc["created_at"]),
+                "updated_at": datetime.fromisoformat(doc["updated_at"]),
+            },
+            _DOC_RESPONSE_FIELDS,
         )
 
+    def _doc_to_partial(
+        self, doc_id: str, doc: dict, fields: tuple[str, ...]
+    ) -> PartialDocResponse:
+        """Convert a projected row to PartialDocResponse (trusted, like _doc_to_response)"""
+        values = dict.fromkeys(PartialDocResponse.model_fields)
+        values["id"] = doc_id
+        for field in fields:
+            value = doc.get(field)
+            if value is None:
+                default = _FIELD_DEFAULTS.get(field)
+                value = default() if default else None
+            elif field in _FIELD_DECODERS:
+                value = _FIELD_DECODERS[field](value) if value else None
+            values[field] = value
+        return _construct(PartialDocResponse, values, frozenset(("id", *fields)))
+
+    def _rows_to_page(
+        self, rows: list[dict], fields: Optional[tuple[str, ...]], **page: Any
+    ) -> Union[DocsListResponse, PartialDocsListResponse]:
+        """Wrap query rows as a list response, whole or projected to `fields`"""
+        if fields is None:
+            return DocsListResponse(items=self._decode_rows(rows, fields), **page)
+        return PartialDocsListResponse(items=self._decode_rows(rows, fields), **page)
+
+    def _decode_rows(
+        self, rows: list[dict], fields: Optional[tuple[str, ...]]
+    ) -> list[Union[DocResponse, PartialDocResponse]]:
+        """Convert query rows to response models, whole or projected to `fields`"""
+        if fields is None:
+            return [self._doc_to_response(row["id"], row) for row in rows]
+        return [self._doc_to_partial(row["id"], row, fields) for row in rows]
+
 
 # Global client instance
 db = CouchbaseClient()
@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_serializer, model_validator
 
 
 class DocType(str, Enum):
@@ -37,6 +37,20 @@ class CaptureMode(str, Enum):
     batch = "batch"
 
 
+class EdgeType(str, Enum):
+    parent = "parent"  # parent_id
+    children = "children"  # docs whose parent_id is this doc
+    project = "project"  # project_id
+    project_items = "project_items"  # docs whose project_id is this doc
+    links = "links"  # linked_ids
+
+
+class BulkOp(str, Enum):
+    create = "create"
+    update = "update"
+    delete = "delete"
+
+
 class SourceInfo(BaseModel):
     """Source metadata for document"""
 
@@ -81,6 +95,43 @@ class UpdateDocRequest(BaseModel):
     metadata: Optional[dict] = None
 
 
+class BulkUpdateItem(BaseModel):
+    """One update in a bulk request"""
+
+    id: str
+    changes: UpdateDocRequest
+    cas: Optional[int] = Field(None, description="Only apply if the document is unchanged")
+
+
+class BulkDeleteItem(BaseModel):
+    """One delete in a bulk request"""
+
+    id: str
+    hard: bool = False
+    cas: Optional[int] = Field(None, description="Soft deletes only: apply if unchanged")
+
+    @model_validator(mode="after")
+    def _cas_needs_soft_delete(self) -> "BulkDeleteItem":
+        # Hard deletes go through remove_multi, which can't check a CAS
+        if self.hard and self.cas is not None:
+            raise ValueError("cas is only supported for soft deletes")
+        return self
+
+
+class BulkDocsRequest(BaseModel):
+    """Batch of creates, updates and deletes (e.g. a capture session flush)"""
+
+    create: list[CreateDocRequest] = Field(default_factory=list, max_length=500)
+    update: list[BulkUpdateItem] = Field(default_factory=list, max_length=500)
+    delete: list[BulkDeleteItem] = Field(default_factory=list, max_length=500)
+
+
+class BatchGetRequest(BaseModel):
+    """Fetch documents by ID (e.g. to resolve linked_ids)"""
+
+    ids: list[str] = Field(..., min_length=1, max_length=500)
+
+
 class SaveContextRequest(BaseModel):
     """Save a context snapshot"""
 
@@ -116,13 +167,109 @@ class DocResponse(BaseModel):
     updated_at: datetime
 
 
+class DocPatchResponse(BaseModel):
+    """Fields written by a PATCH (returned with `Prefer: return=minimal`)"""
+
+    id: str
+    cas: int
+    content: Optional[str] = None
+    title: Optional[str] = None
+    tags: Optional[list[str]] = None
+    priority: Optional[Priority] = None
+    status: Optional[Status] = None
+    due_date: Optional[str] = None
+    metadata: Optional[dict] = None
+    updated_at: datetime
+
+
 class DocsListResponse(BaseModel):
     """List of documents response"""
 
     items: list[DocResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Only set when include_total is requested")
     limit: int
     offset: int
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor for the next page")
+
+
+class PartialDocResponse(BaseModel):
+    """Document restricted to the fields a list request asked for (`fields=`)"""
+
+    id: str
+    doc_type: Optional[DocType] = None
+    user_id: Optional[str] = None
+    content: Optional[str] = None
+    title: Optional[str] = None
+    tags: Optional[list[str]] = None
+    priority: Optional[Priority] = None
+    status: Optional[Status] = None
+    due_date: Optional[str] = None
+    project_id: Optional[str] = None
+    parent_id: Optional[str] = None
+    linked_ids: Optional[list[str]] = None
+    source: Optional[SourceInfo] = None
+    metadata: Optional[dict] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @model_serializer(mode="wrap")
+    def _requested_only(self, handler):
+        # Requested fields are kept even when null; the rest were never fetched
+        data = handler(self)
+        return {key: value for key, value in data.items() if key in self.model_fields_set}
+
+
+class PartialDocsListResponse(BaseModel):
+    """List of documents restricted to the requested fields"""
+
+    items: list[PartialDocResponse]
+    total: Optional[int] = Field(None, description="Only set when include_total is requested")
+    limit: int
+    offset: int
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor for the next page")
+
+
+class BatchGetResponse(BaseModel):
+    """Documents found by a batch get"""
+
+    items: list[DocResponse]
+    missing: list[str] = Field(description="Requested IDs with no document")
+
+
+class BulkItemResult(BaseModel):
+    """Outcome of one item in a bulk request"""
+
+    op: BulkOp
+    index: int = Field(description="Position of the item in its request list")
+    id: str
+    success: bool
+    error: Optional[str] = None
+
+
+class BulkDocsResponse(BaseModel):
+    """Per-item results of a bulk request"""
+
+    results: list[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
+class GraphEdge(BaseModel):
+    """Directed edge from an expanded document to one it reached"""
+
+    source: str
+    target: str
+    type: EdgeType
+
+
+class GraphResponse(BaseModel):
+    """Subgraph reachable from a root document"""
+
+    root_id: str
+    nodes: list[DocResponse]
+    edges: list[GraphEdge]
+    missing: list[str] = Field(description="Referenced IDs with no document")
+    truncated: bool = Field(description="max_nodes was reached before depth")
 
 
 class TagInfo(BaseModel):
@@ -161,6 +308,17 @@ class ContextResponse(BaseModel):
     created_at: datetime
 
 
+class UserCacheStats(BaseModel):
+    """User validation cache counters (per worker process)"""
+
+    backend: str
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_entries: int
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
 
@@ -168,3 +326,4 @@ class HealthResponse(BaseModel):
     couchbase_connected: bool
     bucket: str
     user_scope: str
+    user_cache: Optional[UserCacheStats] = None
@@ -0,0 +1,59 @@
+"""Pre-provision user scopes, collections and indexes.
+
+Idempotent: existing scopes are left alone and catalog indexes are created with
+IF NOT EXISTS, so this is safe to re-run after deploys that add to INDEX_CATALOG.
+
+Usage:
+    uv run python -m cos.provision                 # every user in the users bucket
+    uv run python -m cos.provision alice@example.com bob@example.com
+"""
+
+import argparse
+import logging
+import sys
+from typing import Optional
+
+from .db import CouchbaseClient
+
+logger = logging.getLogger(__name__)
+
+
+def list_user_emails(client: CouchbaseClient) -> list[str]:
+    """All user emails known to the users bucket"""
+    query = """
+        SELECT RAW u.email
+        FROM `users`._default._default u
+        WHERE u.type = "user" AND u.email IS NOT MISSING
+    """
+    return client._query_rows(query)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-provision Chief of Staff user scopes")
+    parser.add_argument("emails", nargs="*", help="Users to provision (default: all users)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    client = CouchbaseClient()
+    client.connect()
+    failures = 0
+    try:
+        emails = args.emails or list_user_emails(client)
+        for email in emails:
+            if not client._get_user_by_email(email):
+                logger.error(f"{email}: not found in users bucket")
+                failures += 1
+                continue
+            try:
+                client._ensure_user_scope(email, ensure_indexes=True)
+                logger.info(f"{email}: ready ({client._get_scope_name(email)})")
+            except Exception as e:
+                logger.error(f"{email}: provisioning failed: {e}")
+                failures += 1
+    finally:
+        client.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
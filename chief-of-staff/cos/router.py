@@ -1,29 +1,53 @@
 """FastAPI router for Chief of Staff API"""
 
-from typing import Annotated, Optional
+from collections.abc import AsyncIterator
+from typing import Annotated, Optional, Union
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from .db import CouchbaseClient, get_db
+from .db import CouchbaseClient, DocumentConflictError, get_db
 from .models import (
+    BatchGetRequest,
+    BatchGetResponse,
+    BulkDocsRequest,
+    BulkDocsResponse,
     ContextResponse,
     CreateDocRequest,
     DocResponse,
     DocsListResponse,
     DocType,
+    EdgeType,
+    GraphResponse,
     HealthResponse,
+    PartialDocResponse,
+    PartialDocsListResponse,
     Priority,
     SaveContextRequest,
     StatsResponse,
     Status,
     TagsResponse,
     UpdateDocRequest,
+    UserCacheStats,
 )
 
 router = APIRouter(prefix="/api/cos", tags=["chief-of-staff"])
 
+# `fields=title,status` (or repeated) on list endpoints: fetch and return only those, plus id
+FieldsQuery = Annotated[
+    Optional[list[str]],
+    Query(description="Only return these document fields (comma-separated or repeated)"),
+]
 
-def get_user_id(
+# List endpoint pages: full documents, or only the `fields=` asked for
+DocsPage = Union[DocsListResponse, PartialDocsListResponse]
+
+# Streamed listings: one JSON document per line, written as the query returns rows
+NDJSON = "application/x-ndjson"
+NDJSON_RESPONSE = {200: {"content": {NDJSON: {}}}}
+
+
+async def get_user_id(
     x_user_id: Annotated[Optional[str], Header()] = None,
     db: CouchbaseClient = Depends(get_db),
 ) -> str:
@@ -33,13 +57,21 @@ def get_user_id(
     # Use header or default
     user_id = x_user_id or get_settings().default_user
 
-    # Validate user exists and ensure their scope is provisioned
-    if not db.validate_user(user_id):
+    # Validate user exists; this also starts provisioning their scope if needed
+    if not await db.validate_user_async(user_id):
         raise HTTPException(
             status_code=401,
             detail=f"User '{user_id}' not found in users database"
         )
 
+    # First request for a new user: wait briefly on the shared provisioning job
+    if not await db.wait_for_scope(user_id):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Provisioning storage for user '{user_id}', retry shortly",
+            headers={"Retry-After": "2"},
+        )
+
     return user_id
 
 
@@ -52,12 +84,18 @@ async def health_check(
     user_id: Annotated[str, Depends(get_user_id)],
 ) -> HealthResponse:
     """CoS-specific health check"""
-    connected = db.is_connected()
+    connected = await db.run_blocking(db.is_connected)
+    cache_stats = (
+        await db.run_blocking(db.user_cache.stats)
+        if db.user_cache.blocking
+        else db.user_cache.stats()
+    )
     return HealthResponse(
         status="healthy" if connected else "unhealthy",
         couchbase_connected=connected,
         bucket=db.settings.couchbase_bucket,
         user_scope=f"user_{user_id}",
+        user_cache=UserCacheStats(**cache_stats),
     )
 
 
@@ -74,7 +112,27 @@ async def create_document(
     return await db.create_document(user_id, request)
 
 
-@router.get("/docs", response_model=DocsListResponse)
+@router.post("/docs/bulk", response_model=BulkDocsResponse)
+async def bulk_documents(
+    request: BulkDocsRequest,
+    db: Annotated[CouchbaseClient, Depends(get_db)],
+    user_id: Annotated[str, Depends(get_user_id)],
+) -> BulkDocsResponse:
+    """Create, update and delete many documents in one call; failures are per item"""
+    return await db.bulk_documents(user_id, request)
+
+
+@router.post("/docs/batch-get", response_model=BatchGetResponse)
+async def batch_get_documents(
+    request: BatchGetRequest,
+    db: Annotated[CouchbaseClient, Depends(get_db)],
+    user_id: Annotated[str, Depends(get_user_id)],
+) -> BatchGetResponse:
+    """Get many documents by ID in one call; unknown IDs are reported in `missing`"""
+    return await db.get_documents(user_id, request.ids)
+
+
+@router.get("/docs", response_model=DocsPage, responses=NDJSON_RESPONSE)
 async def list_documents(
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
@@ -86,76 +144,170 @@ async def list_documents(
     limit: Annotated[int, Query(ge=1, le=200)] = 50,
     offset: Annotated[int, Query(ge=0)] = 0,
     sort: Annotated[str, Query()] = "updated_at:desc",
-) -> DocsListResponse:
-    """List documents with filters"""
-    return await db.list_documents(
-        user_id,
-        doc_type=doc_type,
-        status=status,
-        priority=priority,
-        tags=tags,
-        project=project,
-        limit=limit,
-        offset=offset,
-        sort=sort,
-    )
+    cursor: Annotated[Optional[str], Query()] = None,
+    include_total: Annotated[bool, Query()] = False,
+    fields: FieldsQuery = None,
+    accept: Annotated[Optional[str], Header()] = None,
+):
+    """List documents with filters; page with `cursor` from the previous `next_cursor`.
+
+    With `Accept: application/x-ndjson` every matching document is streamed instead,
+    one per line, starting after `cursor` if given (`limit`, `offset` and
+    `include_total` don't apply).
+    """
+    if accept and NDJSON in accept:
+        try:
+            batches = await db.stream_documents(
+                user_id,
+                doc_type=doc_type,
+                status=status,
+                priority=priority,
+                tags=tags,
+                project=project,
+                sort=sort,
+                cursor=cursor,
+                fields=_split_fields(fields),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        return StreamingResponse(_ndjson(batches), media_type=NDJSON)
+
+    try:
+        page = await db.list_documents(
+            user_id,
+            doc_type=doc_type,
+            status=status,
+            priority=priority,
+            tags=tags,
+            project=project,
+            limit=limit,
+            offset=offset,
+            sort=sort,
+            cursor=cursor,
+            include_total=include_total,
+            fields=_split_fields(fields),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return page
 
 
-@router.get("/docs/next", response_model=DocsListResponse)
+@router.get("/docs/next", response_model=DocsPage)
 async def get_next_actions(
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
     limit: Annotated[int, Query(ge=1, le=50)] = 10,
-) -> DocsListResponse:
+    fields: FieldsQuery = None,
+):
     """Get priority queue - high priority first, then by due date"""
-    return await db.get_next_actions(user_id, limit=limit)
+    try:
+        page = await db.get_next_actions(user_id, limit=limit, fields=_split_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return page
 
 
-@router.get("/docs/inbox", response_model=DocsListResponse)
+@router.get("/docs/inbox", response_model=DocsPage)
 async def get_inbox(
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
     limit: Annotated[int, Query(ge=1, le=200)] = 50,
-) -> DocsListResponse:
+    fields: FieldsQuery = None,
+):
     """Get inbox items (status=inbox)"""
-    return await db.get_inbox(user_id, limit=limit)
+    try:
+        page = await db.get_inbox(user_id, limit=limit, fields=_split_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return page
 
 
-@router.get("/docs/due", response_model=DocsListResponse)
+@router.get("/docs/due", response_model=DocsPage)
 async def get_due_soon(
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
     days: Annotated[int, Query(ge=1, le=90)] = 7,
     limit: Annotated[int, Query(ge=1, le=100)] = 20,
-) -> DocsListResponse:
+    fields: FieldsQuery = None,
+):
     """Get tasks with approaching due dates"""
-    return await db.get_due_soon(user_id, days=days, limit=limit)
+    try:
+        page = await db.get_due_soon(
+            user_id, days=days, limit=limit, fields=_split_fields(fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return page
 
 
 @router.get("/docs/{doc_id}", response_model=DocResponse)
 async def get_document(
     doc_id: str,
+    response: Response,
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
 ) -> DocResponse:
-    """Get a single document by ID"""
-    doc = await db.get_document(user_id, doc_id)
-    if not doc:
+    """Get a single document by ID (ETag carries its CAS for If-Match)"""
+    found = await db.get_document_with_cas(user_id, doc_id)
+    if not found:
         raise HTTPException(status_code=404, detail="Document not found")
+    doc, cas = found
+    response.headers["ETag"] = f'"{cas}"'
     return doc
 
 
+@router.get("/docs/{doc_id}/graph", response_model=GraphResponse)
+async def get_document_graph(
+    doc_id: str,
+    db: Annotated[CouchbaseClient, Depends(get_db)],
+    user_id: Annotated[str, Depends(get_user_id)],
+    depth: Annotated[int, Query(ge=1, le=5)] = 2,
+    edges: Annotated[Optional[list[EdgeType]], Query()] = None,
+    max_nodes: Annotated[int, Query(ge=1, le=1000)] = 500,
+) -> GraphResponse:
+    """Expand a document's hierarchy and links server-side in one call"""
+    graph = await db.get_graph(
+        user_id, doc_id, depth=depth, edge_types=edges, max_nodes=max_nodes
+    )
+    if not graph:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return graph
+
+
 @router.patch("/docs/{doc_id}", response_model=DocResponse)
 async def update_document(
     doc_id: str,
     request: UpdateDocRequest,
+    response: Response,
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
-) -> DocResponse:
-    """Update an existing document"""
-    doc = await db.update_document(user_id, doc_id, request)
-    if not doc:
+    if_match: Annotated[Optional[str], Header()] = None,
+    prefer: Annotated[Optional[str], Header()] = None,
+):
+    """Update an existing document.
+
+    Send `If-Match` with a previous ETag to reject the write if the document has
+    changed since (412). The ETag of the response is the CAS this write produced.
+    `Prefer: return=minimal` returns only the written fields and skips reading the
+    document back.
+    """
+    cas = _parse_if_match(if_match)
+    try:
+        if prefer and "return=minimal" in prefer:
+            patched = await db.patch_document(user_id, doc_id, request, cas=cas)
+            if not patched:
+                raise HTTPException(status_code=404, detail="Document not found")
+            return JSONResponse(
+                patched.model_dump(mode="json", exclude_none=True),
+                headers={"ETag": f'"{patched.cas}"', "Preference-Applied": "return=minimal"},
+            )
+        found = await db.update_document_with_cas(user_id, doc_id, request, cas=cas)
+    except DocumentConflictError as e:
+        raise HTTPException(status_code=412, detail="Document was modified concurrently") from e
+    if not found:
         raise HTTPException(status_code=404, detail="Document not found")
+    doc, new_cas = found
+    response.headers["ETag"] = f'"{new_cas}"'
     return doc
 
 
@@ -165,36 +317,102 @@ async def delete_document(
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
     hard: Annotated[bool, Query()] = False,
+    if_match: Annotated[Optional[str], Header()] = None,
 ) -> None:
     """Delete a document (soft delete by default - archives it)"""
-    deleted = await db.delete_document(user_id, doc_id, hard=hard)
+    try:
+        deleted = await db.delete_document(
+            user_id, doc_id, hard=hard, cas=_parse_if_match(if_match)
+        )
+    except DocumentConflictError as e:
+        raise HTTPException(status_code=412, detail="Document was modified concurrently") from e
     if not deleted:
         raise HTTPException(status_code=404, detail="Document not found")
 
 
+def _split_fields(fields: Optional[list[str]]) -> Optional[list[str]]:
+    """Flatten `fields` given comma-separated and/or as repeated parameters"""
+    if not fields:
+        return None
+    return [name.strip() for value in fields for name in value.split(",") if name.strip()]
+
+
+async def _ndjson(
+    batches: AsyncIterator[list[Union[DocResponse, PartialDocResponse]]],
+) -> AsyncIterator[bytes]:
+    """Encode each batch of documents as one chunk of NDJSON lines"""
+    async for batch in batches:
+        yield "".join([doc.model_dump_json() + "\n" for doc in batch]).encode()
+
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Turn an If-Match ETag back into a CAS value"""
+    if not if_match or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header") from e
+
+
 # --- Project-scoped queries ---
 
 
-@router.get("/projects/{project_name}/docs", response_model=DocsListResponse)
+@router.get("/projects/{project_name}/docs", response_model=DocsPage)
 async def get_project_docs(
     project_name: str,
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
     limit: Annotated[int, Query(ge=1, le=200)] = 50,
-) -> DocsListResponse:
+    fields: FieldsQuery = None,
+):
     """Get all docs for a project"""
-    return await db.get_project_docs(user_id, project_name, limit=limit)
+    try:
+        page = await db.get_project_docs(
+            user_id, project_name, limit=limit, fields=_split_fields(fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return page
 
 
-@router.get("/projects/{project_name}/recent", response_model=DocsListResponse)
+@router.get("/projects/{project_name}/recent", response_model=DocsPage)
 async def get_project_recent(
     project_name: str,
     db: Annotated[CouchbaseClient, Depends(get_db)],
     user_id: Annotated[str, Depends(get_user_id)],
     limit: Annotated[int, Query(ge=1, le=50)] = 10,
-) -> DocsListResponse:
+    fields: FieldsQuery = None,
+):
     """Get recent activity for a project"""
-    return await db.get_project_recent(user_id, project_name, limit=limit)
+    try:
+        page = await db.get_project_recent(
+            user_id, project_name, limit=limit, fields=_split_fields(fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return page
+
+
+# --- Export ---
+
+
+@router.get("/export", response_class=StreamingResponse, responses=NDJSON_RESPONSE)
+async def export_documents(
+    db: Annotated[CouchbaseClient, Depends(get_db)],
+    user_id: Annotated[str, Depends(get_user_id)],
+    fields: FieldsQuery = None,
+) -> StreamingResponse:
+    """Stream every document in the user's scope as NDJSON, in no particular order"""
+    try:
+        batches = await db.export_documents(user_id, fields=_split_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return StreamingResponse(
+        _ndjson(batches),
+        media_type=NDJSON,
+        headers={"Content-Disposition": 'attachment; filename="cos-export.ndjson"'},
+    )
 
 
 # --- Tags ---
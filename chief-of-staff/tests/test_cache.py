@@ -0,0 +1,109 @@
+"""Tests for the user validation caches"""
+
+import sqlite3
+import time
+
+import pytest
+
+from cos.cache import MemoryUserCache, SQLiteUserCache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryUserCache(ttl=60, negative_ttl=60, max_entries=3)
+    return SQLiteUserCache(
+        str(tmp_path / "users.sqlite3"), ttl=60, negative_ttl=60, max_entries=3, touch_interval=0
+    )
+
+
+class TestUserCache:
+    def test_miss_then_hit(self, cache):
+        """Test that a cached lookup is served and counted"""
+        assert cache.get("a@example.com") is None
+        cache.set("a@example.com", True)
+        assert cache.get("a@example.com") is True
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_negative_result_cached(self, cache):
+        """Test that unknown users are cached as invalid"""
+        cache.set("nobody@example.com", False)
+        assert cache.get("nobody@example.com") is False
+
+    def test_bounded(self, cache):
+        """Test that the cache never holds more than max_entries"""
+        for i in range(5):
+            cache.set(f"user{i}@example.com", True)
+        assert len(cache) == 3
+        assert cache.evictions == 2
+        assert cache.get("user4@example.com") is True
+
+    def test_evicts_least_recently_used(self, cache):
+        """Test that recently read entries survive eviction"""
+        for user_id in ("a", "b", "c"):
+            cache.set(user_id, True)
+        cache.get("a")
+        cache.set("d", True)
+        assert cache.get("a") is True
+        assert cache.get("b") is None
+
+    def test_invalidate(self, cache):
+        """Test dropping an entry"""
+        cache.set("a@example.com", True)
+        cache.invalidate("a@example.com")
+        assert cache.get("a@example.com") is None
+
+
+def test_entries_expire():
+    """Test that entries stop validating after their TTL"""
+    cache = MemoryUserCache(ttl=0.05, negative_ttl=0.01, max_entries=10)
+    cache.set("revoked@example.com", True)
+    time.sleep(0.06)
+    assert cache.get("revoked@example.com") is None
+
+
+def test_sqlite_hits_are_reads(tmp_path):
+    """Test that a hit doesn't write unless last_used is older than touch_interval"""
+    path = str(tmp_path / "users.sqlite3")
+    cache = SQLiteUserCache(path, ttl=60, negative_ttl=60, max_entries=10)
+    cache.set("a@example.com", True)
+    writes = cache._conn.total_changes
+    for _ in range(5):
+        assert cache.get("a@example.com") is True
+    assert cache._conn.total_changes == writes
+
+
+def test_sqlite_lock_is_a_miss(tmp_path):
+    """Test that a database held locked by another worker degrades to a miss"""
+    path = str(tmp_path / "users.sqlite3")
+    cache = SQLiteUserCache(path, ttl=60, negative_ttl=60, max_entries=10, touch_interval=0)
+    cache.set("a@example.com", True)
+    cache._conn.execute("PRAGMA busy_timeout = 0")
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        assert cache.get("a@example.com") is None
+        cache.set("b@example.com", True)  # Logged, not raised
+    finally:
+        other.execute("ROLLBACK")
+    assert cache.get("a@example.com") is True
+
+
+def test_sqlite_prunes_on_a_counter(tmp_path):
+    """Test that the size check runs every max_entries // 100 sets, not on each one"""
+    path = str(tmp_path / "users.sqlite3")
+    cache = SQLiteUserCache(path, ttl=60, negative_ttl=60, max_entries=200)
+    for i in range(201):
+        cache.set(f"user{i}", True)
+    assert len(cache) == 201  # Over the bound until the next prune
+    cache.set("user201", True)
+    assert len(cache) == 200
+    assert cache.evictions == 2
+
+
+def test_sqlite_cache_shared_between_instances(tmp_path):
+    """Test that a second process (instance) sees entries written by the first"""
+    path = str(tmp_path / "users.sqlite3")
+    SQLiteUserCache(path, ttl=60, negative_ttl=60, max_entries=10).set("a@example.com", True)
+    assert SQLiteUserCache(path, ttl=60, negative_ttl=60, max_entries=10).get("a@example.com")
@@ -0,0 +1,698 @@
+"""Tests for the Couchbase client helpers that don't need a cluster"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from couchbase.exceptions import CasMismatchException, DocumentNotFoundException
+
+import cos.db
+from cos.cache import SQLiteUserCache
+from cos.db import (
+    INDEX_CATALOG,
+    RETIRED_INDEXES,
+    SORT_FIELDS,
+    CouchbaseClient,
+    DocumentConflictError,
+    _decode_cursor,
+    _encode_cursor,
+    _parse_fields,
+    _parse_sort,
+)
+from cos.models import (
+    BatchGetResponse,
+    BulkDocsRequest,
+    BulkOp,
+    CreateDocRequest,
+    DocResponse,
+    DocsListResponse,
+    DocType,
+    EdgeType,
+    PartialDocsListResponse,
+    SourceInfo,
+    Status,
+    UpdateDocRequest,
+)
+
+
+@pytest.fixture
+def client():
+    client = CouchbaseClient()
+    client._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cos-db")
+    client._provision_executor = ThreadPoolExecutor(max_workers=2)
+    yield client
+    client._executor.shutdown(wait=True)
+    client._provision_executor.shutdown(wait=True)
+
+
+class TestRunBlocking:
+    async def test_runs_on_db_executor(self, client):
+        """Test that blocking calls run off the event loop thread"""
+        name = await client.run_blocking(lambda: threading.current_thread().name)
+        assert name.startswith("cos-db")
+
+    async def test_calls_overlap(self, client):
+        """Test that concurrent calls don't serialize on the event loop"""
+        start = time.perf_counter()
+        await asyncio.gather(*(client.run_blocking(time.sleep, 0.1) for _ in range(4)))
+        assert time.perf_counter() - start < 0.3
+
+    async def test_requires_connection(self):
+        """Test that the executor is only available after connect()"""
+        with pytest.raises(RuntimeError):
+            await CouchbaseClient().run_blocking(time.sleep, 0)
+
+
+class TestValidateUser:
+    async def test_disk_cache_read_off_the_event_loop(self, client, monkeypatch, tmp_path):
+        """Test that a blocking cache is only touched from DB executor threads"""
+        path = str(tmp_path / "users.sqlite3")
+        cache = SQLiteUserCache(path, ttl=60, negative_ttl=60, max_entries=10)
+        cache.set("a@example.com", True)
+        threads = []
+        real_get = cache.get
+
+        def get(user_id):
+            threads.append(threading.current_thread().name)
+            return real_get(user_id)
+
+        monkeypatch.setattr(cache, "get", get)
+        monkeypatch.setattr(client, "user_cache", cache)
+        monkeypatch.setattr(client, "provision_user", lambda user_id: None)
+        assert await client.validate_user_async("a@example.com")
+        assert threads and all(name.startswith("cos-db") for name in threads)
+
+
+class TestStats:
+    ROWS = [
+        {"doc_type": "task", "status": "todo", "priority": "high", "count": 3, "recent": 2},
+        {"doc_type": "task", "status": "done", "priority": None, "count": 2, "recent": 0},
+        {"doc_type": "idea", "status": "todo", "count": 1, "recent": 1},
+    ]
+
+    def test_fold_stats(self):
+        """Test that grouped rows fold into every facet"""
+        stats = CouchbaseClient._fold_stats(self.ROWS)
+        assert stats == {
+            "total_docs": 6,
+            "by_doc_type": {"task": 5, "idea": 1},
+            "by_status": {"todo": 4, "done": 2},
+            "by_priority": {"high": 3},
+            "recent_activity": 3,
+        }
+
+    def test_fold_empty(self):
+        """Test stats for an empty scope"""
+        assert CouchbaseClient._fold_stats([])["total_docs"] == 0
+
+    async def test_snapshot_reused_until_write(self, client, monkeypatch):
+        """Test that the snapshot serves repeat reads and a write invalidates it"""
+        calls = []
+
+        async def fake_query(statement, params=None):
+            calls.append(statement)
+            return self.ROWS
+
+        monkeypatch.setattr(client, "_query", fake_query)
+        await client.get_stats("a@example.com")
+        await client.get_stats("a@example.com")
+        assert len(calls) == 1
+
+        client._invalidate_stats("a@example.com")
+        await client.get_stats("a@example.com")
+        assert len(calls) == 2
+
+    async def test_snapshots_bounded(self, client, monkeypatch):
+        """Test that snapshots and write counters are kept for at most max_entries users"""
+        monkeypatch.setattr(client.settings, "user_cache_max_entries", 2)
+
+        async def fake_query(statement, params=None):
+            return self.ROWS
+
+        monkeypatch.setattr(client, "_query", fake_query)
+        for user in ("a", "b", "c"):
+            await client.get_stats(user)
+            client._invalidate_stats(user)
+            await client.get_stats(user)
+        assert [*client._stats_cache] == ["b", "c"]
+        assert [*client._stats_generation] == ["b", "c"]
+
+    async def test_write_evicted_mid_query_not_cached(self, client, monkeypatch):
+        """Test that a write whose counter is evicted still keeps stale counts uncached"""
+        monkeypatch.setattr(client.settings, "user_cache_max_entries", 2)
+
+        async def fake_query(statement, params=None):
+            # a's write is pushed out of the counters by later writes from b and c
+            for user in ("a", "b", "c"):
+                client._invalidate_stats(user)
+            return self.ROWS
+
+        monkeypatch.setattr(client, "_query", fake_query)
+        await client.get_stats("a")
+        assert "a" not in client._stats_cache
+
+
+class TestCursor:
+    def test_round_trip(self):
+        """Test that a cursor decodes to the row it was built from"""
+        cursor = _encode_cursor("updated_at:desc", "2025-11-26T10:00:00+00:00", "doc-1")
+        assert _decode_cursor(cursor, "updated_at:desc") == ("2025-11-26T10:00:00+00:00", "doc-1")
+
+    def test_sort_mismatch_rejected(self):
+        """Test that a cursor can't be replayed against a different sort"""
+        cursor = _encode_cursor("updated_at:desc", "2025-11-26", "doc-1")
+        with pytest.raises(ValueError):
+            _decode_cursor(cursor, "created_at:desc")
+
+    def test_garbage_rejected(self):
+        """Test that a malformed cursor raises ValueError"""
+        with pytest.raises(ValueError):
+            _decode_cursor("not-a-cursor", "updated_at:desc")
+
+    def test_parse_sort(self):
+        """Test sort parsing and the field whitelist"""
+        assert _parse_sort("updated_at:desc") == ("updated_at", True)
+        assert _parse_sort("due_date:asc") == ("due_date", False)
+        with pytest.raises(ValueError):
+            _parse_sort("content; DROP:desc")
+
+    def test_every_sort_has_ordered_indexes(self):
+        """Test that each sort field and direction has an index keyed (sort, META().id)"""
+        leading = {keys.split(", META().id")[0] for _, keys, _ in INDEX_CATALOG}
+        for expr in SORT_FIELDS.values():
+            for direction in ("ASC", "DESC"):
+                assert f"{expr.replace('d.', '')} {direction}" in leading
+
+    def test_retired_names_not_reused(self):
+        """Test that no catalog index reuses a retired name (IF NOT EXISTS keeps the old one)"""
+        assert not {name for name, _, _ in INDEX_CATALOG} & set(RETIRED_INDEXES)
+
+
+class TestProvisioning:
+    async def test_concurrent_requests_share_one_job(self, client, monkeypatch):
+        """Test that simultaneous first requests wait on the same provisioning job"""
+        calls = []
+
+        def slow_provision(user_id, ensure_indexes=False):
+            calls.append(user_id)
+            time.sleep(0.1)
+
+        monkeypatch.setattr(client, "_ensure_user_scope", slow_provision)
+        results = await asyncio.gather(
+            *(client.wait_for_scope("a@example.com", timeout=1) for _ in range(5))
+        )
+        assert results == [True] * 5
+        assert calls == ["a@example.com"]
+
+        # Once ready, later requests don't provision again
+        assert await client.wait_for_scope("a@example.com", timeout=0)
+        assert calls == ["a@example.com"]
+
+    async def test_slow_provisioning_reports_not_ready(self, client, monkeypatch):
+        """Test that a request gives up waiting without cancelling the job"""
+        monkeypatch.setattr(client, "_ensure_user_scope", lambda *a, **k: time.sleep(0.2))
+        assert not await client.wait_for_scope("b@example.com", timeout=0.01)
+        assert await client.wait_for_scope("b@example.com", timeout=1)
+
+    async def test_failed_job_is_retried(self, client, monkeypatch):
+        """Test that a failed provisioning attempt isn't cached"""
+        attempts = []
+
+        def flaky(user_id, ensure_indexes=False):
+            attempts.append(user_id)
+            if len(attempts) == 1:
+                raise TimeoutError("scope not ready")
+
+        monkeypatch.setattr(client, "_ensure_user_scope", flaky)
+        with pytest.raises(TimeoutError):
+            await client.wait_for_scope("c@example.com", timeout=1)
+        assert await client.wait_for_scope("c@example.com", timeout=1)
+        assert len(attempts) == 2
+
+    async def test_ready_scopes_bounded(self, client, monkeypatch):
+        """Test that only the most recently used ready scopes are remembered"""
+        monkeypatch.setattr(client.settings, "user_cache_max_entries", 2)
+        monkeypatch.setattr(client, "_ensure_user_scope", lambda *a, **k: None)
+        for user in ("a", "b", "a", "c"):
+            assert await client.wait_for_scope(user, timeout=1)
+        assert [*client._provisioned_users] == ["a", "c"]
+
+
+class FakeLookupResult:
+    """lookup_in result over a stored document (missing paths don't exist)"""
+
+    def __init__(self, doc, paths):
+        self.doc = doc
+        self.paths = paths
+        self.content_as = self
+
+    def __getitem__(self, convert):
+        return lambda index: convert(self.doc[self.paths[index]])
+
+    def exists(self, index):
+        return self.paths[index] in self.doc
+
+
+class FakeCollection:
+    """Records sub-document operations instead of sending them"""
+
+    def __init__(self, error=None, doc=None):
+        self.calls = []
+        self.error = error
+        self.doc = doc or {}
+
+    def mutate_in(self, doc_id, specs, options):
+        if self.error:
+            raise self.error
+        self.calls.append((doc_id, specs, options))
+        return type("Result", (), {"cas": 42})()
+
+    def lookup_in(self, doc_id, specs):
+        self.calls.append((doc_id, specs, None))
+        return FakeLookupResult(self.doc, [spec[1] for spec in specs])
+
+
+class TestSubdocWrites:
+    async def test_patch_writes_only_provided_fields(self, client, monkeypatch):
+        """Test that a PATCH is one mutate_in touching just the changed paths"""
+        collection = FakeCollection()
+        monkeypatch.setattr(client, "_get_collection", lambda user_id: collection)
+
+        patched = await client.patch_document(
+            "a@example.com", "doc-1", UpdateDocRequest(status=Status.done, title="Done")
+        )
+
+        [(doc_id, specs, _)] = collection.calls
+        assert doc_id == "doc-1"
+        assert len(specs) == 3  # status, title, updated_at
+        assert patched.status == Status.done
+        assert patched.content is None
+        assert patched.cas == 42
+
+    async def test_update_reads_back_with_lookup_in(self, client, monkeypatch):
+        """Test that a full PATCH response is one mutate_in plus one lookup_in, with its CAS"""
+        stored = {k: v for k, v in TestDocToResponse.FULL.items() if k != "parent_id"}
+        collection = FakeCollection(doc=stored)
+        monkeypatch.setattr(client, "_get_collection", lambda user_id: collection)
+
+        doc, cas = await client.update_document_with_cas(
+            "a@example.com", "doc-1", UpdateDocRequest(title="Release")
+        )
+
+        assert [options is None for _, _, options in collection.calls] == [False, True]
+        assert cas == 42
+        assert doc.title == "Release"
+        assert doc.parent_id is None
+
+    async def test_cas_mismatch_raises_conflict(self, client, monkeypatch):
+        """Test that a lost CAS race surfaces as DocumentConflictError"""
+        collection = FakeCollection(error=CasMismatchException())
+        monkeypatch.setattr(client, "_get_collection", lambda user_id: collection)
+
+        with pytest.raises(DocumentConflictError):
+            await client.patch_document("a@example.com", "doc-1", UpdateDocRequest(), cas=7)
+        with pytest.raises(DocumentConflictError):
+            await client.delete_document("a@example.com", "doc-1", cas=7)
+
+
+class FakeMultiCollection(FakeCollection):
+    """insert_multi/remove_multi that fail for selected keys"""
+
+    def __init__(self, missing=()):
+        super().__init__()
+        self.missing = set(missing)
+        self.inserted = {}
+
+    def insert_multi(self, docs):
+        self.inserted.update(docs)
+        return type("Result", (), {"exceptions": {}})()
+
+    def remove_multi(self, keys):
+        errors = {k: DocumentNotFoundException() for k in keys if k in self.missing}
+        return type("Result", (), {"exceptions": errors})()
+
+    def mutate_in(self, doc_id, specs, options):
+        if doc_id in self.missing:
+            raise DocumentNotFoundException()
+        return super().mutate_in(doc_id, specs, options)
+
+
+class TestBulk:
+    async def test_partial_failure_reported_per_item(self, client, monkeypatch):
+        """Test that one bad item doesn't fail the batch"""
+        collection = FakeMultiCollection(missing={"gone", "gone-hard"})
+        monkeypatch.setattr(client, "_get_collection", lambda user_id: collection)
+
+        response = await client.bulk_documents(
+            "a@example.com",
+            BulkDocsRequest(
+                create=[
+                    CreateDocRequest(doc_type=DocType.idea, content=f"idea {i}") for i in range(3)
+                ],
+                update=[
+                    {"id": "doc-1", "changes": {"status": "done"}},
+                    {"id": "gone", "changes": {}},
+                ],
+                delete=[{"id": "doc-2"}, {"id": "gone-hard", "hard": True}],
+            ),
+        )
+
+        assert len(collection.inserted) == 3
+        assert (response.succeeded, response.failed) == (5, 2)
+        failures = {(r.op, r.id): r.error for r in response.results if not r.success}
+        assert failures == {
+            (BulkOp.update, "gone"): "Document not found",
+            (BulkOp.delete, "gone-hard"): "Document not found",
+        }
+
+    async def test_mutations_bounded(self, client, monkeypatch):
+        """Test that updates and soft deletes share a cap on in-flight mutations"""
+        monkeypatch.setattr(client.settings, "bulk_concurrency", 3)
+        monkeypatch.setattr(client, "_get_collection", lambda user_id: FakeMultiCollection())
+        active = peak = 0
+
+        async def mutate(*args, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return True
+
+        monkeypatch.setattr(client, "patch_document", mutate)
+        monkeypatch.setattr(client, "delete_document", mutate)
+        response = await client.bulk_documents(
+            "a@example.com",
+            BulkDocsRequest(
+                update=[{"id": f"doc-{i}", "changes": {}} for i in range(10)],
+                delete=[{"id": f"del-{i}"} for i in range(10)],
+            ),
+        )
+
+        assert (response.succeeded, response.failed) == (20, 0)
+        assert peak == 3
+
+
+class TestBatchGet:
+    async def test_found_and_missing(self, client, monkeypatch):
+        """Test that a multi-get splits found documents from missing IDs"""
+        stored = {
+            "doc-1": {
+                "doc_type": "task",
+                "user_id": "a@example.com",
+                "content": "Linked task",
+                "status": "todo",
+                "created_at": "2025-11-26T10:00:00+00:00",
+                "updated_at": "2025-11-26T10:00:00+00:00",
+            }
+        }
+        requested = []
+
+        class Collection:
+            def get_multi(self, keys):
+                requested.extend(keys)
+                results = {
+                    k: type("R", (), {"content_as": {dict: stored[k]}})()
+                    for k in keys
+                    if k in stored
+                }
+                errors = {k: DocumentNotFoundException() for k in keys if k not in stored}
+                return type("Result", (), {"results": results, "exceptions": errors})()
+
+        monkeypatch.setattr(client, "_get_collection", lambda user_id: Collection())
+        response = await client.get_documents("a@example.com", ["doc-1", "nope", "doc-1"])
+
+        assert requested == ["doc-1", "nope"]
+        assert [d.id for d in response.items] == ["doc-1"]
+        assert response.missing == ["nope"]
+
+
+class TestGraph:
+    def _doc(self, doc_id, **fields):
+        return {
+            "id": doc_id,
+            "doc_type": "task",
+            "user_id": "a@example.com",
+            "content": doc_id,
+            "status": "todo",
+            "linked_ids": [],
+            "created_at": "2025-11-26T10:00:00+00:00",
+            "updated_at": "2025-11-26T10:00:00+00:00",
+            **fields,
+        }
+
+    @pytest.fixture
+    def graph_client(self, client, monkeypatch):
+        """Client over an in-memory store: project P <- T1 <- T2, and T2 links back to P"""
+        store = {
+            "P": self._doc("P", doc_type="project"),
+            "T1": self._doc("T1", project_id="P"),
+            "T2": self._doc("T2", parent_id="T1", linked_ids=["P", "gone"]),
+        }
+        queries = []
+
+        async def get_document(user_id, doc_id):
+            return client._doc_to_response(doc_id, store[doc_id]) if doc_id in store else None
+
+        async def get_documents(user_id, ids):
+            ids = list(dict.fromkeys(ids))
+            return BatchGetResponse(
+                items=[client._doc_to_response(i, store[i]) for i in ids if i in store],
+                missing=[i for i in ids if i not in store],
+            )
+
+        async def query(statement, params=None):
+            queries.append(params["ids"])
+            return [
+                doc
+                for doc in store.values()
+                if doc.get("parent_id") in params["ids"] or doc.get("project_id") in params["ids"]
+            ]
+
+        monkeypatch.setattr(client, "get_document", get_document)
+        monkeypatch.setattr(client, "get_documents", get_documents)
+        monkeypatch.setattr(client, "_query", query)
+        client.graph_queries = queries
+        return client
+
+    async def test_walks_tree_and_links(self, graph_client):
+        """Test that project items, subtasks and links are expanded level by level"""
+        graph = await graph_client.get_graph("a@example.com", "P", depth=3)
+
+        assert {n.id for n in graph.nodes} == {"P", "T1", "T2"}
+        assert {(e.source, e.target, e.type) for e in graph.edges} == {
+            ("P", "T1", EdgeType.project_items),
+            ("T1", "T2", EdgeType.children),
+            ("T2", "P", EdgeType.links),  # closes the cycle without revisiting P
+        }
+        assert graph.missing == ["gone"]
+        # One reverse-edge query per level, never re-expanding visited nodes
+        assert graph_client.graph_queries == [["P"], ["T1"], ["T2"]]
+
+    async def test_depth_and_node_limits(self, graph_client):
+        """Test that depth and max_nodes bound the walk"""
+        graph = await graph_client.get_graph("a@example.com", "P", depth=1)
+        assert {n.id for n in graph.nodes} == {"P", "T1"}
+
+        graph = await graph_client.get_graph("a@example.com", "P", depth=3, max_nodes=2)
+        assert len(graph.nodes) == 2
+        assert graph.truncated
+
+    async def test_missing_root(self, graph_client):
+        """Test that an unknown root returns None"""
+        assert await graph_client.get_graph("a@example.com", "nope") is None
+
+
+class TestDocToResponse:
+    FULL = {
+        "doc_type": "task",
+        "user_id": "a@example.com",
+        "content": "Ship it",
+        "title": "Release",
+        "tags": ["work"],
+        "priority": "high",
+        "status": "in-progress",
+        "due_date": "2026-01-01",
+        "project_id": "P",
+        "parent_id": None,
+        "linked_ids": ["T1"],
+        "source": {"client": "cli", "project": "cos", "capture_mode": "explicit"},
+        "metadata": {"k": 1},
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "updated_at": "2025-01-02T00:00:00+00:00",
+    }
+    # Only the required keys; everything else takes the read-side defaults
+    SPARSE = {
+        "doc_type": "note",
+        "user_id": "a@example.com",
+        "content": "Thought",
+        "status": "todo",
+        "source": {"client": "api"},
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "updated_at": "2025-01-01T00:00:00+00:00",
+    }
+
+    @staticmethod
+    def validated(doc_id: str, doc: dict) -> DocResponse:
+        """The fully validated construction the trusted path replaces"""
+        return DocResponse(
+            id=doc_id,
+            doc_type=doc["doc_type"],
+            user_id=doc["user_id"],
+            content=doc["content"],
+            title=doc.get("title"),
+            tags=doc.get("tags", []),
+            priority=doc.get("priority") or None,
+            status=doc["status"],
+            due_date=doc.get("due_date"),
+            project_id=doc.get("project_id"),
+            parent_id=doc.get("parent_id"),
+            linked_ids=doc.get("linked_ids", []),
+            source=SourceInfo(**doc["source"]) if doc.get("source") else None,
+            metadata=doc.get("metadata", {}),
+            created_at=doc["created_at"],
+            updated_at=doc["updated_at"],
+        )
+
+    @pytest.mark.parametrize("doc", [FULL, SPARSE], ids=["full", "sparse"])
+    def test_matches_validated_model(self, doc):
+        """Test that the trusted path builds the same model and JSON as validation"""
+        fast = CouchbaseClient()._doc_to_response("D1", doc)
+        expected = self.validated("D1", doc)
+
+        assert fast == expected
+        assert fast.model_fields_set == expected.model_fields_set
+        assert fast.model_dump_json() == expected.model_dump_json()
+        assert (
+            DocsListResponse(items=[fast], limit=1, offset=0).model_dump_json()
+            == DocsListResponse(items=[expected], limit=1, offset=0).model_dump_json()
+        )
+
+    @pytest.mark.parametrize("doc", [FULL, SPARSE], ids=["full", "sparse"])
+    def test_validating_fallback_matches(self, doc, monkeypatch):
+        """Test the path taken if pydantic's private model layout ever changes"""
+        trusted = CouchbaseClient()._doc_to_response("D1", doc)
+        monkeypatch.setattr(cos.db, "_TRUSTED_CONSTRUCT", False)
+        fallback = CouchbaseClient()._doc_to_response("D1", doc)
+
+        assert fallback == trusted
+        assert fallback.model_fields_set == trusted.model_fields_set
+        assert fallback.model_dump_json() == trusted.model_dump_json()
+
+        fields = ("title", "source", "created_at")
+        row = {key: doc.get(key) for key in fields}
+        assert (
+            CouchbaseClient()._doc_to_partial("D1", row, fields).model_dump_json()
+            == fallback.model_dump_json(include={"id", *fields})
+        )
+
+    def test_unknown_enum_value_raises(self):
+        """Test that a value outside the enums isn't passed through silently"""
+        with pytest.raises(KeyError):
+            CouchbaseClient()._doc_to_response("D1", {**self.FULL, "status": "bogus"})
+
+
+class TestSparseFields:
+    ROW = {"id": "D1", **TestDocToResponse.FULL}
+
+    @pytest.fixture
+    def queries(self, client, monkeypatch):
+        """Answer every query with ROW, cut down to what the SELECT list asks for"""
+        statements = []
+
+        async def query(statement, params=None):
+            statements.append(statement)
+            if "d.*" in statement:
+                return [{**self.ROW, "_sort_key": self.ROW["updated_at"]}]
+            row = {key: value for key, value in self.ROW.items() if f"d.`{key}`" in statement}
+            return [{"id": "D1", **row, "_sort_key": self.ROW["updated_at"]}]
+
+        monkeypatch.setattr(client, "_query", query)
+        return statements
+
+    def test_parse_fields(self):
+        """Test that fieldsets are validated, deduplicated, and id is implied"""
+        assert _parse_fields(None) is None
+        assert _parse_fields(["title", "id", "status", "title"]) == ("title", "status")
+        assert _parse_fields(["id"]) == ()
+        with pytest.raises(ValueError, match="bogus"):
+            _parse_fields(["title", "bogus"])
+
+    async def test_projection_pushed_into_query(self, client, queries):
+        """Test that only the requested fields are selected and returned"""
+        page = await client.list_documents(
+            "a@example.com", fields=["title", "status", "tags"], limit=1
+        )
+
+        assert "d.*" not in queries[-1]
+        assert "d.`title`, d.`status`, d.`tags`" in queries[-1]
+        assert isinstance(page, PartialDocsListResponse)
+        assert page.model_dump(mode="json")["items"] == [
+            {"id": "D1", "title": "Release", "status": "in-progress", "tags": ["work"]}
+        ]
+
+    async def test_projected_values_match_full_documents(self, client, queries):
+        """Test that projected fields decode exactly as in the full response"""
+        full = (await client.get_next_actions("a@example.com")).items[0]
+        fields = ["doc_type", "priority", "source", "created_at", "metadata"]
+        partial = (await client.get_next_actions("a@example.com", fields=fields)).items[0]
+
+        assert partial.model_dump() == full.model_dump(include={"id", *fields})
+
+    async def test_missing_fields_get_defaults(self, client, monkeypatch):
+        """Test that a requested field the document lacks comes back as its default, not dropped"""
+
+        async def query(statement, params=None):
+            return [{"id": "D1"}]
+
+        monkeypatch.setattr(client, "_query", query)
+        page = await client.get_due_soon("a@example.com", fields=["due_date", "tags"])
+        assert page.model_dump()["items"] == [{"id": "D1", "due_date": None, "tags": []}]
+
+
+class TestStreaming:
+    @pytest.fixture
+    def rows(self, client, monkeypatch):
+        """Serve five rows through _query_iter, recording statements and rows read"""
+        monkeypatch.setattr(client.settings, "stream_batch_size", 2)
+        state = {"statements": [], "read": 0}
+
+        def query_iter(statement, params=None):
+            state["statements"].append(statement)
+            for i in range(5):
+                state["read"] += 1
+                yield {"id": f"D{i}", **TestDocToResponse.FULL}
+
+        monkeypatch.setattr(client, "_query_iter", query_iter)
+        return state
+
+    async def test_batches_are_read_as_consumed(self, client, rows):
+        """Test that only the first batch is read up front, then one batch per step"""
+        batches = await client.stream_documents("a@example.com", status=Status.todo)
+        assert rows["read"] == 2
+
+        sizes = []
+        async for batch in batches:
+            sizes.append(len(batch))
+            assert rows["read"] <= sum(sizes) + 1  # never more than a batch ahead
+        assert sizes == [2, 2, 1]
+        assert "LIMIT" not in rows["statements"][0]
+
+    async def test_invalid_request_fails_before_querying(self, client, rows):
+        """Test that errors surface before a streamed response would start"""
+        with pytest.raises(ValueError):
+            await client.stream_documents("a@example.com", sort="bogus:asc")
+        with pytest.raises(ValueError):
+            await client.stream_documents("a@example.com", cursor="not-a-cursor")
+        assert rows["statements"] == []
+
+    async def test_export_is_an_unsorted_projected_scan(self, client, rows):
+        """Test that export doesn't sort before its first row and honours fields"""
+        batches = await client.export_documents("a@example.com", fields=["title"])
+        docs = [doc async for batch in batches for doc in batch]
+
+        assert "ORDER BY" not in rows["statements"][0]
+        assert [doc.model_dump() for doc in docs][:1] == [{"id": "D0", "title": "Release"}]
+        assert len(docs) == 5
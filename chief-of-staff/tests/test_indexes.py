@@ -0,0 +1,188 @@
+"""EXPLAIN every query shape in CouchbaseClient against INDEX_CATALOG.
+
+Needs a live cluster: set COS_TEST_LIVE=1 plus the usual COS_COUCHBASE_* settings.
+The default user's scope is provisioned (and its catalog indexes built) first.
+
+Queries that select whole documents (`d.*`) can never be covered, so they are
+held to order and LIMIT pushdown instead; only get_tags and get_stats are
+asserted covered. Any query exempt from a check says why in its docstring.
+"""
+
+import os
+import time
+
+import pytest
+
+from cos.db import CouchbaseClient, _encode_cursor
+from cos.models import DocType, EdgeType, Priority, Status
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("COS_TEST_LIVE"), reason="set COS_TEST_LIVE=1 to run against Couchbase"
+)
+
+
+@pytest.fixture(scope="module")
+def live_client():
+    client = CouchbaseClient()
+    client.connect()
+    user_id = client.settings.default_user
+    assert client.validate_user(user_id), f"{user_id} missing from users bucket"
+    client._create_indexes_for_user(user_id)
+
+    # Wait for deferred builds to come online so the planner can pick them
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        pending = client._query_rows(
+            """
+            SELECT RAW i.name FROM system:indexes i
+            WHERE i.bucket_id = $bucket AND i.scope_id = $scope
+              AND i.keyspace_id = "documents" AND i.state != "online"
+            """,
+            {"bucket": client.settings.couchbase_bucket, "scope": client._get_scope_name(user_id)},
+        )
+        if not pending:
+            break
+        time.sleep(1)
+    yield client
+    client.close()
+
+
+def _operators(plan):
+    """Yield every operator dict in an EXPLAIN plan tree"""
+    if isinstance(plan, dict):
+        if "#operator" in plan:
+            yield plan
+        for value in plan.values():
+            yield from _operators(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _operators(item)
+
+
+@pytest.fixture
+def explained(live_client, monkeypatch):
+    """Replace query execution with EXPLAIN and collect the plans"""
+    plans: list[tuple[str, dict]] = []
+
+    def explain_rows(statement, params=None):
+        rows = live_client._query_rows(f"EXPLAIN {statement}", params)
+        plans.append((statement, rows[0]["plan"]))
+        return []
+
+    async def explain(statement, params=None):
+        return explain_rows(statement, params)
+
+    monkeypatch.setattr(live_client, "_query", explain)
+    monkeypatch.setattr(live_client, "_query_iter", lambda *args: iter(explain_rows(*args)))
+    return plans
+
+
+def _assert_index_backed(
+    plans, covered: bool = False, ordered: bool = False, limited: bool = False
+):
+    """Fail unless every plan reads through a secondary index.
+
+    `covered`: answered from index keys alone. `ordered`: ORDER BY is served by
+    index order (no Order operator). `limited`: LIMIT is pushed into the scan.
+    """
+    assert plans
+    for statement, plan in plans:
+        ops = list(_operators(plan))
+        names = {op["#operator"] for op in ops}
+        assert "PrimaryScan" not in names and "PrimaryScan3" not in names, statement
+        scans = [op for op in ops if op["#operator"].startswith(("IndexScan", "UnnestScan"))]
+        assert scans or "IntersectScan" in names or "UnionScan" in names, statement
+        if covered:
+            assert all(op.get("covers") for op in scans), statement
+        if ordered:
+            assert "Order" not in names, statement
+        if limited:
+            assert scans and all("limit" in op for op in scans), statement
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"doc_type": DocType.task},
+        {"status": Status.todo, "priority": Priority.high},
+        {"project": "chief-of-staff"},
+        {"sort": "updated_at:asc"},
+        {"sort": "created_at:asc"},
+        {"sort": "due_date:asc"},
+        {"sort": "title:desc", "doc_type": DocType.note},
+        {"status": Status.todo, "fields": ["title", "status", "priority", "tags"]},
+    ],
+)
+async def test_list_documents(live_client, explained, filters):
+    """Pages read in index order and stop at LIMIT, whatever the sort"""
+    await live_client.list_documents(live_client.settings.default_user, **filters)
+    _assert_index_backed(explained, ordered=True, limited=True)
+
+
+async def test_list_documents_by_tag(live_client, explained):
+    """Exempt from order pushdown: tag spans come from the array index, not idx_list_*"""
+    await live_client.list_documents(live_client.settings.default_user, tags=["work"])
+    _assert_index_backed(explained)
+
+
+@pytest.mark.parametrize("sort", ["updated_at:desc", "title:asc"])
+async def test_list_documents_with_cursor(live_client, explained, sort):
+    cursor = _encode_cursor(sort, "2025-11-26T00:00:00+00:00", "doc-1")
+    await live_client.list_documents(live_client.settings.default_user, sort=sort, cursor=cursor)
+    _assert_index_backed(explained, ordered=True, limited=True)
+
+
+async def test_stream_documents(live_client, explained):
+    """Streams start without sorting the whole result first"""
+    await live_client.stream_documents(
+        live_client.settings.default_user, doc_type=DocType.task, sort="due_date:asc"
+    )
+    _assert_index_backed(explained, ordered=True)
+
+
+async def test_export(live_client, explained):
+    await live_client.export_documents(live_client.settings.default_user)
+    _assert_index_backed(explained, ordered=True)
+
+
+@pytest.mark.parametrize("fields", [None, ["title", "priority", "due_date"]])
+async def test_next_actions(live_client, explained, fields):
+    """The queue is read in idx_next_actions_order order and stops at LIMIT"""
+    await live_client.get_next_actions(live_client.settings.default_user, fields=fields)
+    _assert_index_backed(explained, ordered=True, limited=True)
+
+
+async def test_due_soon(live_client, explained):
+    """Exempt from LIMIT pushdown: `status NOT IN` is filtered after the due_date range"""
+    await live_client.get_due_soon(live_client.settings.default_user)
+    _assert_index_backed(explained, ordered=True)
+
+
+async def test_tags_covered(live_client, explained):
+    await live_client.get_tags(live_client.settings.default_user)
+    _assert_index_backed(explained, covered=True)
+
+
+async def test_stats_covered(live_client, explained):
+    live_client._invalidate_stats(live_client.settings.default_user)
+    await live_client.get_stats(live_client.settings.default_user)
+    _assert_index_backed(explained, covered=True)
+
+
+@pytest.mark.parametrize("project", [None, "chief-of-staff"])
+async def test_latest_context(live_client, explained, project):
+    await live_client.get_latest_context(live_client.settings.default_user, project=project)
+    _assert_index_backed(explained, ordered=True, limited=True)
+
+
+async def test_graph_reverse_edges(live_client, explained):
+    """Exempt from order and LIMIT pushdown: the OR across parent_id and project_id
+    is a UnionScan of two indexes, and the query has no ORDER BY to push"""
+    await live_client._query_reverse_edges(
+        live_client.settings.default_user,
+        ["doc-1", "doc-2"],
+        [EdgeType.children, EdgeType.project_items],
+        limit=100,
+    )
+    _assert_index_backed(explained)
@@ -4,6 +4,7 @@ import pytest
 from pydantic import ValidationError
 
 from cos.models import (
+    BulkDeleteItem,
     CreateDocRequest,
     DocType,
     Priority,
@@ -98,3 +99,14 @@ class TestSourceInfo:
         )
         assert source.project == "chief-of-staff"
         assert len(source.files) == 2
+
+
+class TestBulkDeleteItem:
+    def test_cas_with_soft_delete(self):
+        """Test that a soft delete can be conditional"""
+        assert BulkDeleteItem(id="doc-1", cas=42).cas == 42
+
+    def test_cas_with_hard_delete_fails(self):
+        """Test that cas is rejected where it would be ignored"""
+        with pytest.raises(ValidationError):
+            BulkDeleteItem(id="doc-1", hard=True, cas=42)
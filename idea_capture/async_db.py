@@ -0,0 +1,202 @@
+"""Asyncio CouchDB client, used by the MCP server."""
+
+import json
+import time
+from typing import AsyncIterator, Iterable, Optional
+
+import httpx
+
+from . import queries
+from .config import config
+from .models import JournalIdea
+from .queries import DESIGN_DOC, ITER_PAGE_SIZE, Request
+
+# Same pool size the sync client gives its requests session
+MAX_CONNECTIONS = 16
+
+
+class AsyncCouchDBClient:
+    """Non-blocking counterpart of CouchDBClient for the operations the MCP tools use.
+
+    Requests share a pooled httpx.AsyncClient, so concurrent tool calls overlap
+    on the network instead of queueing behind one another. Errors surface as
+    httpx.HTTPStatusError.
+    """
+
+    def __init__(self):
+        self.config = config
+        self._client: Optional[httpx.AsyncClient] = None
+        self._db_checked_at: Optional[float] = None  # monotonic time the database was last seen
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared HTTP client, created on first use inside the running loop."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.config.url,
+                auth=self.config.auth,
+                timeout=httpx.Timeout(self.config.request_timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS
+                ),
+            )
+        return self._client
+
+    async def close(self):
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _request(self, method: str, path: str, **kwargs):
+        """Make HTTP request to CouchDB."""
+        response = await self.client.request(method, f"/{path}", **kwargs)
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    async def ensure_database(self):
+        """Create database if it doesn't exist (skipped while a previous check is fresh)."""
+        if queries.database_known(self._db_checked_at, self.config.db_check_ttl):
+            return
+        await self._run(queries.ensure_database(self.config))
+        self._db_checked_at = time.monotonic()
+
+    async def _write(self, method: str, path: str, **kwargs):
+        """Make a write request, creating the database and retrying once if it's missing."""
+        result = await self._run(queries.write(self.config, Request(method, path, kwargs)))
+        self._db_checked_at = time.monotonic()
+        return result
+
+    async def _perform(self, request: Request) -> tuple[Optional[dict], Optional[Exception]]:
+        """Make one plan request: its response, or the HTTP error it raised."""
+        try:
+            return await self._request(request.method, request.path, **request.kwargs), None
+        except httpx.HTTPStatusError as e:
+            return None, e
+
+    async def _run(self, plan: queries.Plan):
+        """Make the requests a queries plan asks for and return its result."""
+        response = error = None
+        while True:
+            try:
+                request = queries.advance(plan, response, error)
+            except StopIteration as done:
+                return done.value
+            response, error = await self._perform(request)
+
+    async def _stream(self, plan: queries.Plan) -> AsyncIterator[JournalIdea]:
+        """Run a streaming queries plan, yielding the ideas it produces."""
+        response = error = None
+        while True:
+            try:
+                step = queries.advance(plan, response, error)
+            except StopIteration:
+                return
+            if isinstance(step, Request):
+                response, error = await self._perform(step)
+            else:
+                response = error = None
+                yield step
+
+    async def create_idea(self, idea: JournalIdea) -> JournalIdea:
+        """Create a new idea."""
+        result = await self._write("POST", self.config.database, json=idea.to_dict())
+        idea._id = result["id"]
+        idea._rev = result["rev"]
+        return idea
+
+    async def get_idea(self, idea_id: str) -> Optional[JournalIdea]:
+        """Get an idea by ID."""
+        try:
+            doc = await self._request("GET", f"{self.config.database}/{idea_id}")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+        return JournalIdea.from_doc(doc)
+
+    async def update_idea(self, idea: JournalIdea) -> JournalIdea:
+        """Update an existing idea."""
+        idea.update_timestamp()
+        result = await self._request(
+            "PUT", f"{self.config.database}/{idea._id}", json=idea.to_dict()
+        )
+        idea._rev = result["rev"]
+        return idea
+
+    async def delete_idea(self, idea_id: str, rev: str) -> bool:
+        """Delete an idea."""
+        try:
+            await self._request("DELETE", f"{self.config.database}/{idea_id}", params={"rev": rev})
+            return True
+        except httpx.HTTPStatusError:
+            return False
+
+    async def _view(self, view_name: str, design_doc: str = DESIGN_DOC, **params) -> dict:
+        """GET a view's raw result, applying the configured update/stable read mode."""
+        request = queries.view_request(self.config, view_name, design_doc, **params)
+        return await self._request(request.method, request.path, **request.kwargs)
+
+    async def query_view(self, design_doc: str, view_name: str, **params) -> list[JournalIdea]:
+        """Query a CouchDB view."""
+        params["include_docs"] = "true"
+        if "reduce" not in params:
+            params["reduce"] = "false"
+        result = await self._view(view_name, design_doc=design_doc, **params)
+        from_doc = JournalIdea.from_doc
+        return [from_doc(row["doc"]) for row in result.get("rows", []) if row.get("doc")]
+
+    async def find_ideas(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        tag: Optional[str] = None,
+        metadata_key: Optional[str] = None,
+        exclude_statuses: Iterable[str] = (),
+        limit: Optional[int] = None,
+        skip: int = 0,
+        descending: bool = True,
+        fields: Optional[list[str]] = None,
+    ) -> list[JournalIdea]:
+        """Find ideas matching any combination of filters (see queries.find_ideas)."""
+        return await self._run(
+            queries.find_ideas(
+                self.config, status, priority, tag, metadata_key, exclude_statuses,
+                limit, skip, descending, fields,
+            )
+        )
+
+    async def iter_ideas(
+        self,
+        page_size: int = ITER_PAGE_SIZE,
+        descending: bool = True,
+        exclude_statuses: Iterable[str] = (),
+        skip: int = 0,
+    ) -> AsyncIterator[JournalIdea]:
+        """Stream ideas in created order (see queries.iter_ideas)."""
+        plan = queries.iter_ideas(self.config, page_size, descending, exclude_statuses, skip)
+        async for idea in self._stream(plan):
+            yield idea
+
+    async def get_next_actions(self, limit: Optional[int] = None, skip: int = 0) -> list[JournalIdea]:
+        """Get next actions (todo items sorted by priority, then oldest first)."""
+        params = {}
+        if limit:
+            params["limit"] = limit
+        if skip:
+            params["skip"] = skip
+        return await self.query_view("queries", "next_actions", **params)
+
+    async def search_by_tags(self, tag: str) -> list[JournalIdea]:
+        """Search ideas by tag."""
+        return await self.query_view("queries", "by_tag", key=json.dumps(tag))
+
+
+# Global client instance
+async_db = AsyncCouchDBClient()
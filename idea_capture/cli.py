@@ -2,9 +2,19 @@
 
 import click
 import json
-from .db import db
+import os
+import subprocess
+import sys
+import time
+from itertools import islice
+from .db import LIST_FIELDS, CouchDBClient, db
 from .models import JournalIdea
-from .config import config
+from .config import ENV_BEFORE_DOTENV, config
+from .journal import journal
+from .replica import replica
+
+# Seconds 'idea setup' waits for changed views before leaving the build to a background setup
+SETUP_BUILD_TIMEOUT = 5.0
 
 
 @click.group()
@@ -23,8 +33,10 @@ def main():
 @click.option('--priority', '-p', type=click.Choice(['low', 'medium', 'high']), default='medium')
 @click.option('--status', '-s', type=click.Choice(['todo', 'in-progress', 'done', 'archived']), default='todo')
 @click.option('--metadata', '-m', help='Additional metadata as JSON string')
-def add(content, tags, priority, status, metadata):
-    """Add a new idea."""
+@click.option('--flush', 'flush_mode', type=click.Choice(['inline', 'background', 'queue']),
+              help='When to upload the capture (default: COUCHDB_CAPTURE_MODE, else inline)')
+def add(content, tags, priority, status, metadata, flush_mode):
+    """Add a new idea. It is journaled locally first, so capture works offline."""
 
     meta = {}
     if metadata:
@@ -43,13 +55,58 @@ def add(content, tags, priority, status, metadata):
     )
 
     try:
-        created = db.create_idea(idea)
-        click.echo(f"Created idea: {created._id}")
-        _display_idea(created)
+        journal.append(idea)
+    except OSError as e:
+        click.echo(f"Error queueing idea: {e}", err=True)
+        raise click.Abort()
+
+    mode = flush_mode or config.capture_mode
+    if mode == 'background':
+        _sync_in_background()
+        click.echo(f"Queued idea: {idea._id}")
+    elif mode == 'queue':
+        click.echo(f"Queued idea: {idea._id} (run 'idea sync' to upload)")
+    else:
+        summary = {}
+        try:
+            # Upload just this idea, with a short timeout so capture stays snappy;
+            # a slow server leaves it queued
+            summary = journal.flush(CouchDBClient(timeout=config.capture_timeout), ids={idea._id})
+            _mark_replica_stale()
+        except Exception as e:
+            click.echo(f"CouchDB unavailable ({e}); idea kept for 'idea sync'", err=True)
+        if summary.get('saved') or summary.get('already_saved'):
+            click.echo(f"Created idea: {idea._id}")
+            if summary['left']:
+                # CouchDB is reachable again, so drain the older backlog off to the side
+                _sync_in_background()
+        else:
+            click.echo(f"Queued idea: {idea._id}")
+    _display_idea(idea)
+
+
+@main.command()
+@click.option('--quiet', '-q', is_flag=True, help='Only report errors')
+def sync(quiet):
+    """Upload ideas queued by 'idea add'."""
+    try:
+        summary = journal.flush(db)
     except Exception as e:
-        click.echo(f"Error creating idea: {e}", err=True)
+        click.echo(f"Error syncing ideas: {e}", err=True)
         raise click.Abort()
 
+    if summary['saved'] or summary['already_saved']:
+        _mark_replica_stale()
+    for error in summary['errors']:
+        click.echo(f"Failed: {error}", err=True)
+    if not quiet:
+        click.echo(f"Uploaded {summary['saved']} idea(s)")
+        if summary['already_saved']:
+            click.echo(f"{summary['already_saved']} were already uploaded")
+        remaining = len(journal.pending())
+        if remaining:
+            click.echo(f"{remaining} idea(s) still queued")
+
 
 @main.command()
 @click.option('--limit', '-l', type=int, help='Maximum number of ideas to return')
@@ -57,43 +114,39 @@ def add(content, tags, priority, status, metadata):
 @click.option('--status', type=click.Choice(['todo', 'in-progress', 'done', 'archived']), help='Filter by status')
 @click.option('--priority', type=click.Choice(['low', 'medium', 'high']), help='Filter by priority')
 @click.option('--tag', help='Filter by tag')
+@click.option('--meta-key', '-k', help='Only ideas that have this metadata key')
 @click.option('--all', '-a', is_flag=True, help='Show all tasks including completed (done/archived)')
-def list(limit, skip, status, priority, tag, all):
-    """List ideas. Can combine filters (e.g., --status todo --priority high). By default, excludes completed tasks."""
+@click.option('--refresh', is_flag=True, help='Sync the local replica before reading')
+def list(limit, skip, status, priority, tag, meta_key, all, refresh):
+    """List ideas, newest first. Filters combine (e.g., --tag work --status todo --priority high). By default, excludes completed tasks."""
     try:
-        # Handle compound queries using optimized views
-        if status and priority:
-            ideas = db.get_by_status_and_priority(status, priority)
-        elif tag and status:
-            ideas = db.get_by_tag_and_status(tag, status)
-        elif tag and priority:
-            # No dedicated view for this, filter in Python
-            ideas = db.search_by_tags(tag)
-            ideas = [i for i in ideas if i.priority == priority]
-        elif status:
-            ideas = db.get_by_status(status)
-        elif priority:
-            ideas = db.get_by_priority(priority)
-        elif tag:
-            ideas = db.search_by_tags(tag)
+        reader = _reader(refresh)
+        # Completed tasks are excluded unless --all or an explicit status is given
+        exclude = () if all else ('done', 'archived')
+        if status or priority or tag or meta_key:
+            # Filters are answered from an index or view in CouchDB; _find also leaves out metadata
+            ideas = reader.find_ideas(
+                status=status,
+                priority=priority,
+                tag=tag,
+                metadata_key=meta_key,
+                exclude_statuses=exclude,
+                limit=limit,
+                skip=skip,
+                fields=LIST_FIELDS,
+            )
         else:
-            ideas = db.list_ideas(limit=limit, skip=skip)
-
-        # Filter out completed tasks unless --all flag is set or explicit status filter was provided
-        if not all and not status:
-            ideas = [i for i in ideas if i.status not in ['done', 'archived']]
-
-        if not ideas:
-            click.echo("No ideas found")
-            return
-
-        # Apply limit if specified for filtered results
-        if limit and (status or priority or tag):
-            ideas = ideas[:limit]
+            # Everything else streams from the by_created view, a page at a time,
+            # starting after `skip` ideas found without fetching their documents
+            ideas = islice(reader.iter_ideas(exclude_statuses=exclude, skip=skip), limit)
 
+        shown = 0
         for idea in ideas:
             _display_idea(idea)
             click.echo()
+            shown += 1
+        if not shown:
+            click.echo("No ideas found")
     except Exception as e:
         click.echo(f"Error listing ideas: {e}", err=True)
         raise click.Abort()
@@ -143,6 +196,7 @@ def update(idea_id, content, tags, add_tag, priority, status):
             idea.status = status
 
         updated = db.update_idea(idea)
+        _mark_replica_stale()
         click.echo(f"Updated idea: {updated._id}")
         _display_idea(updated)
     except Exception as e:
@@ -162,6 +216,7 @@ def delete(idea_id):
             raise click.Abort()
 
         if db.delete_idea(idea._id, idea._rev):
+            _mark_replica_stale()
             click.echo(f"Deleted idea: {idea_id}")
         else:
             click.echo(f"Failed to delete idea: {idea_id}", err=True)
@@ -172,16 +227,18 @@ def delete(idea_id):
 
 @main.command()
 @click.option('--limit', '-l', type=int, default=5, help='Maximum number of actions to return')
-def next(limit):
+@click.option('--skip', '-s', type=int, default=0, help='Number of actions to skip (for paging)')
+@click.option('--refresh', is_flag=True, help='Sync the local replica before reading')
+def next(limit, skip, refresh):
     """Get next actions (todo items sorted by priority)."""
     try:
-        ideas = db.get_next_actions()
+        ideas = _reader(refresh).get_next_actions(limit=limit, skip=skip)
         if not ideas:
             click.echo("No pending actions found")
             return
 
-        click.echo(f"Next {min(limit, len(ideas))} action(s):\n")
-        for idea in ideas[:limit]:
+        click.echo(f"Next {len(ideas)} action(s):\n")
+        for idea in ideas:
             _display_idea(idea)
             click.echo()
     except Exception as e:
@@ -190,10 +247,11 @@ def next(limit):
 
 
 @main.command()
-def tags():
+@click.option('--refresh', is_flag=True, help='Sync the local replica before reading')
+def tags(refresh):
     """List all tags with usage counts."""
     try:
-        all_tags = db.get_all_tags()
+        all_tags = _reader(refresh).get_all_tags()
         if not all_tags:
             click.echo("No tags found")
             return
@@ -212,25 +270,16 @@ def tags():
 def stats():
     """Show statistics about your ideas."""
     try:
-        from idea_capture.config import config
-        import requests
-
-        # Get counts by status
-        result = requests.get(
-            f"{config.url}/{config.database}/_design/queries/_view/by_status",
-            params={"group": "true"},
-            auth=config.auth
-        )
-        status_counts = {row["key"]: row["value"] for row in result.json().get("rows", [])}
-
-        # Get all ideas to calculate priority counts for incomplete tasks
-        all_ideas = db.list_ideas()
-        incomplete_ideas = [i for i in all_ideas if i.status not in ['done', 'archived']]
+        summary = db.get_stats()
+        status_counts = summary["by_status"]
 
         # Count priorities for incomplete tasks
         incomplete_priority_counts = {}
-        for idea in incomplete_ideas:
-            incomplete_priority_counts[idea.priority] = incomplete_priority_counts.get(idea.priority, 0) + 1
+        for status, priorities in summary["by_status_priority"].items():
+            if status in ['done', 'archived']:
+                continue
+            for priority, count in priorities.items():
+                incomplete_priority_counts[priority] = incomplete_priority_counts.get(priority, 0) + count
 
         # Display statistics
         click.echo("📊 Idea Statistics\n")
@@ -272,34 +321,231 @@ def stats():
         else:
             click.echo(f"  No active tasks")
 
-        # Get total tags
-        all_tags = db.get_all_tags()
-        total_tags = len(all_tags)
-        click.echo(f"\n🏷️  Total unique tags: {total_tags}")
+        click.echo(f"\n🏷️  Total unique tags: {summary['unique_tags']}")
 
     except Exception as e:
         click.echo(f"Error getting statistics: {e}", err=True)
         raise click.Abort()
 
 
+@main.command(name='import')
+@click.argument('file', type=click.File('r'))
+@click.option('--batch-size', '-b', type=int, default=500, help='Documents per _bulk_docs request')
+@click.option('--parallel', '-j', type=int, default=4, help='Concurrent _bulk_docs requests')
+def import_ideas(file, batch_size, parallel):
+    """Import ideas from a JSONL file (one idea per line, '-' for stdin)."""
+    bad_lines = []
+
+    def records():
+        for line_no, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                bad_lines.append(line_no)
+                continue
+            if not isinstance(record, dict) or not record.get('content'):
+                bad_lines.append(line_no)
+                continue
+            yield record
+
+    created = 0
+    conflicts = []
+    errors = []
+    try:
+        for result in db.import_ideas(records(), batch_size=batch_size, parallelism=parallel):
+            if 'error' not in result:
+                created += 1
+            elif result['error'] == 'conflict':
+                conflicts.append(result['id'])
+            else:
+                errors.append(f"{result['id']}: {result['error']} ({result.get('reason', '')})")
+    except Exception as e:
+        click.echo(f"Error importing ideas: {e}", err=True)
+        raise click.Abort()
+    finally:
+        _mark_replica_stale()
+
+    click.echo(f"Imported {created} idea(s)")
+    if conflicts:
+        click.echo(f"{len(conflicts)} conflict(s) (already exist):", err=True)
+        for doc_id in conflicts[:20]:
+            click.echo(f"   {doc_id}", err=True)
+        if len(conflicts) > 20:
+            click.echo(f"   ... and {len(conflicts) - 20} more", err=True)
+    for error in errors:
+        click.echo(f"Failed: {error}", err=True)
+    if bad_lines:
+        click.echo(f"Skipped {len(bad_lines)} invalid line(s): {bad_lines[:20]}", err=True)
+
+
+@main.command()
+@click.argument('file', type=click.File('w'), default='-')
+@click.option('--page-size', type=int, default=1000, help='Documents fetched per request')
+def export(file, page_size):
+    """Export all ideas as JSONL (to FILE, or stdout by default)."""
+    count = 0
+    try:
+        for doc in db.export_ideas(page_size=page_size):
+            file.write(json.dumps(doc, ensure_ascii=False) + '\n')
+            count += 1
+    except Exception as e:
+        click.echo(f"Error exporting ideas: {e}", err=True)
+        raise click.Abort()
+    click.echo(f"Exported {count} idea(s)", err=True)
+
+
 @main.command()
-def setup():
+@click.option('--wait', is_flag=True, help='Wait for changed views to build instead of building them in the background')
+@click.option('--quiet', '-q', is_flag=True, help='Only report errors')
+def setup(wait, quiet):
     """Set up the database and install design documents."""
+    echo = (lambda *args, **kwargs: None) if quiet else click.echo
     try:
-        click.echo("Setting up database...")
+        echo("Setting up database...")
         db.ensure_database()
-        click.echo(f"Database '{config.database}' is ready")
-
-        click.echo("Installing design documents...")
-        db.install_design_docs()
-        click.echo("Design documents installed")
+        echo(f"Database '{config.database}' is ready")
+
+        echo("Installing design documents...")
+        # Each attempt gives up after a while; CouchDB keeps building in between
+        status = db.install_design_docs(build_timeout=SETUP_BUILD_TIMEOUT)
+        while wait and status == 'building':
+            status = db.install_design_docs()
+        if status == 'installed':
+            echo("Design documents installed (views built before switching over)")
+        elif status == 'building':
+            _setup_in_background()
+            echo("Views are building in the background; the current ones serve queries until then")
+        else:
+            echo("Design documents already up to date")
 
-        click.echo("\nSetup complete!")
+        echo("\nSetup complete!")
     except Exception as e:
         click.echo(f"Error during setup: {e}", err=True)
         raise click.Abort()
 
 
+@main.group()
+def daemon():
+    """Run commands through a background daemon, avoiding per-command startup cost."""
+
+
+@daemon.command('start')
+@click.option('--foreground', is_flag=True, help='Run in this process instead of detaching')
+def daemon_start(foreground):
+    """Start the daemon (commands are forwarded to it while it runs)."""
+    from .client import request, socket_path
+
+    running = request({'control': 'ping'})
+    if running:
+        click.echo(f"Daemon already running (pid {running['pid']})")
+        _warn_daemon_config(running)
+        return
+    if foreground:
+        from .daemon import serve
+
+        click.echo(f"Listening on {socket_path()}")
+        serve()
+        return
+
+    # Start it from the caller's environment, not the one this process loaded .env into,
+    # so it resolves (and reports) the same configuration a forwarding client does
+    env = {k: v for k, v in os.environ.items() if not k.startswith('COUCHDB_')}
+    subprocess.Popen(
+        [sys.executable, '-m', 'idea_capture.daemon'],
+        env={**env, **ENV_BEFORE_DOTENV},
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    for _ in range(50):
+        time.sleep(0.1)
+        running = request({'control': 'ping'})
+        if running:
+            click.echo(f"Daemon started (pid {running['pid']}) on {socket_path()}")
+            return
+    click.echo("Daemon did not come up; try 'idea daemon start --foreground'", err=True)
+    raise click.Abort()
+
+
+@daemon.command('stop')
+def daemon_stop():
+    """Stop the daemon."""
+    from .client import request
+
+    if request({'control': 'stop'}) is None:
+        click.echo("Daemon is not running")
+    else:
+        click.echo("Daemon stopped")
+
+
+@daemon.command('status')
+def daemon_status():
+    """Show whether the daemon is running."""
+    from .client import request, socket_path
+
+    running = request({'control': 'ping'})
+    if running:
+        click.echo(f"Daemon running (pid {running['pid']}) on {socket_path()}")
+        _warn_daemon_config(running)
+    else:
+        click.echo("Daemon is not running")
+
+
+def _warn_daemon_config(ping: dict):
+    """Say so when the running daemon won't serve this directory's configuration."""
+    from .client import config_inputs
+
+    if ping.get('config') != config_inputs(ENV_BEFORE_DOTENV):
+        click.echo(
+            "Its configuration (.env / COUCHDB_* settings) differs from this one, so commands "
+            "here run in-process; restart it from here to use it",
+            err=True,
+        )
+
+
+def _reader(refresh: bool = False):
+    """Where list/next/tags read from: the local replica when enabled, else CouchDB.
+
+    The replica is synced first if `refresh` is set or it's older than
+    COUCHDB_REPLICA_MAX_AGE.
+    """
+    if replica is None:
+        return db
+    replica.refresh(force=refresh)
+    return replica
+
+
+def _sync_in_background():
+    """Start a detached 'idea sync' that outlives this command."""
+    subprocess.Popen(
+        [sys.executable, '-m', 'idea_capture.cli', 'sync', '--quiet'],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _setup_in_background():
+    """Start a detached 'idea setup --wait' to finish building and swap in changed views."""
+    subprocess.Popen(
+        [sys.executable, '-m', 'idea_capture.cli', 'setup', '--wait', '--quiet'],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _mark_replica_stale():
+    """Make the next replica read pick up a write made through CouchDB."""
+    if replica is not None:
+        replica.mark_stale()
+
+
 def _display_idea(idea: JournalIdea, detailed: bool = False):
     """Display an idea in a formatted way."""
     status_emoji = {
@@ -0,0 +1,100 @@
+"""`idea` entry point: forwards commands to the daemon when one is running.
+
+Only imports the standard library, so a forwarded command costs a socket round
+trip instead of importing click/requests and connecting to CouchDB. Without a
+daemon (or with IDEA_NO_DAEMON=1), or when the daemon was started with a
+different configuration, it runs the regular CLI in-process.
+"""
+
+from collections.abc import Mapping
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Optional
+
+# Commands the daemon runs; anything interactive or touching local files stays in-process
+DAEMON_COMMANDS = {"add", "list", "get", "next", "tags", "stats", "update", "sync"}
+
+CONNECT_TIMEOUT = 0.5
+
+
+def socket_path() -> str:
+    """Where the daemon listens (IDEA_DAEMON_SOCKET, else under ~/.cache/idea-capture)."""
+    return os.path.expanduser(
+        os.environ.get(
+            "IDEA_DAEMON_SOCKET", str(Path.home() / ".cache" / "idea-capture" / "daemon.sock")
+        )
+    )
+
+
+def config_inputs(environ: Optional[Mapping[str, str]] = None) -> dict:
+    """Everything config.py reads: COUCHDB_* variables and the two .env files it loads.
+
+    Sent with each forwarded command so the daemon only runs commands whose
+    configuration matches its own. Read raw rather than parsed, which keeps
+    python-dotenv out of the thin client.
+    """
+    environ = os.environ if environ is None else environ
+    dotenv = []
+    for path in (Path.cwd() / ".env", Path.home() / ".env"):
+        try:
+            dotenv.append(path.read_text(encoding="utf-8"))
+        except OSError:
+            dotenv.append(None)
+    return {
+        "env": {key: value for key, value in environ.items() if key.startswith("COUCHDB_")},
+        "dotenv": dotenv,
+    }
+
+
+def request(
+    payload: dict, timeout: Optional[float] = None, path: Optional[str] = None
+) -> Optional[dict]:
+    """Send one request to the daemon; None if no daemon is listening.
+
+    Raises ConnectionError if the daemon accepted the request but didn't answer,
+    since the command may already have run.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path or socket_path())
+        except OSError:
+            return None
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        with sock.makefile("rb") as response:
+            line = response.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection without answering")
+        return json.loads(line)
+    finally:
+        sock.close()
+
+
+def main():
+    argv = sys.argv[1:]
+    if argv and argv[0] in DAEMON_COMMANDS and not os.environ.get("IDEA_NO_DAEMON"):
+        try:
+            response = request({"argv": argv, "config": config_inputs()})
+        except OSError as e:
+            sys.stderr.write(f"Error talking to the idea daemon: {e}\n")
+            sys.exit(1)
+        # A daemon started with another .env or COUCHDB_* settings can't serve this command
+        if response is not None and not response.get("config_mismatch"):
+            sys.stdout.write(response["stdout"])
+            sys.stderr.write(response["stderr"])
+            sys.exit(response["exit_code"])
+
+    from .cli import main as cli_main
+
+    cli_main()
+
+
+if __name__ == "__main__":
+    main()
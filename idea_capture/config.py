@@ -4,6 +4,12 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+# COUCHDB_* variables set before the .env files are applied; the daemon compares
+# these (see client.config_inputs) with what each forwarded command was run with
+ENV_BEFORE_DOTENV = {
+    key: value for key, value in os.environ.items() if key.startswith('COUCHDB_')
+}
+
 # Load environment variables from .env file
 # Look for .env in current working directory first, then in home directory
 load_dotenv(Path.cwd() / '.env')
@@ -18,6 +24,33 @@ class Config:
         self.username = os.getenv('COUCHDB_USERNAME')
         self.password = os.getenv('COUCHDB_PASSWORD')
         self.database = os.getenv('COUCHDB_DATABASE', 'ideas')
+        # How long a successful database check is trusted (seconds); unset = process lifetime
+        ttl = os.getenv('COUCHDB_DB_CHECK_TTL')
+        self.db_check_ttl = float(ttl) if ttl else None
+        # Per-request timeout (seconds) for the CLI and MCP server clients
+        self.request_timeout = float(os.getenv('COUCHDB_TIMEOUT', '30'))
+        # Optional local SQLite replica for list/next/tags, synced from _changes
+        self.replica = os.getenv('COUCHDB_REPLICA', '').lower() in ('1', 'true', 'yes')
+        self.replica_path = os.path.expanduser(os.getenv(
+            'COUCHDB_REPLICA_PATH',
+            str(Path.home() / '.cache' / 'idea-capture' / f'{self.database}.sqlite3'),
+        ))
+        # Oldest the replica may be (seconds) before a read syncs it first
+        self.replica_max_age = float(os.getenv('COUCHDB_REPLICA_MAX_AGE', '60'))
+        # Write-ahead journal for `idea add`, and when captures are pushed to CouchDB:
+        # "inline" (right away, queued if that fails), "background" (by a detached
+        # `idea sync`), or "queue" (only by `idea sync`)
+        self.journal_path = os.path.expanduser(os.getenv(
+            'COUCHDB_JOURNAL_PATH',
+            str(Path.home() / '.cache' / 'idea-capture' / f'{self.database}-journal.jsonl'),
+        ))
+        self.capture_mode = os.getenv('COUCHDB_CAPTURE_MODE', 'inline').lower()
+        # Inline uploads give up after this long (seconds) and leave the idea queued
+        self.capture_timeout = float(os.getenv('COUCHDB_CAPTURE_TIMEOUT', '2'))
+        # View reads: "true" waits for index updates, "lazy" answers from the current
+        # index and updates afterwards, "false" never triggers an update
+        self.view_update = os.getenv('COUCHDB_VIEW_UPDATE', 'true').lower()
+        self.view_stable = os.getenv('COUCHDB_VIEW_STABLE', '').lower() in ('1', 'true', 'yes')
 
     @property
     def auth(self):
@@ -38,6 +71,10 @@ class Config:
                 "CouchDB credentials not configured. "
                 "Please create a .env file with COUCHDB_USERNAME and COUCHDB_PASSWORD"
             )
+        if self.capture_mode not in ('inline', 'background', 'queue'):
+            raise ValueError("COUCHDB_CAPTURE_MODE must be one of: inline, background, queue")
+        if self.view_update not in ('true', 'false', 'lazy'):
+            raise ValueError("COUCHDB_VIEW_UPDATE must be one of: true, false, lazy")
 
 
 # Global config instance
@@ -0,0 +1,115 @@
+"""Long-lived local daemon that runs `idea` commands for the thin client.
+
+Keeps one process with the CLI imported, the CouchDB session's connection pool
+warm, and the database check / replica state cached. Listens on a Unix socket
+(see client.socket_path) for one JSON line per request:
+
+    {"argv": ["list", "--tag", "work"], "config": {...}}
+                                -> {"stdout", "stderr", "exit_code"}
+                                   or {"config_mismatch": true}
+    {"control": "ping"}         -> {"pid", "config"}
+    {"control": "stop"}         -> {"stopping": true}
+
+Commands run one at a time: they print through click, which writes to the
+process-wide stdout/stderr captured for each request. The daemon only runs a
+command whose `config` (client.config_inputs: COUCHDB_* variables and .env
+files) matches the one it was started with; the client runs anything else
+in-process, so a project with its own .env never reaches another database.
+"""
+
+import io
+import json
+import os
+import socketserver
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from .cli import main as cli_main
+from .client import DAEMON_COMMANDS, config_inputs, request, socket_path
+from .config import ENV_BEFORE_DOTENV
+
+_cli_lock = threading.Lock()
+
+
+def run_command(argv: list[str]) -> dict:
+    """Run one CLI command in-process, capturing its output and exit code."""
+    if not argv or argv[0] not in DAEMON_COMMANDS:
+        return {"stdout": "", "stderr": f"Not a daemon command: {argv[:1]}\n", "exit_code": 2}
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with _cli_lock, redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            cli_main.main(args=argv, prog_name="idea", standalone_mode=False)
+            exit_code = 0
+        except click.exceptions.Abort:
+            click.echo("Aborted!", err=True)
+            exit_code = 1
+        except click.ClickException as e:
+            e.show()
+            exit_code = e.exit_code
+        except click.exceptions.Exit as e:
+            exit_code = e.exit_code
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            click.echo(f"Error: {e}", err=True)
+            exit_code = 1
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        payload = json.loads(line)
+        control = payload.get("control")
+        if control == "ping":
+            response = {"pid": os.getpid(), "config": self.server.config}
+        elif control == "stop":
+            response = {"stopping": True}
+        elif payload.get("config") != self.server.config:
+            response = {"config_mismatch": True}
+        else:
+            response = run_command(payload.get("argv", []))
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+        self.wfile.flush()
+        if control == "stop":
+            # Only stop once the reply is out; serve() then removes the socket
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # What this process was configured from, as the client reports it
+    config = config_inputs(ENV_BEFORE_DOTENV)
+
+
+def serve(path: Optional[str] = None):
+    """Serve until stopped. Refuses to start if another daemon answers on `path`."""
+    path = path or socket_path()
+    if os.path.exists(path):
+        if request({"control": "ping"}, timeout=2, path=path) is not None:
+            raise RuntimeError(f"A daemon is already listening on {path}")
+        os.unlink(path)  # Left behind by a daemon that didn't shut down cleanly
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    old_umask = os.umask(0o177)  # Socket is only usable by this user
+    try:
+        server = _Server(path, _Handler)
+    finally:
+        os.umask(old_umask)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,43 +1,102 @@
 """CouchDB database operations."""
 
+import hashlib
 import json
+import time
 import requests
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from requests.adapters import HTTPAdapter
+from . import queries
 from .config import config
 from .models import JournalIdea
+from .queries import DESIGN_DOC, ITER_PAGE_SIZE, MANGO_DDOC, MANGO_INDEXES, Request, key_range
+
+# Seconds to wait for a connection to CouchDB
+CONNECT_TIMEOUT = 5.0
+
+# Seconds one request waits on a view build before giving up (the build carries on)
+WARM_READ_TIMEOUT = 60.0
+
+# Fields find_ideas callers normally need; _find leaves out metadata, the largest one
+LIST_FIELDS = ["_id", "content", "tags", "priority", "status", "created", "updated"]
 
 
 class CouchDBClient:
     """Client for interacting with CouchDB."""
 
-    def __init__(self):
+    def __init__(self, timeout: Optional[float] = None):
         self.config = config
+        # (connect, read) seconds for every request; defaults to COUCHDB_TIMEOUT
+        read_timeout = timeout or self.config.request_timeout
+        self.timeout = (min(CONNECT_TIMEOUT, read_timeout), read_timeout)
         self.session = requests.Session()
         if self.config.auth:
             self.session.auth = self.config.auth
+        # Room for parallel bulk requests sharing this session
+        adapter = HTTPAdapter(pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._db_checked_at: Optional[float] = None  # monotonic time the database was last seen
 
     def _request(self, method: str, path: str, **kwargs):
         """Make HTTP request to CouchDB."""
         url = f"{self.config.url}/{path}"
+        kwargs.setdefault("timeout", self.timeout)
         response = self.session.request(method, url, **kwargs)
         response.raise_for_status()
         return response.json() if response.content else {}
 
     def ensure_database(self):
-        """Create database if it doesn't exist."""
+        """Create database if it doesn't exist (skipped while a previous check is fresh)."""
+        if queries.database_known(self._db_checked_at, self.config.db_check_ttl):
+            return
+        self._run(queries.ensure_database(self.config))
+        self._db_checked_at = time.monotonic()
+
+    def _write(self, method: str, path: str, **kwargs):
+        """Make a write request, creating the database and retrying once if it's missing."""
+        result = self._run(queries.write(self.config, Request(method, path, kwargs)))
+        self._db_checked_at = time.monotonic()
+        return result
+
+    def _perform(self, request: Request) -> tuple[Optional[dict], Optional[Exception]]:
+        """Make one plan request: its response, or the HTTP error it raised."""
         try:
-            self._request("GET", self.config.database)
+            return self._request(request.method, request.path, **request.kwargs), None
         except requests.HTTPError as e:
-            if e.response.status_code == 404:
-                self._request("PUT", self.config.database)
+            return None, e
+
+    def _run(self, plan: queries.Plan):
+        """Make the requests a queries plan asks for and return its result."""
+        response = error = None
+        while True:
+            try:
+                request = queries.advance(plan, response, error)
+            except StopIteration as done:
+                return done.value
+            response, error = self._perform(request)
+
+    def _stream(self, plan: queries.Plan) -> Iterator[JournalIdea]:
+        """Run a streaming queries plan, yielding the ideas it produces."""
+        response = error = None
+        while True:
+            try:
+                step = queries.advance(plan, response, error)
+            except StopIteration:
+                return
+            if isinstance(step, Request):
+                response, error = self._perform(step)
             else:
-                raise
+                response = error = None
+                yield step
 
     def create_idea(self, idea: JournalIdea) -> JournalIdea:
         """Create a new idea."""
-        self.ensure_database()
         doc = idea.to_dict()
-        result = self._request("POST", self.config.database, json=doc)
+        result = self._write("POST", self.config.database, json=doc)
         idea._id = result["id"]
         idea._rev = result["rev"]
         return idea
@@ -46,7 +105,7 @@ class CouchDBClient:
         """Get an idea by ID."""
         try:
             doc = self._request("GET", f"{self.config.database}/{idea_id}")
-            return JournalIdea.from_dict(doc)
+            return JournalIdea.from_doc(doc)
         except requests.HTTPError as e:
             if e.response.status_code == 404:
                 return None
@@ -69,21 +128,87 @@ class CouchDBClient:
             return False
 
     def list_ideas(self, limit: Optional[int] = None, skip: int = 0) -> list[JournalIdea]:
-        """List all ideas."""
-        params = {
-            "include_docs": "true",
-            "skip": skip,
-        }
-        if limit:
-            params["limit"] = limit
+        """List ideas, newest first."""
+        page_size = min(limit, ITER_PAGE_SIZE) if limit else ITER_PAGE_SIZE
+        return [*islice(self.iter_ideas(page_size=page_size, skip=skip), limit)]
 
-        result = self._request("GET", f"{self.config.database}/_all_docs", params=params)
-        ideas = []
-        for row in result.get("rows", []):
-            doc = row.get("doc")
-            if doc and doc.get("type") == "idea":
-                ideas.append(JournalIdea.from_dict(doc))
-        return ideas
+    def iter_ideas(
+        self,
+        page_size: int = ITER_PAGE_SIZE,
+        descending: bool = True,
+        exclude_statuses: Iterable[str] = (),
+        skip: int = 0,
+    ) -> Iterator[JournalIdea]:
+        """Stream ideas in created order from the by_created view (see queries.iter_ideas)."""
+        return self._stream(
+            queries.iter_ideas(self.config, page_size, descending, exclude_statuses, skip)
+        )
+
+    def bulk_save(
+        self, docs: Iterable[dict], batch_size: int = 500, parallelism: int = 4
+    ) -> Iterator[dict]:
+        """Save documents through _bulk_docs.
+
+        Sends `batch_size` docs per request with up to `parallelism` requests in
+        flight, reading `docs` lazily so memory stays bounded. Yields CouchDB's
+        per-document result ({"id", "rev"} or {"id", "error", "reason"}) in input order.
+        """
+        docs = iter(docs)
+        with ThreadPoolExecutor(max_workers=parallelism) as pool:
+            pending = deque()
+            while True:
+                batch = [*islice(docs, batch_size)]
+                if not batch:
+                    break
+                pending.append(pool.submit(self._bulk_docs, batch))
+                if len(pending) >= parallelism:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def _bulk_docs(self, batch: list[dict]) -> list[dict]:
+        """POST one batch to _bulk_docs."""
+        return self._write("POST", f"{self.config.database}/_bulk_docs", json={"docs": batch})
+
+    def import_ideas(
+        self, records: Iterable[dict], batch_size: int = 500, parallelism: int = 4
+    ) -> Iterator[dict]:
+        """Import idea records (e.g. from another tool or an export).
+
+        Records need at least `content`; missing fields get JournalIdea defaults.
+        A record's `_id` is kept, so re-importing reports conflicts instead of
+        duplicating ideas. `_rev` is dropped.
+        """
+        docs = (
+            JournalIdea.from_dict({k: v for k, v in record.items() if k != "_rev"}).to_dict()
+            for record in records
+        )
+        return self.bulk_save(docs, batch_size=batch_size, parallelism=parallelism)
+
+    def export_ideas(self, page_size: int = 1000) -> Iterator[dict]:
+        """Stream every idea document from _all_docs, one page in memory at a time."""
+        startkey = None
+        while True:
+            params = {"include_docs": "true", "limit": page_size + 1}
+            if startkey is not None:
+                params["startkey"] = json.dumps(startkey)
+            result = self._request("GET", f"{self.config.database}/_all_docs", params=params)
+            rows = result.get("rows", [])
+
+            for row in rows[:page_size]:
+                doc = row.get("doc")
+                if doc and doc.get("type") == "idea":
+                    doc.pop("_rev", None)
+                    yield doc
+
+            if len(rows) <= page_size:
+                return
+            startkey = rows[page_size]["key"]
+
+    def _view(self, view_name: str, design_doc: str = DESIGN_DOC, **params) -> dict:
+        """GET a view's raw result, applying the configured update/stable read mode."""
+        request = queries.view_request(self.config, view_name, design_doc, **params)
+        return self._request(request.method, request.path, **request.kwargs)
 
     def query_view(self, design_doc: str, view_name: str, **params) -> list[JournalIdea]:
         """Query a CouchDB view."""
@@ -91,15 +216,9 @@ class CouchDBClient:
         # Disable reduce when fetching documents (views with reduce functions need this)
         if "reduce" not in params:
             params["reduce"] = "false"
-        result = self._request(
-            "GET", f"{self.config.database}/_design/{design_doc}/_view/{view_name}", params=params
-        )
-        ideas = []
-        for row in result.get("rows", []):
-            doc = row.get("doc")
-            if doc:
-                ideas.append(JournalIdea.from_dict(doc))
-        return ideas
+        result = self._view(view_name, design_doc=design_doc, **params)
+        from_doc = JournalIdea.from_doc
+        return [from_doc(row["doc"]) for row in result.get("rows", []) if row.get("doc")]
 
     def get_by_status(self, status: str) -> list[JournalIdea]:
         """Get ideas by status."""
@@ -109,9 +228,29 @@ class CouchDBClient:
         """Get ideas by priority."""
         return self.query_view("queries", "by_priority", key=f'"{priority}"')
 
-    def get_next_actions(self) -> list[JournalIdea]:
-        """Get next actions (todo items sorted by priority)."""
-        return self.query_view("queries", "next_actions")
+    def get_next_actions(
+        self,
+        limit: Optional[int] = None,
+        skip: int = 0,
+        startkey: Optional[list] = None,
+        endkey: Optional[list] = None,
+    ) -> list[JournalIdea]:
+        """Get next actions (todo items sorted by priority, then oldest first).
+
+        Paging happens in the view: `limit`/`skip` and the `[priority_rank, created]`
+        key range are passed straight through, e.g. startkey=[1], endkey=[1, {}]
+        for high priority only.
+        """
+        params = {}
+        if limit:
+            params["limit"] = limit
+        if skip:
+            params["skip"] = skip
+        if startkey is not None:
+            params["startkey"] = json.dumps(startkey)
+        if endkey is not None:
+            params["endkey"] = json.dumps(endkey)
+        return self.query_view("queries", "next_actions", **params)
 
     def search_by_tags(self, tag: str) -> list[JournalIdea]:
         """Search ideas by tag."""
@@ -124,28 +263,77 @@ class CouchDBClient:
         return self.query_view("queries", "by_status_and_priority", key=json.dumps(key))
 
     def get_by_tag_and_status(self, tag: str, status: str) -> list[JournalIdea]:
-        """Get ideas by tag and status using compound key."""
-        key = [tag, status]
-        return self.query_view("queries", "by_tag_and_status", key=json.dumps(key))
+        """Get ideas by tag and status using compound key, oldest first."""
+        return self.query_view("queries", "by_tag_and_status", **key_range([tag, status]))
+
+    def find_ideas(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        tag: Optional[str] = None,
+        metadata_key: Optional[str] = None,
+        exclude_statuses: Iterable[str] = (),
+        limit: Optional[int] = None,
+        skip: int = 0,
+        descending: bool = True,
+        fields: Optional[list[str]] = None,
+    ) -> list[JournalIdea]:
+        """Find ideas matching any combination of filters (see queries.find_ideas)."""
+        return self._run(
+            queries.find_ideas(
+                self.config, status, priority, tag, metadata_key, exclude_statuses,
+                limit, skip, descending, fields,
+            )
+        )
+
+    def get_stats(self) -> dict:
+        """Get idea counts from reduce views (two small requests at any database size).
+
+        Returns total, counts by status, counts by status then priority, and the
+        number of unique tags.
+        """
+        result = self._view("by_status_and_priority", reduce="true", group_level=2)
+        priority_names = {1: "high", 2: "medium", 3: "low"}
+        by_status: dict[str, int] = {}
+        by_status_priority: dict[str, dict[str, int]] = {}
+        for row in result.get("rows", []):
+            status, rank = row["key"]
+            priority = priority_names.get(rank, "none")
+            by_status[status] = by_status.get(status, 0) + row["value"]
+            by_status_priority.setdefault(status, {})[priority] = row["value"]
+
+        return {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_status_priority": by_status_priority,
+            "unique_tags": len(self.get_all_tags()),
+        }
 
     def get_all_tags(self) -> dict[str, int]:
         """Get all unique tags with usage counts."""
-        result = self._request(
-            "GET", f"{self.config.database}/_design/queries/_view/all_tags", params={"group": "true"}
-        )
+        result = self._view("all_tags", group="true")
         return {row["key"]: row["value"] for row in result.get("rows", [])}
 
     def get_metadata_keys(self) -> dict[str, int]:
         """Get all metadata keys with usage counts."""
-        result = self._request(
-            "GET", f"{self.config.database}/_design/queries/_view/metadata_keys", params={"group": "true"}
-        )
+        result = self._view("metadata_keys", group="true")
         return {row["key"]: row["value"] for row in result.get("rows", [])}
 
-    def install_design_docs(self):
-        """Install design documents for views."""
+    def install_design_docs(self, build_timeout: float = WARM_READ_TIMEOUT) -> str:
+        """Install design documents for views, skipping the install if unchanged.
+
+        The design doc carries a hash of its views. A changed version is first
+        saved under a staging ID and its indexes are built there while
+        _design/queries keeps serving the old ones; once built, it is saved over
+        _design/queries, which reuses the built index because the view
+        definitions are identical.
+
+        Waits at most `build_timeout` seconds for the build. Returns "current"
+        (nothing changed), "installed" (built and swapped in), or "building"
+        (still staged; CouchDB keeps building, and calling again picks the
+        staged copy back up and swaps it in once it is ready).
+        """
         design_doc = {
-            "_id": "_design/queries",
             "views": {
                 # Simple views with null values - rely on include_docs for efficiency
                 "by_status": {
@@ -180,12 +368,23 @@ class CouchDBClient:
                     """,
                     "reduce": "_count"
                 },
+                # Newest/oldest-first listing; paged by startkey + startkey_docid
+                "by_created": {
+                    "map": """
+                    function(doc) {
+                        if (doc.type === 'idea') {
+                            emit(doc.created, doc.status);
+                        }
+                    }
+                    """
+                },
                 "next_actions": {
                     "map": """
                     function(doc) {
                         if (doc.type === 'idea' && doc.status === 'todo') {
                             var priority_order = {high: 1, medium: 2, low: 3};
-                            emit(priority_order[doc.priority] || 4, null);
+                            // created breaks priority ties so pages are stable
+                            emit([priority_order[doc.priority] || 4, doc.created], null);
                         }
                     }
                     """
@@ -199,14 +398,51 @@ class CouchDBClient:
                             emit([doc.status, priority_order[doc.priority] || 4], null);
                         }
                     }
-                    """
+                    """,
+                    # Grouped at level 2 this is the whole stats breakdown in one request
+                    "reduce": "_count"
                 },
+                # find_ideas drivers: keyed by the filter values then `created`, so a
+                # key range comes back in list order and pages by startkey. One row per
+                # idea and key, or startkey + startkey_docid couldn't page past repeats
                 "by_tag_and_status": {
                     "map": """
                     function(doc) {
                         if (doc.type === 'idea' && doc.tags) {
+                            var seen = {};
                             for (var i = 0; i < doc.tags.length; i++) {
-                                emit([doc.tags[i], doc.status], null);
+                                if (!seen.hasOwnProperty(doc.tags[i])) {
+                                    seen[doc.tags[i]] = true;
+                                    emit([doc.tags[i], doc.status, doc.created], doc.priority);
+                                }
+                            }
+                        }
+                    }
+                    """
+                },
+                "by_tag_created": {
+                    "map": """
+                    function(doc) {
+                        if (doc.type === 'idea' && doc.tags) {
+                            var seen = {};
+                            for (var i = 0; i < doc.tags.length; i++) {
+                                if (!seen.hasOwnProperty(doc.tags[i])) {
+                                    seen[doc.tags[i]] = true;
+                                    emit([doc.tags[i], doc.created], doc.status);
+                                }
+                            }
+                        }
+                    }
+                    """
+                },
+                "by_metadata_key": {
+                    "map": """
+                    function(doc) {
+                        if (doc.type === 'idea' && doc.metadata) {
+                            for (var key in doc.metadata) {
+                                if (doc.metadata.hasOwnProperty(key)) {
+                                    emit([key, doc.created], doc.status);
+                                }
                             }
                         }
                     }
@@ -280,15 +516,92 @@ class CouchDBClient:
             },
         }
 
+        design_doc["version"] = _design_version(design_doc["views"])
+
         self.ensure_database()
+        self.install_mango_indexes()
+        installed = self._get_design_doc(DESIGN_DOC)
+        if installed and installed.get("version") == design_doc["version"]:
+            return "current"
+
+        # The staging ID carries the version, so an earlier run's copy is reused
+        staging = f"{DESIGN_DOC}-{design_doc['version'][:12]}"
+        staged = self._get_design_doc(staging)
+        staged_rev = staged["_rev"] if staged else self._put_design_doc(staging, design_doc)["rev"]
+        if not self.warm_views(staging, timeout=build_timeout):
+            return "building"
+
         try:
-            # Try to get existing design doc to preserve _rev
-            existing = self._request("GET", f"{self.config.database}/_design/queries")
-            design_doc["_rev"] = existing["_rev"]
+            self._put_design_doc(DESIGN_DOC, design_doc, rev=installed and installed["_rev"])
+        except requests.HTTPError as e:
+            if e.response.status_code != 409:
+                raise
+            # Another install swapped the same version in first
+            current = self._get_design_doc(DESIGN_DOC)
+            if not current or current.get("version") != design_doc["version"]:
+                raise
+        try:
+            self._request("DELETE", f"{self.config.database}/_design/{staging}?rev={staged_rev}")
+            # Drop index files no design doc points at any more (admin only)
+            self._request("POST", f"{self.config.database}/_view_cleanup", json={})
         except requests.HTTPError:
             pass
+        return "installed"
+
+    def warm_views(self, design_doc: str = DESIGN_DOC, timeout: float = WARM_READ_TIMEOUT) -> bool:
+        """Wait up to `timeout` seconds for a design doc's indexes to build.
+
+        All views in a design doc share one index, so querying one builds them all.
+        Returns False if the build is still running; CouchDB carries on with it
+        after the request gives up.
+        """
+        try:
+            self._request(
+                "GET",
+                f"{self.config.database}/_design/{design_doc}/_view/by_status",
+                params={"limit": 0, "reduce": "false", "update": "true"},
+                timeout=(min(CONNECT_TIMEOUT, timeout), timeout),
+            )
+        except requests.exceptions.ReadTimeout:
+            return False
+        return True
+
+    def _get_design_doc(self, name: str) -> Optional[dict]:
+        """Fetch a design doc, or None if it doesn't exist."""
+        try:
+            return self._request("GET", f"{self.config.database}/_design/{name}")
+        except requests.HTTPError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    def _put_design_doc(self, name: str, design_doc: dict, rev: Optional[str] = None) -> dict:
+        """Save a design doc under `name`, overwriting a leftover copy if one exists."""
+        doc = {**design_doc, "_id": f"_design/{name}"}
+        if rev is None:
+            existing = self._get_design_doc(name)
+            rev = existing and existing["_rev"]
+        if rev:
+            doc["_rev"] = rev
+        return self._request("PUT", f"{self.config.database}/_design/{name}", json=doc)
+
+    def install_mango_indexes(self):
+        """Create any missing Mango indexes used by find_ideas."""
+        result = self._request("GET", f"{self.config.database}/_index")
+        existing = {index["name"] for index in result.get("indexes", [])}
+        for name, fields in MANGO_INDEXES.items():
+            if name in existing:
+                continue
+            self._request(
+                "POST",
+                f"{self.config.database}/_index",
+                json={"index": {"fields": fields}, "ddoc": MANGO_DDOC, "name": name, "type": "json"},
+            )
+
 
-        self._request("PUT", f"{self.config.database}/_design/queries", json=design_doc)
+def _design_version(views: dict) -> str:
+    """Content hash identifying a set of view definitions."""
+    return hashlib.sha256(json.dumps(views, sort_keys=True).encode()).hexdigest()
 
 
 # Global client instance
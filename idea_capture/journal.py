@@ -0,0 +1,131 @@
+"""Local write-ahead journal for captured ideas.
+
+`idea add` appends the idea document to a JSONL file (fsynced) and returns; a
+flush pushes queued documents with _bulk_docs. Each document keeps the UUID
+`_id` JournalIdea generated, so retrying a flush that partly reached CouchDB
+can't duplicate ideas: already-saved documents come back as conflicts and
+count as delivered.
+"""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Collection, Iterator, Optional
+
+from .config import config
+from .db import CouchDBClient
+from .models import JournalIdea
+
+
+class CaptureJournal:
+    """Append-only queue of idea documents waiting to be written to CouchDB."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        # Documents being flushed are moved here so captures can keep appending
+        self.flushing_path = self.path.with_name(self.path.name + ".flushing")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.flush_lock_path = self.path.with_name(self.path.name + ".flush-lock")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the journal's file lock (guards appends against the flush's rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def append(self, idea: JournalIdea):
+        """Durably queue an idea."""
+        self._append_docs([idea.to_dict()])
+
+    def _append_docs(self, docs: list[dict]):
+        with self._locked():
+            with open(self.path, "a", encoding="utf-8") as f:
+                for doc in docs:
+                    f.write(json.dumps(doc) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def pending(self) -> list[dict]:
+        """Queued documents, including any from an interrupted flush."""
+        return [*_read_docs(self.flushing_path), *_read_docs(self.path)]
+
+    def flush(self, client: CouchDBClient, ids: Optional[Collection[str]] = None) -> dict:
+        """Push queued documents to CouchDB with _bulk_docs.
+
+        Only one flush runs at a time; a concurrent call returns immediately.
+        Documents that fail (other than conflicts) are re-queued. Returns counts
+        of `saved`, `already_saved` (conflicts), `failed` and `left` (still
+        queued), plus `errors`. Network errors propagate with everything still
+        queued.
+
+        With `ids`, only those documents are sent, in one pass; the rest of the
+        queue stays for a full flush (an interrupted flush is left to one too).
+        """
+        summary = {"saved": 0, "already_saved": 0, "failed": 0, "left": 0, "errors": []}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.flush_lock_path, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return summary
+
+            while True:
+                # A .flushing file left by an interrupted flush is retried first
+                with self._locked():
+                    if not self.flushing_path.exists():
+                        if not self.path.exists():
+                            return summary
+                        os.replace(self.path, self.flushing_path)
+                    elif ids is not None:
+                        return summary
+
+                docs = _read_docs(self.flushing_path)
+                kept = []
+                if ids is not None:
+                    kept = [doc for doc in docs if doc.get("_id") not in ids]
+                    docs = [doc for doc in docs if doc.get("_id") in ids]
+                failed = []
+                for doc, result in zip(docs, client.bulk_save(docs)):
+                    if "error" not in result:
+                        summary["saved"] += 1
+                    elif result["error"] == "conflict":
+                        summary["already_saved"] += 1
+                    else:
+                        failed.append(doc)
+                        summary["errors"].append(
+                            f"{result['id']}: {result['error']} ({result.get('reason', '')})"
+                        )
+                summary["failed"] += len(failed)
+
+                if kept or failed:
+                    self._append_docs(kept + failed)
+                self.flushing_path.unlink()
+                summary["left"] = len(kept) + len(failed)
+                if ids is not None or failed:
+                    # Don't loop forever re-sending documents CouchDB rejects
+                    return summary
+
+
+def _read_docs(path: Path) -> list[dict]:
+    """Documents in a journal file; a torn last line from a crash is skipped."""
+    if not path.exists():
+        return []
+    docs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                docs.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return docs
+
+
+# Global journal instance
+journal = CaptureJournal(config.journal_path)
@@ -2,14 +2,21 @@
 
 from mcp.server import Server
 from mcp.types import Tool, TextContent
+import asyncio
 import json
-from .db import db
-from .models import Idea
+from concurrent.futures import ThreadPoolExecutor
+from .async_db import async_db
+from .db import LIST_FIELDS
+from .models import JournalIdea
+from .replica import replica
 
 
 # Create MCP server instance
 app = Server("idea-capture")
 
+# Replica reads (and the syncs they trigger) run on one thread, which owns its SQLite connection
+_replica_executor = ThreadPoolExecutor(max_workers=1) if replica is not None else None
+
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
@@ -72,6 +79,15 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Filter by tag"
                     },
+                    "metadata_key": {
+                        "type": "string",
+                        "description": "Only ideas that have this metadata key"
+                    },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "Sync the local replica before reading",
+                        "default": False
+                    },
                     "limit": {
                         "type": "integer",
                         "description": "Maximum number of ideas to return",
@@ -151,6 +167,16 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Maximum number of actions to return",
                         "default": 5
+                    },
+                    "skip": {
+                        "type": "integer",
+                        "description": "Number of actions to skip (for paging)",
+                        "default": 0
+                    },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "Sync the local replica before reading",
+                        "default": False
                     }
                 }
             }
@@ -198,14 +224,15 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
 
 async def _handle_add(args: dict) -> list[TextContent]:
     """Handle idea_add tool call."""
-    idea = Idea(
+    idea = JournalIdea(
         content=args["content"],
         tags=args.get("tags", []),
         priority=args.get("priority", "medium"),
         status=args.get("status", "todo"),
         metadata=args.get("metadata", {})
     )
-    created = db.create_idea(idea)
+    created = await async_db.create_idea(idea)
+    await _mark_replica_stale()
     return [TextContent(
         type="text",
         text=f"Created idea {created._id}\n{_format_idea(created)}"
@@ -214,19 +241,19 @@ async def _handle_add(args: dict) -> list[TextContent]:
 
 async def _handle_list(args: dict) -> list[TextContent]:
     """Handle idea_list tool call."""
-    status = args.get("status")
-    priority = args.get("priority")
-    tag = args.get("tag")
+    filters = {key: args.get(key) for key in ("status", "priority", "tag", "metadata_key")}
     limit = args.get("limit", 20)
-
-    if status:
-        ideas = db.get_by_status(status)
-    elif priority:
-        ideas = db.get_by_priority(priority)
-    elif tag:
-        ideas = db.search_by_tags(tag)
+    if replica is not None or any(filters.values()):
+        ideas = await _read(
+            "find_ideas", args.get("refresh", False), limit=limit, fields=LIST_FIELDS, **filters
+        )
     else:
-        ideas = db.list_ideas(limit=limit)
+        # Unfiltered: stream from the by_created view and stop once `limit` arrive
+        ideas = []
+        async for idea in async_db.iter_ideas(page_size=max(limit, 1)):
+            ideas.append(idea)
+            if len(ideas) >= limit:
+                break
 
     if not ideas:
         return [TextContent(type="text", text="No ideas found")]
@@ -240,7 +267,7 @@ async def _handle_list(args: dict) -> list[TextContent]:
 
 async def _handle_get(args: dict) -> list[TextContent]:
     """Handle idea_get tool call."""
-    idea = db.get_idea(args["idea_id"])
+    idea = await async_db.get_idea(args["idea_id"])
     if not idea:
         return [TextContent(type="text", text=f"Idea not found: {args['idea_id']}")]
 
@@ -249,7 +276,7 @@ async def _handle_get(args: dict) -> list[TextContent]:
 
 async def _handle_update(args: dict) -> list[TextContent]:
     """Handle idea_update tool call."""
-    idea = db.get_idea(args["idea_id"])
+    idea = await async_db.get_idea(args["idea_id"])
     if not idea:
         return [TextContent(type="text", text=f"Idea not found: {args['idea_id']}")]
 
@@ -262,7 +289,8 @@ async def _handle_update(args: dict) -> list[TextContent]:
     if "status" in args:
         idea.status = args["status"]
 
-    updated = db.update_idea(idea)
+    updated = await async_db.update_idea(idea)
+    await _mark_replica_stale()
     return [TextContent(
         type="text",
         text=f"Updated idea {updated._id}\n{_format_idea(updated)}"
@@ -271,11 +299,12 @@ async def _handle_update(args: dict) -> list[TextContent]:
 
 async def _handle_delete(args: dict) -> list[TextContent]:
     """Handle idea_delete tool call."""
-    idea = db.get_idea(args["idea_id"])
+    idea = await async_db.get_idea(args["idea_id"])
     if not idea:
         return [TextContent(type="text", text=f"Idea not found: {args['idea_id']}")]
 
-    if db.delete_idea(idea._id, idea._rev):
+    if await async_db.delete_idea(idea._id, idea._rev):
+        await _mark_replica_stale()
         return [TextContent(type="text", text=f"Deleted idea: {args['idea_id']}")]
     else:
         return [TextContent(type="text", text=f"Failed to delete idea: {args['idea_id']}")]
@@ -284,13 +313,15 @@ async def _handle_delete(args: dict) -> list[TextContent]:
 async def _handle_next_actions(args: dict) -> list[TextContent]:
     """Handle idea_next_actions tool call."""
     limit = args.get("limit", 5)
-    ideas = db.get_next_actions()
+    ideas = await _read(
+        "get_next_actions", args.get("refresh", False), limit=limit, skip=args.get("skip", 0)
+    )
 
     if not ideas:
         return [TextContent(type="text", text="No pending actions found")]
 
-    text = f"Next {min(limit, len(ideas))} action(s):\n\n"
-    for idea in ideas[:limit]:
+    text = f"Next {len(ideas)} action(s):\n\n"
+    for idea in ideas:
         text += _format_idea(idea) + "\n\n"
 
     return [TextContent(type="text", text=text)]
@@ -298,7 +329,7 @@ async def _handle_next_actions(args: dict) -> list[TextContent]:
 
 async def _handle_search_by_tags(args: dict) -> list[TextContent]:
     """Handle idea_search_by_tags tool call."""
-    ideas = db.search_by_tags(args["tag"])
+    ideas = await async_db.search_by_tags(args["tag"])
 
     if not ideas:
         return [TextContent(type="text", text=f"No ideas found with tag: {args['tag']}")]
@@ -310,7 +341,25 @@ async def _handle_search_by_tags(args: dict) -> list[TextContent]:
     return [TextContent(type="text", text=text)]
 
 
-def _format_idea(idea: Idea, detailed: bool = False) -> str:
+async def _read(method: str, refresh: bool, **kwargs):
+    """Call a read method on the local replica when enabled, else on CouchDB."""
+    if replica is None:
+        return await getattr(async_db, method)(**kwargs)
+
+    def read():
+        replica.refresh(force=refresh)
+        return getattr(replica, method)(**kwargs)
+
+    return await asyncio.get_running_loop().run_in_executor(_replica_executor, read)
+
+
+async def _mark_replica_stale():
+    """Make the next replica read pick up a write made through CouchDB."""
+    if replica is not None:
+        await asyncio.get_running_loop().run_in_executor(_replica_executor, replica.mark_stale)
+
+
+def _format_idea(idea: JournalIdea, detailed: bool = False) -> str:
     """Format an idea for display."""
     status_emoji = {
         'todo': '☐',
@@ -350,7 +399,7 @@ async def main():
     """Run the MCP server."""
     from mcp.server.stdio import stdio_server
 
-    async with stdio_server() as (read_stream, write_stream):
+    async with async_db, stdio_server() as (read_stream, write_stream):
         await app.run(
             read_stream,
             write_stream,
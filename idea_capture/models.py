@@ -4,10 +4,17 @@ from datetime import datetime
 from typing import Optional
 from uuid import uuid4
 
+# Document keys, which double as attribute names
+DOC_FIELDS = (
+    "_id", "_rev", "type", "content", "tags", "priority", "status", "metadata", "created", "updated"
+)
+
 
 class JournalIdea:
     """Represents an idea document."""
 
+    __slots__ = DOC_FIELDS
+
     def __init__(
         self,
         content: str,
@@ -49,8 +56,8 @@ class JournalIdea:
         return doc
 
     @classmethod
-    def from_dict(cls, data: dict) -> "Idea":
-        """Create Idea from CouchDB document."""
+    def from_dict(cls, data: dict) -> "JournalIdea":
+        """Create an idea from a dict, filling in defaults (use for untrusted input)."""
         return cls(
             content=data["content"],
             tags=data.get("tags", []),
@@ -63,9 +70,32 @@ class JournalIdea:
             updated=data.get("updated"),
         )
 
+    @classmethod
+    def from_doc(cls, doc: dict) -> "JournalIdea":
+        """Decode a document read back from CouchDB, without defaulting.
+
+        Stored ideas already carry their ID and timestamps, so this skips the
+        constructor. Keys missing from `doc` (e.g. left out by a _find `fields`
+        projection) read as None, or empty for tags and metadata.
+        """
+        idea = object.__new__(cls)
+        get = doc.get
+        idea._id = get("_id")
+        idea._rev = get("_rev")
+        idea.type = "idea"
+        idea.content = get("content")
+        idea.tags = get("tags") or []
+        idea.priority = get("priority")
+        idea.status = get("status")
+        idea.metadata = get("metadata") or {}
+        idea.created = get("created")
+        idea.updated = get("updated")
+        return idea
+
     def update_timestamp(self):
         """Update the updated timestamp."""
         self.updated = datetime.now().isoformat()
 
     def __repr__(self):
-        return f"Idea(id={self._id}, status={self.status}, priority={self.priority}, content={self.content[:50]}...)"
+        return f"Idea(id={self._id}, status={self.status}, priority={self.priority}, content={(self.content or '')[:50]}...)"
+
@@ -0,0 +1,398 @@
+"""CouchDB request building and paging shared by the sync and async clients.
+
+Operations that take more than one request are written once, as plans:
+generators that yield the Request they need next and are sent back its decoded
+JSON body. An HTTP error is thrown into the plan where it yielded; requests'
+and httpx's errors both carry `.response.status_code`, so a plan handles a 404
+the same way under either. Streaming plans also yield ideas between requests.
+CouchDBClient and AsyncCouchDBClient run plans over their own transport (their
+`_run` and `_stream` methods).
+"""
+
+import json
+import time
+from typing import Generator, Iterable, NamedTuple, Optional, Union
+
+from .models import JournalIdea
+
+DESIGN_DOC = "queries"
+
+# Mango (_find) indexes installed with the design docs. Keys are index names;
+# every index leads with `type` and ends with `created` so results sort by age.
+MANGO_DDOC = "mango"
+MANGO_INDEXES = {
+    "status-priority-created": ["type", "status", "priority", "created"],
+    "status-created": ["type", "status", "created"],
+    "priority-created": ["type", "priority", "created"],
+    "created": ["type", "created"],
+}
+
+# _find page size when find_ideas has no limit
+FIND_PAGE_SIZE = 1000
+
+# Rows per by_created page for iter_ideas
+ITER_PAGE_SIZE = 200
+
+# Rows per key-only by_created page when iter_ideas seeks past `skip` ideas
+SEEK_PAGE_SIZE = 1000
+
+
+class Request(NamedTuple):
+    """One CouchDB request, as arguments to a client's `_request`."""
+
+    method: str
+    path: str
+    kwargs: dict
+
+
+# Yields Requests (and ideas, when streaming), is sent responses, returns a result
+Plan = Generator[Union[Request, JournalIdea], Optional[dict], object]
+
+
+def advance(plan: Plan, response: Optional[dict] = None, error: Optional[Exception] = None):
+    """Resume `plan` with a response, or raise the request's HTTP error at its yield."""
+    if error is not None:
+        return plan.throw(error)
+    return plan.send(response)
+
+
+def view_request(config, view_name: str, design_doc: str = DESIGN_DOC, **params) -> Request:
+    """GET a view, applying the configured update/stable read mode."""
+    params.setdefault("update", config.view_update)
+    if config.view_stable:
+        params.setdefault("stable", "true")
+    path = f"{config.database}/_design/{design_doc}/_view/{view_name}"
+    return Request("GET", path, {"params": params})
+
+
+def find_request(config, query: dict) -> Request:
+    """POST a Mango query, applying the configured read mode.
+
+    _find only takes a boolean `update`, so "lazy" reads the index as is.
+    """
+    query["update"] = config.view_update == "true"
+    if config.view_stable:
+        query["stable"] = True
+    return Request("POST", f"{config.database}/_find", {"json": query})
+
+
+def database_known(checked_at: Optional[float], ttl: Optional[float]) -> bool:
+    """Whether a database last seen at monotonic time `checked_at` can be assumed to exist."""
+    return checked_at is not None and (ttl is None or time.monotonic() - checked_at < ttl)
+
+
+def ensure_database(config) -> Plan:
+    """Create the database if it doesn't exist."""
+    try:
+        yield Request("GET", config.database, {})
+    except Exception as e:  # the client's HTTP error
+        if e.response.status_code != 404:
+            raise
+        yield Request("PUT", config.database, {})
+
+
+def write(config, request: Request) -> Plan:
+    """Make a write request, creating the database and retrying once if it's missing.
+
+    Writes don't check the database up front; CouchDB answers 404 when it doesn't
+    exist, so the common case costs a single request.
+    """
+    try:
+        return (yield request)
+    except Exception as e:  # the client's HTTP error
+        if e.response.status_code != 404:
+            raise
+    yield from ensure_database(config)
+    return (yield request)
+
+
+def iter_ideas(
+    config,
+    page_size: int = ITER_PAGE_SIZE,
+    descending: bool = True,
+    exclude_statuses: Iterable[str] = (),
+    skip: int = 0,
+) -> Plan:
+    """Stream ideas in created order from the by_created view, a page at a time.
+
+    Each page starts at the previous page's extra row (startkey plus
+    startkey_docid), so paging is an index seek rather than a skip over
+    everything before it. Ideas with an excluded status are dropped as they
+    stream past. The first `skip` ideas are passed over with key-only reads, so
+    their documents are never fetched.
+    """
+    exclude = {*exclude_statuses}
+    params = {"include_docs": "true", "reduce": "false", "limit": page_size + 1}
+    if descending:
+        params["descending"] = "true"
+    if skip and not (yield from _seek_by_created(config, params, skip, exclude)):
+        return
+    from_doc = JournalIdea.from_doc
+    while True:
+        rows = (yield view_request(config, "by_created", **params)).get("rows", [])
+        for row in rows[:page_size]:
+            doc = row.get("doc")
+            if doc and doc.get("status") not in exclude:
+                yield from_doc(doc)
+
+        if len(rows) <= page_size:
+            return
+        params["startkey"] = json.dumps(rows[page_size]["key"])
+        params["startkey_docid"] = rows[page_size]["id"]
+
+
+def _seek_by_created(config, params: dict, skip: int, exclude: set[str]) -> Plan:
+    """Point `params` past the first `skip` ideas not in `exclude`.
+
+    Reads by_created without documents; each row's value is the idea's
+    status, so exclusions count the same as when streaming. Returns False
+    if fewer than `skip` ideas remain.
+    """
+    keys = {**params, "include_docs": "false", "limit": SEEK_PAGE_SIZE + 1}
+    while True:
+        rows = (yield view_request(config, "by_created", **keys)).get("rows", [])
+        start, skip = _seek_start(rows[:SEEK_PAGE_SIZE], skip, exclude)
+        if start is not None:
+            params["startkey"] = json.dumps(start["key"])
+            params["startkey_docid"] = start["id"]
+            return True
+        if len(rows) <= SEEK_PAGE_SIZE:
+            return False
+        keys["startkey"] = json.dumps(rows[SEEK_PAGE_SIZE]["key"])
+        keys["startkey_docid"] = rows[SEEK_PAGE_SIZE]["id"]
+
+
+def find_ideas(
+    config,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    tag: Optional[str] = None,
+    metadata_key: Optional[str] = None,
+    exclude_statuses: Iterable[str] = (),
+    limit: Optional[int] = None,
+    skip: int = 0,
+    descending: bool = True,
+    fields: Optional[list[str]] = None,
+) -> Plan:
+    """Find ideas matching any combination of filters, newest first by default.
+
+    The planner drives the query from the most selective access path: the
+    tag views for a tag (tags are arrays, which Mango JSON indexes can't
+    index), the by_metadata_key view for a metadata key, otherwise the Mango
+    index matching the status/priority filters.
+
+    On the Mango path _find applies every filter, `limit`, `skip`, the sort
+    and the `fields` projection on the server; view paths always return
+    whole documents. The driving views are keyed by their filter values
+    followed by `created`, so a key range over one is already in list order;
+    it is read a page at a time, and only the filters the view doesn't cover
+    (see _leftover_filters) are checked here, until `limit` ideas pass.
+    """
+    driver = _view_driver(status, tag, metadata_key)
+    if driver is None:
+        selector = _ideas_selector(status, priority, tag, metadata_key, exclude_statuses)
+        return (yield from _find_indexed(config, selector, limit, skip, descending, fields))
+
+    view, prefix = driver
+    leftover = _leftover_filters(view, status, priority, metadata_key, exclude_statuses)
+    return (yield from _find_in_view(config, view, prefix, leftover, limit, skip, descending))
+
+
+def _find_indexed(
+    config,
+    selector: dict,
+    limit: Optional[int],
+    skip: int,
+    descending: bool,
+    fields: Optional[list[str]],
+) -> Plan:
+    """Run _find against the Mango index covering the most equality filters."""
+    query = _indexed_query(selector, skip, descending, fields)
+
+    # _find defaults to 25 results; page with bookmarks when there's no limit
+    page_size = limit or FIND_PAGE_SIZE
+    ideas = []
+    while True:
+        query["limit"] = page_size
+        result = yield find_request(config, query)
+        docs = result.get("docs", [])
+        ideas.extend(map(JournalIdea.from_doc, docs))
+        if limit or len(docs) < page_size:
+            return ideas
+        query["bookmark"] = result["bookmark"]
+        query["skip"] = 0
+
+
+def _find_in_view(
+    config,
+    view: str,
+    prefix: list,
+    leftover: dict,
+    limit: Optional[int],
+    skip: int,
+    descending: bool,
+) -> Plan:
+    """Page through one driver view's key range until `limit` ideas pass `leftover`."""
+    page_size = min(limit, FIND_PAGE_SIZE) if limit else FIND_PAGE_SIZE
+    params = {
+        **key_range(prefix, descending),
+        "include_docs": "true",
+        "reduce": "false",
+        "limit": page_size + 1,
+    }
+    if skip and not leftover:
+        # Every row in range is a result, so the view can do the skipping
+        params["skip"], skip = skip, 0
+    from_doc = JournalIdea.from_doc
+    ideas: list[JournalIdea] = []
+    while True:
+        rows = (yield view_request(config, view, **params)).get("rows", [])
+        for row in rows[:page_size]:
+            doc = row.get("doc")
+            if not doc or not _matches(doc, **leftover):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            ideas.append(from_doc(doc))
+            if limit and len(ideas) == limit:
+                return ideas
+
+        if len(rows) <= page_size:
+            return ideas
+        params.pop("skip", None)
+        params["startkey"] = json.dumps(rows[page_size]["key"])
+        params["startkey_docid"] = rows[page_size]["id"]
+
+
+def key_range(prefix: list, descending: bool = False) -> dict:
+    """View parameters selecting every key that starts with `prefix`."""
+    low, high = json.dumps(prefix), json.dumps([*prefix, {}])
+    if descending:
+        return {"startkey": high, "endkey": low, "descending": "true"}
+    return {"startkey": low, "endkey": high}
+
+
+def _ideas_selector(
+    status: Optional[str],
+    priority: Optional[str],
+    tag: Optional[str],
+    metadata_key: Optional[str],
+    exclude_statuses: Iterable[str],
+) -> dict:
+    """Mango selector for find_ideas filters."""
+    selector: dict = {"type": "idea"}
+    if status:
+        selector["status"] = status
+    elif exclude_statuses:
+        selector["status"] = {"$nin": [*exclude_statuses]}
+    if priority:
+        selector["priority"] = priority
+    if metadata_key:
+        selector[_metadata_path(metadata_key)] = {"$exists": True}
+    if tag:
+        selector["tags"] = {"$elemMatch": {"$eq": tag}}
+    return selector
+
+
+def _view_driver(
+    status: Optional[str], tag: Optional[str], metadata_key: Optional[str]
+) -> Optional[tuple[str, list]]:
+    """The (view, key prefix) that narrows a find_ideas query most, or None to use Mango.
+
+    Each view's keys continue with `created` after the prefix.
+    """
+    if tag and status:
+        return "by_tag_and_status", [tag, status]
+    if tag:
+        return "by_tag_created", [tag]
+    if metadata_key:
+        return "by_metadata_key", [metadata_key]
+    return None
+
+
+def _leftover_filters(
+    view: str,
+    status: Optional[str],
+    priority: Optional[str],
+    metadata_key: Optional[str],
+    exclude_statuses: Iterable[str],
+) -> dict:
+    """The find_ideas filters a driver view's key range doesn't apply, as _matches arguments.
+
+    The tag is always in the driver's key, so it never is left over.
+    """
+    leftover: dict = {}
+    if status and view != "by_tag_and_status":
+        leftover["status"] = status
+    elif not status and exclude_statuses:
+        leftover["exclude_statuses"] = {*exclude_statuses}
+    if priority:
+        leftover["priority"] = priority
+    if metadata_key and view != "by_metadata_key":
+        leftover["metadata_key"] = metadata_key
+    return leftover
+
+
+def _matches(
+    doc: dict,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    metadata_key: Optional[str] = None,
+    exclude_statuses: Iterable[str] = (),
+) -> bool:
+    """Whether an idea document passes the given find_ideas filters."""
+    if status and doc.get("status") != status:
+        return False
+    if doc.get("status") in exclude_statuses:
+        return False
+    if priority and doc.get("priority") != priority:
+        return False
+    return not metadata_key or metadata_key in (doc.get("metadata") or {})
+
+
+def _indexed_query(
+    selector: dict, skip: int, descending: bool, fields: Optional[list[str]]
+) -> dict:
+    """_find body sorted by, and pinned to, the best Mango index for `selector`."""
+    index = _choose_index(selector)
+    direction = "desc" if descending else "asc"
+    query = {
+        # `created` must appear in the selector for the index to be usable
+        "selector": {**selector, "created": {"$gt": None}},
+        "use_index": [f"_design/{MANGO_DDOC}", index],
+        "sort": [{field: direction} for field in MANGO_INDEXES[index]],
+        "skip": skip,
+    }
+    if fields:
+        query["fields"] = fields
+    return query
+
+
+def _seek_start(
+    rows: list[dict], skip: int, exclude: set[str]
+) -> tuple[Optional[dict], int]:
+    """The by_created row `skip` kept ideas in (or None), and how many are left to skip."""
+    for row in rows:
+        if row.get("value") in exclude:
+            continue
+        if not skip:
+            return row, 0
+        skip -= 1
+    return None, skip
+
+
+def _metadata_path(key: str) -> str:
+    """Mango field path for a metadata key, escaping dots in the key."""
+    return "metadata." + key.replace(".", "\\.")
+
+
+def _choose_index(selector: dict) -> str:
+    """Pick the Mango index whose leading fields are all equality-matched."""
+    exact = {
+        field for field, value in selector.items() if isinstance(value, (str, int, float))
+    }
+    for name, fields in MANGO_INDEXES.items():
+        if set(fields[:-1]) <= exact:
+            return name
+    return "created"
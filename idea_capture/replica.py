@@ -0,0 +1,266 @@
+"""Local SQLite replica of the ideas database.
+
+Optional (COUCHDB_REPLICA=1). The replica follows CouchDB's `_changes` feed from
+the last sequence it saw, so a sync only transfers what changed. Reads for
+`list`, `next` and `tags` are then answered locally, with the same semantics as
+the design doc views and find_ideas: ideas only, next actions ordered by
+priority then created, tag counts per occurrence.
+"""
+
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import requests
+
+from .config import config
+from .db import CouchDBClient, db
+from .models import JournalIdea
+
+# Rows requested per _changes call
+CHANGES_PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ideas (
+    id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL,
+    status TEXT,
+    priority TEXT,
+    created TEXT
+);
+CREATE INDEX IF NOT EXISTS ideas_status_created ON ideas(status, created);
+CREATE INDEX IF NOT EXISTS ideas_created ON ideas(created);
+CREATE TABLE IF NOT EXISTS idea_tags (id TEXT NOT NULL, tag TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idea_tags_tag ON idea_tags(tag);
+CREATE INDEX IF NOT EXISTS idea_tags_id ON idea_tags(id);
+CREATE TABLE IF NOT EXISTS idea_metadata_keys (id TEXT NOT NULL, key TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idea_metadata_keys_key ON idea_metadata_keys(key);
+CREATE INDEX IF NOT EXISTS idea_metadata_keys_id ON idea_metadata_keys(id);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# Same ordering as the next_actions view
+PRIORITY_RANK_SQL = (
+    "CASE priority WHEN 'high' THEN 1 WHEN 'medium' THEN 2 WHEN 'low' THEN 3 ELSE 4 END"
+)
+
+
+class LocalReplica:
+    """SQLite copy of the idea documents, kept current from `_changes`."""
+
+    def __init__(self, client: CouchDBClient, path: str, max_age: float):
+        self.client = client
+        self.path = path
+        self.max_age = max_age
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The SQLite connection, opened (and the schema created) on first use."""
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            # The daemon and MCP server call in from worker threads (one at a time)
+            self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _state(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    @property
+    def source(self) -> str:
+        """The database this replica mirrors; a different one means starting over."""
+        return self.client.config.db_url
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last completed sync, or None if never synced."""
+        synced_at = self._state("synced_at")
+        if synced_at is None or self._state("source") != self.source:
+            return None
+        return time.time() - float(synced_at)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Sync if forced or the last sync is older than `max_age`. Returns whether it synced.
+
+        If CouchDB can't be reached, a replica that has synced from it before
+        keeps answering from the rows it has, with a warning on stderr.
+        """
+        age = self.age()
+        if not force and age is not None and age < self.max_age:
+            return False
+        try:
+            self.sync()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if self._state("source") != self.source or self._state("last_seq") is None:
+                raise
+            sys.stderr.write(
+                f"Warning: CouchDB is unreachable ({type(e).__name__}); "
+                "showing the local replica, which may be out of date\n"
+            )
+            return False
+        return True
+
+    def mark_stale(self):
+        """Make the next read sync first (call after writing through CouchDB)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM sync_state WHERE key = 'synced_at'")
+
+    def reset(self):
+        """Drop all local data so the next sync starts from sequence 0."""
+        with self.conn:
+            for table in ("ideas", "idea_tags", "idea_metadata_keys", "sync_state"):
+                self.conn.execute(f"DELETE FROM {table}")
+
+    def sync(self):
+        """Apply every change since the last recorded sequence."""
+        if self._state("source") != self.source:
+            self.reset()
+        since = self._state("last_seq") or "0"
+        while True:
+            try:
+                result = self.client._request(
+                    "GET",
+                    f"{self.client.config.database}/_changes",
+                    params={"since": since, "include_docs": "true", "limit": CHANGES_PAGE_SIZE},
+                )
+            except requests.HTTPError as e:
+                # A sequence from a since-recreated database is rejected; rebuild
+                if e.response.status_code == 400 and since != "0":
+                    self.reset()
+                    since = "0"
+                    continue
+                raise
+
+            with self.conn:
+                for change in result.get("results", []):
+                    self._apply(change)
+                since = result["last_seq"]
+                self._set_state("last_seq", since)
+                self._set_state("source", self.source)
+
+            if not result.get("pending"):
+                break
+
+        with self.conn:
+            self._set_state("synced_at", str(time.time()))
+
+    def _apply(self, change: dict):
+        """Upsert or remove the document behind one change row."""
+        doc_id = change["id"]
+        self.conn.execute("DELETE FROM idea_tags WHERE id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM idea_metadata_keys WHERE id = ?", (doc_id,))
+        doc = change.get("doc")
+        if change.get("deleted") or not doc or doc.get("type") != "idea":
+            self.conn.execute("DELETE FROM ideas WHERE id = ?", (doc_id,))
+            return
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO ideas (id, doc, status, priority, created) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (doc_id, json.dumps(doc), doc.get("status"), doc.get("priority"), doc.get("created")),
+        )
+        self.conn.executemany(
+            "INSERT INTO idea_tags (id, tag) VALUES (?, ?)",
+            [(doc_id, tag) for tag in doc.get("tags") or []],
+        )
+        self.conn.executemany(
+            "INSERT INTO idea_metadata_keys (id, key) VALUES (?, ?)",
+            [(doc_id, key) for key in doc.get("metadata") or {}],
+        )
+
+    def _ideas(self, sql: str, args: Iterable) -> list[JournalIdea]:
+        rows = self.conn.execute(sql, [*args]).fetchall()
+        from_doc = JournalIdea.from_doc
+        return [from_doc(json.loads(row[0])) for row in rows]
+
+    def find_ideas(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        tag: Optional[str] = None,
+        metadata_key: Optional[str] = None,
+        exclude_statuses: Iterable[str] = (),
+        limit: Optional[int] = None,
+        skip: int = 0,
+        descending: bool = True,
+        fields: Optional[list[str]] = None,
+    ) -> list[JournalIdea]:
+        """Local equivalent of CouchDBClient.find_ideas (`fields` is accepted and ignored)."""
+        clauses, args = [], []
+        if status:
+            clauses.append("status = ?")
+            args.append(status)
+        elif exclude_statuses:
+            exclude_statuses = [*exclude_statuses]
+            clauses.append(f"status NOT IN ({', '.join('?' * len(exclude_statuses))})")
+            args.extend(exclude_statuses)
+        if priority:
+            clauses.append("priority = ?")
+            args.append(priority)
+        if tag:
+            clauses.append("id IN (SELECT id FROM idea_tags WHERE tag = ?)")
+            args.append(tag)
+        if metadata_key:
+            clauses.append("id IN (SELECT id FROM idea_metadata_keys WHERE key = ?)")
+            args.append(metadata_key)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if descending else "ASC"
+        return self._ideas(
+            f"SELECT doc FROM ideas {where} ORDER BY created {order}, id {order} "
+            "LIMIT ? OFFSET ?",
+            [*args, limit if limit else -1, skip],
+        )
+
+    def iter_ideas(
+        self,
+        page_size: Optional[int] = None,
+        descending: bool = True,
+        exclude_statuses: Iterable[str] = (),
+        skip: int = 0,
+    ) -> Iterator[JournalIdea]:
+        """Stream ideas in created order (the by_created view; `page_size` is ignored)."""
+        exclude_statuses = [*exclude_statuses]
+        where = (
+            f"WHERE status NOT IN ({', '.join('?' * len(exclude_statuses))})"
+            if exclude_statuses
+            else ""
+        )
+        order = "DESC" if descending else "ASC"
+        rows = self.conn.execute(
+            f"SELECT doc FROM ideas {where} ORDER BY created {order}, id {order} "
+            "LIMIT -1 OFFSET ?",
+            [*exclude_statuses, skip],
+        )
+        from_doc = JournalIdea.from_doc
+        for row in rows:
+            yield from_doc(json.loads(row[0]))
+
+    def get_next_actions(self, limit: Optional[int] = None, skip: int = 0) -> list[JournalIdea]:
+        """Todo items by priority, then oldest first (the next_actions view)."""
+        return self._ideas(
+            f"SELECT doc FROM ideas WHERE status = 'todo' "
+            f"ORDER BY {PRIORITY_RANK_SQL}, created, id LIMIT ? OFFSET ?",
+            [limit if limit else -1, skip],
+        )
+
+    def get_all_tags(self) -> dict[str, int]:
+        """Tag usage counts (the all_tags view)."""
+        rows = self.conn.execute("SELECT tag, COUNT(*) FROM idea_tags GROUP BY tag").fetchall()
+        return dict(rows)
+
+
+# Global replica instance, or None when the replica is disabled
+replica: Optional[LocalReplica] = (
+    LocalReplica(db, config.replica_path, config.replica_max_age) if config.replica else None
+)
@@ -0,0 +1,238 @@
+"""Tests for find_ideas query planning"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import requests
+
+from idea_capture.async_db import AsyncCouchDBClient
+from idea_capture.db import CouchDBClient
+from idea_capture.queries import (
+    _choose_index,
+    _ideas_selector,
+    _leftover_filters,
+    _view_driver,
+)
+
+DOCS = [
+    {"_id": "a", "type": "idea", "status": "todo", "priority": "high", "tags": ["work"],
+     "created": "2024-01-01", "metadata": {"source": "mail"}},
+    {"_id": "b", "type": "idea", "status": "done", "priority": "low", "tags": ["work", "work"],
+     "created": "2024-01-02", "metadata": {}},
+    {"_id": "c", "type": "idea", "status": "todo", "priority": "low", "tags": ["work", "home"],
+     "created": "2024-01-03", "metadata": {"source": "chat"}},
+    {"_id": "d", "type": "idea", "status": "archived", "priority": "high", "tags": ["home"],
+     "created": "2024-01-04", "metadata": {"source": "mail"}},
+    {"_id": "e", "type": "idea", "status": "todo", "priority": "high", "tags": ["work"],
+     "created": "2024-01-05", "metadata": {}},
+]
+
+# What each driver view's map function emits for DOCS
+VIEW_KEYS = {
+    "by_tag_and_status": lambda doc: [[tag, doc["status"], doc["created"]] for tag in {*doc["tags"]}],
+    "by_tag_created": lambda doc: [[tag, doc["created"]] for tag in {*doc["tags"]}],
+    "by_metadata_key": lambda doc: [[key, doc["created"]] for key in doc["metadata"]],
+}
+
+
+def _collate(key):
+    """Sort key standing in for CouchDB collation of the keys above ({} sorts last)"""
+    return [(1, "") if part == {} else (0, part) for part in key]
+
+
+def answer_view(log, path, params):
+    """A driver view's response for DOCS, recording the request in `log`"""
+    view_name = path.rsplit("/", 1)[-1]
+    log.append((view_name, params.copy()))
+    rows = sorted(
+        ({"id": doc["_id"], "key": key, "doc": doc}
+         for doc in DOCS for key in VIEW_KEYS[view_name](doc)),
+        key=lambda row: (_collate(row["key"]), row["id"]),
+    )
+    descending = params.get("descending") == "true"
+    if descending:
+        rows.reverse()
+    first, last = (_collate(json.loads(params[name])) for name in ("startkey", "endkey"))
+    start = (first, params.get("startkey_docid", "" if not descending else "\uffff"))
+
+    def in_range(row):
+        position = (_collate(row["key"]), row["id"])
+        if descending:
+            return last <= position[0] and position <= start
+        return position[0] <= last and position >= start
+
+    rows = [row for row in rows if in_range(row)]
+    skip = params.get("skip", 0)
+    return {"rows": rows[skip:skip + params["limit"]]}
+
+
+class FakeViewClient(CouchDBClient):
+    """CouchDBClient whose views are answered from DOCS"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def _request(self, method, path, params=None, **kwargs):
+        return answer_view(self.requests, path, params)
+
+
+class FakeAsyncViewClient(AsyncCouchDBClient):
+    """AsyncCouchDBClient whose views are answered from DOCS"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def _request(self, method, path, params=None, **kwargs):
+        return answer_view(self.requests, path, params)
+
+
+def http_error(error_type, status):
+    """An HTTP error of the given library's type carrying `status`"""
+    if error_type is httpx.HTTPStatusError:
+        request = httpx.Request("GET", "http://couch/ideas")
+        return error_type("", request=request, response=httpx.Response(status, request=request))
+    return error_type(response=SimpleNamespace(status_code=status))
+
+
+class TestViewDriver:
+    @pytest.mark.parametrize("status, tag, metadata_key, expected", [
+        ("todo", "work", None, ("by_tag_and_status", ["work", "todo"])),
+        (None, "work", None, ("by_tag_created", ["work"])),
+        (None, "work", "source", ("by_tag_created", ["work"])),
+        ("todo", None, "source", ("by_metadata_key", ["source"])),
+        (None, None, "source", ("by_metadata_key", ["source"])),
+        ("todo", None, None, None),
+        (None, None, None, None),
+    ])
+    def test_driver_per_filter_combination(self, status, tag, metadata_key, expected):
+        """Test that tags lead over metadata keys and status-only queries go to Mango"""
+        assert _view_driver(status, tag, metadata_key) == expected
+
+    @pytest.mark.parametrize("view, status, priority, metadata_key, exclude, expected", [
+        ("by_tag_and_status", "todo", None, None, ["done"], {}),
+        ("by_tag_and_status", "todo", "high", None, (), {"priority": "high"}),
+        ("by_tag_created", None, None, None, ["done"], {"exclude_statuses": {"done"}}),
+        ("by_tag_created", None, None, "source", (), {"metadata_key": "source"}),
+        ("by_metadata_key", "todo", None, "source", (), {"status": "todo"}),
+        ("by_metadata_key", None, None, "source", (), {}),
+    ])
+    def test_leftover_filters(self, view, status, priority, metadata_key, exclude, expected):
+        """Test that only filters outside the driver's key are checked client-side"""
+        assert _leftover_filters(view, status, priority, metadata_key, exclude) == expected
+
+
+class TestChooseIndex:
+    @pytest.mark.parametrize("status, priority, exclude, expected", [
+        ("todo", "high", (), "status-priority-created"),
+        ("todo", None, (), "status-created"),
+        (None, "high", (), "priority-created"),
+        (None, "high", ["done"], "priority-created"),
+        (None, None, ["done"], "created"),
+        (None, None, (), "created"),
+    ])
+    def test_index_per_filter_combination(self, status, priority, exclude, expected):
+        """Test that the index with every leading field equality-matched is picked"""
+        selector = _ideas_selector(status, priority, None, None, exclude)
+        assert _choose_index(selector) == expected
+
+    def test_metadata_key_does_not_pick_an_index(self):
+        """Test that an $exists filter leaves the choice to the other fields"""
+        selector = _ideas_selector("todo", None, None, "source", ())
+        assert _choose_index(selector) == "status-created"
+
+
+class TestFindInView:
+    def test_tag_results_in_view_order(self):
+        """Test that a tag listing comes back newest first without sorting client-side"""
+        client = FakeViewClient()
+        assert [idea._id for idea in client.find_ideas(tag="work")] == ["e", "c", "b", "a"]
+        assert [idea._id for idea in client.find_ideas(tag="work", descending=False)] == [
+            "a", "b", "c", "e"]
+
+    def test_pages_until_limit_with_leftover_filter(self, monkeypatch):
+        """Test that pages keep coming until enough ideas pass the priority filter"""
+        monkeypatch.setattr("idea_capture.queries.FIND_PAGE_SIZE", 1)
+        client = FakeViewClient()
+        ideas = client.find_ideas(tag="work", priority="high", limit=2)
+        assert [idea._id for idea in ideas] == ["e", "a"]
+        assert len(client.requests) == 4
+
+    def test_skip_goes_to_the_view_without_leftovers(self):
+        """Test that skip is pushed to the view when every row in range is a result"""
+        client = FakeViewClient()
+        ideas = client.find_ideas(tag="work", status="todo", skip=1, limit=1)
+        assert [idea._id for idea in ideas] == ["c"]
+        assert client.requests[0][1]["skip"] == 1
+
+    def test_skip_counts_only_matching_ideas(self):
+        """Test that with leftover filters skip passes over matches, not rows"""
+        client = FakeViewClient()
+        ideas = client.find_ideas(tag="work", exclude_statuses=["done"], skip=1)
+        assert [idea._id for idea in ideas] == ["c", "a"]
+        assert "skip" not in client.requests[0][1]
+
+    def test_pages_past_an_idea_listing_a_tag_twice(self, monkeypatch):
+        """Test that one-row pages move past an idea whose tags repeat"""
+        monkeypatch.setattr("idea_capture.queries.FIND_PAGE_SIZE", 1)
+        client = FakeViewClient()
+        ideas = client.find_ideas(tag="work", exclude_statuses=["archived"])
+        assert [idea._id for idea in ideas] == ["e", "c", "b", "a"]
+
+    def test_metadata_key_with_status(self):
+        """Test that a metadata key drives and its status filter is checked per document"""
+        client = FakeViewClient()
+        ideas = client.find_ideas(metadata_key="source", status="todo")
+        assert [idea._id for idea in ideas] == ["c", "a"]
+        assert client.requests[0][0] == "by_metadata_key"
+
+    def test_async_client_runs_the_same_plan(self, monkeypatch):
+        """Test that the async client pages the same requests to the same result"""
+        monkeypatch.setattr("idea_capture.queries.FIND_PAGE_SIZE", 1)
+        sync, client = FakeViewClient(), FakeAsyncViewClient()
+        expected = sync.find_ideas(tag="work", priority="high", limit=2)
+        ideas = asyncio.run(client.find_ideas(tag="work", priority="high", limit=2))
+        assert [idea._id for idea in ideas] == [idea._id for idea in expected]
+        assert client.requests == sync.requests
+
+
+class TestWrite:
+    @pytest.mark.parametrize("client_type, error_type", [
+        (CouchDBClient, requests.HTTPError),
+        (AsyncCouchDBClient, httpx.HTTPStatusError),
+    ])
+    def test_missing_database_is_created_and_write_retried(self, client_type, error_type):
+        """Test that a 404 on write creates the database and repeats the write"""
+        client = client_type()
+        sent = []
+
+        def request(method, path, **kwargs):
+            sent.append((method, path))
+            if len(sent) in (1, 2):
+                raise http_error(error_type, 404)
+            return {"id": "a", "rev": "1-a"}
+
+        async def async_request(method, path, **kwargs):
+            return request(method, path, **kwargs)
+
+        client._request = request if client_type is CouchDBClient else async_request
+        result = client._write("POST", "ideas", json={})
+        if asyncio.iscoroutine(result):
+            result = asyncio.run(result)
+        assert result == {"id": "a", "rev": "1-a"}
+        assert sent == [("POST", "ideas"), ("GET", "ideas"), ("PUT", "ideas"), ("POST", "ideas")]
+
+    def test_other_errors_propagate(self):
+        """Test that a non-404 error surfaces as the client's own exception"""
+        client = CouchDBClient()
+
+        def request(method, path, **kwargs):
+            raise http_error(requests.HTTPError, 500)
+
+        client._request = request
+        with pytest.raises(requests.HTTPError):
+            client._write("POST", "ideas", json={})
@@ -0,0 +1,121 @@
+"""Tests for the capture journal's flush"""
+
+import json
+
+import pytest
+
+from idea_capture.journal import CaptureJournal
+from idea_capture.models import JournalIdea
+
+
+class FakeClient:
+    """Stands in for CouchDBClient.bulk_save, recording each batch it is sent"""
+
+    def __init__(self, results=None, error=None):
+        self.results = results or {}
+        self.error = error
+        self.batches = []
+
+    def bulk_save(self, docs):
+        docs = [*docs]
+        self.batches.append([doc["_id"] for doc in docs])
+        if self.error:
+            raise self.error
+        return [{"id": doc["_id"], **self.results.get(doc["_id"], {"rev": "1-a"})} for doc in docs]
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return CaptureJournal(str(tmp_path / "journal.jsonl"))
+
+
+def queue(journal, *contents):
+    ideas = [JournalIdea(content=content) for content in contents]
+    for idea in ideas:
+        journal.append(idea)
+    return [idea._id for idea in ideas]
+
+
+class TestFlush:
+    def test_saves_everything_queued(self, journal):
+        """Test that a clean flush uploads in one batch and empties the journal"""
+        ids = queue(journal, "one", "two")
+        client = FakeClient()
+        summary = journal.flush(client)
+        assert (summary["saved"], summary["already_saved"], summary["failed"]) == (2, 0, 0)
+        assert client.batches == [ids]
+        assert journal.pending() == []
+        assert not journal.flushing_path.exists()
+
+    def test_rejected_documents_are_requeued(self, journal):
+        """Test that a per-document error keeps just that document queued"""
+        ok, bad = queue(journal, "fine", "rejected")
+        client = FakeClient({bad: {"error": "forbidden", "reason": "read only"}})
+        summary = journal.flush(client)
+        assert (summary["saved"], summary["failed"]) == (1, 1)
+        assert summary["errors"] == [f"{bad}: forbidden (read only)"]
+        assert [doc["_id"] for doc in journal.pending()] == [bad]
+        # One pass only: rejected documents aren't retried in a loop
+        assert client.batches == [[ok, bad]]
+
+    def test_conflicts_count_as_delivered(self, journal):
+        """Test that a document already in CouchDB (a retried flush) isn't re-queued"""
+        saved, new = queue(journal, "from an earlier flush", "new")
+        client = FakeClient({saved: {"error": "conflict", "reason": "Document update conflict."}})
+        summary = journal.flush(client)
+        assert (summary["saved"], summary["already_saved"], summary["failed"]) == (1, 1, 0)
+        assert summary["errors"] == []
+        assert journal.pending() == []
+
+    def test_network_error_keeps_everything_queued(self, journal):
+        """Test that a failed request propagates and loses nothing"""
+        ids = queue(journal, "one", "two")
+        with pytest.raises(ConnectionError):
+            journal.flush(FakeClient(error=ConnectionError("unreachable")))
+        assert [doc["_id"] for doc in journal.pending()] == ids
+
+    def test_resumes_interrupted_flush(self, journal):
+        """Test that a .flushing file left by a crash is sent before newer captures"""
+        interrupted = JournalIdea(content="mid-flush when the process died")
+        journal.flushing_path.parent.mkdir(parents=True, exist_ok=True)
+        # A torn last line from the crash is skipped
+        journal.flushing_path.write_text(json.dumps(interrupted.to_dict()) + "\n{\"_id\": ")
+        (newer,) = queue(journal, "captured afterwards")
+        assert [doc["_id"] for doc in journal.pending()] == [interrupted._id, newer]
+
+        client = FakeClient()
+        summary = journal.flush(client)
+        assert summary["saved"] == 2
+        assert client.batches == [[interrupted._id], [newer]]
+        assert journal.pending() == []
+        assert not journal.flushing_path.exists()
+
+
+class TestSelectiveFlush:
+    def test_sends_only_the_given_ids(self, journal):
+        """Test that an inline flush uploads the new capture and leaves the backlog queued"""
+        older, newer, new = queue(journal, "older", "newer", "just captured")
+        client = FakeClient()
+        summary = journal.flush(client, ids={new})
+        assert (summary["saved"], summary["left"]) == (1, 2)
+        assert client.batches == [[new]]
+        assert [doc["_id"] for doc in journal.pending()] == [older, newer]
+        assert not journal.flushing_path.exists()
+
+    def test_failure_requeues_with_the_backlog(self, journal):
+        """Test that a rejected capture stays queued alongside the rest"""
+        older, new = queue(journal, "older", "just captured")
+        client = FakeClient({new: {"error": "forbidden", "reason": "read only"}})
+        summary = journal.flush(client, ids={new})
+        assert (summary["failed"], summary["left"]) == (1, 2)
+        assert sorted(doc["_id"] for doc in journal.pending()) == sorted([older, new])
+
+    def test_leaves_an_interrupted_flush_alone(self, journal):
+        """Test that recovering a .flushing file is left to a full flush"""
+        journal.flushing_path.parent.mkdir(parents=True, exist_ok=True)
+        journal.flushing_path.write_text(json.dumps(JournalIdea(content="old").to_dict()) + "\n")
+        (new,) = queue(journal, "just captured")
+        client = FakeClient()
+        assert journal.flush(client, ids={new})["saved"] == 0
+        assert client.batches == []
+        assert len(journal.pending()) == 2
@@ -0,0 +1,19 @@
+"""Tests for decoding stored ideas"""
+
+import pytest
+
+from idea_capture.models import JournalIdea
+
+
+class TestFromDoc:
+    def test_missing_keys_decode_empty(self):
+        """Test that keys a _find projection left out read as None or empty"""
+        idea = JournalIdea.from_doc({"_id": "a", "content": "x", "status": "todo"})
+        assert (idea.priority, idea.tags, idea.metadata, idea._rev) == (None, [], {}, None)
+        assert idea.to_dict()["_id"] == "a"
+
+    def test_misspelled_attribute_raises(self):
+        """Test that a typo is an AttributeError rather than a silent None"""
+        idea = JournalIdea.from_doc({"_id": "a", "content": "x"})
+        with pytest.raises(AttributeError):
+            idea.stauts  # noqa: B018
@@ -0,0 +1,130 @@
+"""Tests for the local replica's sync and reads"""
+
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from idea_capture.replica import LocalReplica
+
+PRIORITY_RANK = {"high": 1, "medium": 2, "low": 3}
+
+DOCS = [
+    {"_id": "a", "type": "idea", "content": "a", "status": "todo", "priority": "low",
+     "tags": ["work"], "created": "2024-01-01", "metadata": {}},
+    {"_id": "b", "type": "idea", "content": "b", "status": "todo", "priority": "high",
+     "tags": ["work", "home"], "created": "2024-01-02", "metadata": {"source": "mail"}},
+    {"_id": "c", "type": "idea", "content": "c", "status": "done", "priority": "high",
+     "tags": ["work"], "created": "2024-01-03", "metadata": {}},
+    {"_id": "d", "type": "idea", "content": "d", "status": "todo", "priority": "high",
+     "tags": [], "created": "2024-01-04", "metadata": {}},
+    {"_id": "e", "type": "idea", "content": "e", "status": "archived", "priority": "medium",
+     "tags": ["home"], "created": "2024-01-05", "metadata": {}},
+    {"_id": "f", "type": "idea", "content": "f", "status": "todo", "priority": "unset",
+     "tags": ["work"], "created": "2024-01-06", "metadata": {}},
+    {"_id": "_design/queries", "views": {}},
+]
+
+
+class FakeChangesClient:
+    """Serves a `_changes` feed over a list of change rows, `limit` rows at a time"""
+
+    def __init__(self, changes):
+        self.config = SimpleNamespace(database="ideas", db_url="http://couch/ideas")
+        self.changes = changes
+        self.error = None
+        self.calls = 0
+
+    def _request(self, method, path, params):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        since, limit = int(params["since"]), params["limit"]
+        page = self.changes[since:since + limit]
+        return {
+            "results": page,
+            "last_seq": str(since + len(page)),
+            "pending": len(self.changes) - since - len(page),
+        }
+
+
+def _changes(docs):
+    return [{"id": doc["_id"], "doc": doc} for doc in docs]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr("idea_capture.replica.CHANGES_PAGE_SIZE", 4)
+    return FakeChangesClient(_changes(DOCS))
+
+
+@pytest.fixture
+def replica(client, tmp_path):
+    replica = LocalReplica(client, str(tmp_path / "replica.db"), max_age=60)
+    replica.sync()
+    return replica
+
+
+def _ids(ideas):
+    return [idea._id for idea in ideas]
+
+
+class TestViewSemantics:
+    def test_next_actions_rank(self, replica):
+        """Test that next actions match the next_actions view's [rank, created] order"""
+        expected = sorted(
+            (doc for doc in DOCS if doc.get("type") == "idea" and doc["status"] == "todo"),
+            key=lambda doc: (PRIORITY_RANK.get(doc["priority"], 4), doc["created"]),
+        )
+        assert _ids(replica.get_next_actions()) == [doc["_id"] for doc in expected]
+        assert _ids(replica.get_next_actions(limit=2, skip=1)) == ["d", "a"]
+
+    def test_tag_filter(self, replica):
+        """Test that a tag filter matches the tag views, newest first"""
+        assert _ids(replica.find_ideas(tag="work")) == ["f", "c", "b", "a"]
+        assert _ids(replica.find_ideas(tag="work", status="todo", descending=False)) == [
+            "a", "b", "f"]
+
+    def test_status_exclusion(self, replica):
+        """Test that excluded statuses drop out of find_ideas and iter_ideas alike"""
+        exclude = ["done", "archived"]
+        assert _ids(replica.find_ideas(exclude_statuses=exclude)) == ["f", "d", "b", "a"]
+        assert _ids(replica.iter_ideas(exclude_statuses=exclude, skip=1)) == ["d", "b", "a"]
+
+    def test_tag_counts_per_occurrence(self, replica):
+        """Test that tag counts match the all_tags view"""
+        assert replica.get_all_tags() == {"work": 4, "home": 2}
+
+    def test_changes_update_and_delete(self, client, replica):
+        """Test that later changes replace and remove rows, non-ideas included"""
+        client.changes += [
+            {"id": "a", "doc": {**DOCS[0], "tags": ["home"], "status": "done"}},
+            {"id": "b", "deleted": True},
+        ]
+        replica.sync()
+        assert _ids(replica.find_ideas(tag="work")) == ["f", "c"]
+        assert _ids(replica.find_ideas(tag="home")) == ["e", "a"]
+        assert replica.get_all_tags() == {"work": 2, "home": 2}
+
+
+class TestRefresh:
+    def test_unreachable_serves_stale_rows(self, client, replica, capsys):
+        """Test that a failed refresh keeps answering from the replica with a warning"""
+        replica.mark_stale()
+        client.error = requests.ConnectionError("refused")
+        assert replica.refresh() is False
+        assert "unreachable" in capsys.readouterr().err
+        assert _ids(replica.find_ideas(tag="home")) == ["e", "b"]
+
+    def test_unreachable_before_first_sync_raises(self, client, tmp_path):
+        """Test that there's nothing to fall back on before the first sync"""
+        client.error = requests.ConnectionError("refused")
+        replica = LocalReplica(client, str(tmp_path / "replica.db"), max_age=60)
+        with pytest.raises(requests.ConnectionError):
+            replica.refresh()
+
+    def test_fresh_replica_skips_the_feed(self, client, replica):
+        """Test that reads within max_age don't touch CouchDB"""
+        calls = client.calls
+        assert replica.refresh() is False
+        assert client.calls == calls